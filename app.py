@@ -1,19 +1,28 @@
-def ensure_timeline_block_list_table():
+from utils.schema_readiness import schema_ensure, run_schema_checks, schema_status
+
+
+@schema_ensure('timeline_block_list')
+def _apply_timeline_block_list_table():
     """Create the timeline_block_list table if it does not exist (PostgreSQL)."""
+    from sqlalchemy import text as _sql_text
+    db.session.execute(_sql_text(
+        """
+        CREATE TABLE IF NOT EXISTS timeline_block_list (
+            event_id INTEGER NOT NULL,
+            timeline_id INTEGER NOT NULL,
+            removed_by INTEGER NULL,
+            removed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (event_id, timeline_id)
+        )
+        """
+    ))
+    db.session.commit()
+
+
+def ensure_timeline_block_list_table():
+    """Ensure timeline_block_list exists. No-op once the startup schema check passed."""
     try:
-        from sqlalchemy import text as _sql_text
-        db.session.execute(_sql_text(
-            """
-            CREATE TABLE IF NOT EXISTS timeline_block_list (
-                event_id INTEGER NOT NULL,
-                timeline_id INTEGER NOT NULL,
-                removed_by INTEGER NULL,
-                removed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                PRIMARY KEY (event_id, timeline_id)
-            )
-            """
-        ))
-        db.session.commit()
+        _apply_timeline_block_list_table()
     except Exception as _e:
         app.logger.info(f"ensure_timeline_block_list_table skipped or failed: {_e}")
 
@@ -23,12 +32,13 @@ def _normalize_timeline_policy_name(name):
     return ' '.join(raw.replace('-', ' ').split())
 
 
-def _get_active_banned_timeline_ids_and_names():
-    """Return active banned timeline ids and normalized names.
-    Safe fallback to empty sets if policy tables are unavailable.
+def _load_active_banned_timeline_ids_and_names():
+    """Read active banned timeline ids and normalized names from timeline_ban_state.
+    Used as the loader for the per-worker ban registry; raises on failure so
+    the registry does not cache an empty set.
     """
+    from sqlalchemy import text as _sql_text
     try:
-        from sqlalchemy import text as _sql_text
         rows = db.session.execute(_sql_text(
             """
             SELECT tbs.timeline_id, t.name
@@ -37,39 +47,32 @@ def _get_active_banned_timeline_ids_and_names():
             WHERE tbs.is_active = TRUE
             """
         )).mappings().all()
-        banned_ids = set()
-        banned_names = set()
-        for row in rows:
-            tid = row.get('timeline_id')
-            if tid is not None:
-                banned_ids.add(int(tid))
-            normalized = _normalize_timeline_policy_name(row.get('name'))
-            if normalized:
-                banned_names.add(normalized)
-        return banned_ids, banned_names
-    except Exception as _e:
-        try:
-            app.logger.info(f"timeline ban lookup skipped or failed: {_e}")
-        except Exception:
-            pass
-        return set(), set()
+    except Exception:
+        # Keep the request's transaction usable if the policy tables are missing
+        db.session.rollback()
+        raise
+    banned_ids = set()
+    banned_names = set()
+    for row in rows:
+        tid = row.get('timeline_id')
+        if tid is not None:
+            banned_ids.add(int(tid))
+        normalized = _normalize_timeline_policy_name(row.get('name'))
+        if normalized:
+            banned_names.add(normalized)
+    return banned_ids, banned_names
+
+
+def _get_active_banned_timeline_ids_and_names():
+    """Return active banned timeline ids and normalized names.
+    Served from the per-worker ban registry (short TTL, invalidated by the
+    reports routes). Safe fallback to empty sets if policy tables are unavailable.
+    """
+    return timeline_ban_registry.get()
 
 
 def _is_timeline_banned(timeline_id):
-    try:
-        from sqlalchemy import text as _sql_text
-        row = db.session.execute(_sql_text(
-            """
-            SELECT 1
-            FROM timeline_ban_state
-            WHERE timeline_id = :tid
-              AND is_active = TRUE
-            LIMIT 1
-            """
-        ), {'tid': int(timeline_id)}).first()
-        return bool(row)
-    except Exception:
-        return False
+    return timeline_ban_registry.is_banned(timeline_id)
 
 
 def _extract_cloudinary_public_id_from_url(url):
@@ -121,13 +124,56 @@ import os
 import platform
 import logging
 import time
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 from urllib.parse import parse_qs
 from cloud_storage import upload_file as cloudinary_upload_file
+from utils.event_hydration import (
+    hydrate_events, removed_event_ids_for_timeline, serialize_event,
+    parse_event_fields, sections_for_fields, columns_for_fields, EventFieldError,
+)
+from utils.preview_service import link_preview_service, apply_preview_to_post
+from utils.ban_registry import timeline_ban_registry
+from utils.revocation_cache import token_revocation_cache
+from utils.moderation_cache import user_moderation_cache, invalidate_user_moderation_cache
+from utils.vote_tally import fetch_vote_tallies, fetch_vote_tally, parse_event_ids, MAX_BULK_EVENT_IDS
+from utils import timeline_deletion
+from utils.tag_resolver import resolve_tags, ensure_hashtag_key_schema, stamp_hashtag_key
+from utils.timeline_event_index import (
+    ensure_timeline_event_index_schema, index_read_ready, reindex_events, reindex_timeline, feed_member_ids
+)
+from utils.timeline_facets import compute_facets, DEFAULT_TOP_N as DEFAULT_FACET_TOP_N, MAX_TOP_N as MAX_FACET_TOP_N
+from utils.timeline_density import bucket_events, parse_density_args, VOTE_RANK_WINDOW_SECONDS
+from utils.timeline_directory import ensure_timeline_directory_indexes, parse_directory_args, list_timelines
+from utils.event_search import ensure_event_search_index, parse_search_args, search_events, search_backend
+from utils.event_mentions import (
+    ensure_event_mention_table, render_content, record_event_mentions, rerender_mentions,
+    pending_rerenders, take_pending_rerenders, submit_rerender,
+)
+from utils.timeline_bundle import (
+    VIEWER_SECTIONS as BUNDLE_VIEWER_SECTIONS, parse_bundle_sections, existing_tables, load_viewer_context,
+    load_member_stats, load_action_tally, load_page_notices, load_passport,
+)
+from utils.typeahead_index import (
+    typeahead_index, parse_typeahead_query, parse_typeahead_limit, mark_stale as mark_typeahead_stale,
+    take_stale as take_typeahead_stale,
+)
+from utils.timeline_changes import (
+    ensure_timeline_event_change_table, record_event_deletions, current_sync_token, collect_changes,
+    token_expired, SyncTokenError,
+)
+from utils.timeline_version import (
+    ensure_timeline_version_table, get_timeline_version, bump_timeline_versions, bump_event_timelines, build_etag,
+    add_bump_listener
+)
+from utils.response_cache import public_response_cache, timeline_cache_key
+from utils.single_flight import timeline_single_flight, PgAdvisoryLock, DEFAULT_LOCK_WAIT_SECONDS
+from utils.timeline_feed import (
+    FeedArgumentError, fetch_timeline_event_page, parse_feed_datetime, parse_page_size,
+    ensure_tag_filter_indexes, parse_tag_filter, resolve_tag_filter, tag_filter_clauses,
+)
 import sqlalchemy
 from sqlalchemy import text, inspect
+from sqlalchemy.orm import load_only
 import sqlite3
 import json
 # from models import UserPassport  # Temporarily disabled to isolate SQLAlchemy registration issue
@@ -209,13 +255,31 @@ jwt = JWTManager(app)
 # Initialize the separate SQLAlchemy instance used by models.py
 # models_db.init_app(app)  # Commented out to avoid duplicate SQLAlchemy registration
 
+# Active timeline bans are cached per worker; see utils/ban_registry.py
+timeline_ban_registry.set_loader(_load_active_banned_timeline_ids_and_names)
+link_preview_service.init_app(app, db)
+# Mention autocomplete index; builds and refreshes run on a background thread
+typeahead_index.init_app(app, db)
+# Anonymous public timeline responses; version bumps from this worker drop its entries at once
+public_response_cache.init_app(app, db)
+add_bump_listener(public_response_cache.invalidate_timelines)
+# Optional cross-worker lock so only one worker re-renders a given cache entry at a time
+if os.getenv('PUBLIC_RESPONSE_CACHE_RECOMPUTE_LOCK', '').lower() == 'postgres':
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            public_response_cache.configure(recompute_lock=PgAdvisoryLock(
+                db.engine, wait_seconds=float(os.getenv('PUBLIC_RESPONSE_CACHE_LOCK_WAIT', DEFAULT_LOCK_WAIT_SECONDS))
+            ))
+        else:
+            logger.warning("PUBLIC_RESPONSE_CACHE_RECOMPUTE_LOCK=postgres ignored: database is not PostgreSQL")
+
 # Import blueprints
 from routes.upload import upload_bp
 from routes.cloudinary import cloudinary_bp
 from routes.media import media_bp
 from routes.community import community_bp  # Re-enabled community blueprint
 from routes.passport import passport_bp
-from routes.reports import reports_bp
+from routes.reports import reports_bp, _normalize_warning_scope, _normalize_status_message_type
 from routes.site_settings import site_settings_bp
 
 # Register blueprints
@@ -334,183 +398,6 @@ def allowed_file(filename):
 def allowed_audio_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_AUDIO_EXTENSIONS
 
-# Function to extract link preview data
-def get_link_preview(url):
-    try:
-        # Ensure URL has a scheme
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # Parse the URL to get domain information
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc.lower()
-        
-        try:
-            # Try to fetch the page content
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Get title - first try Open Graph, then regular title
-            title = ''
-            og_title = soup.find('meta', property='og:title')
-            if og_title and og_title.get('content'):
-                title = og_title.get('content')
-            elif soup.title:
-                title = soup.title.string
-                
-            # Try to get meta description - first Open Graph, then regular meta description
-            description = ''
-            og_description = soup.find('meta', property='og:description')
-            if og_description and og_description.get('content'):
-                description = og_description.get('content')
-            else:
-                description_meta = soup.find('meta', attrs={'name': 'description'})
-                if description_meta and description_meta.get('content'):
-                    description = description_meta.get('content')
-            
-            # Try to get image - first Open Graph, then Twitter card, then look for significant images
-            image = ''
-            og_image = soup.find('meta', property='og:image')
-            if og_image and og_image.get('content'):
-                image = og_image.get('content')
-            else:
-                twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
-                if twitter_image and twitter_image.get('content'):
-                    image = twitter_image.get('content')
-                else:
-                    # Look for favicon as a fallback
-                    favicon = soup.find('link', rel='icon') or soup.find('link', rel='shortcut icon')
-                    if favicon and favicon.get('href'):
-                        favicon_url = favicon.get('href')
-                        # Convert relative URL to absolute
-                        if not favicon_url.startswith(('http://', 'https://')):
-                            base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                            if favicon_url.startswith('/'):
-                                favicon_url = f"{base_url}{favicon_url}"
-                            else:
-                                favicon_url = f"{base_url}/{favicon_url}"
-                        image = favicon_url
-                    else:
-                        # If no favicon, look for significant images
-                        images = soup.find_all('img')
-                        for img in images:
-                            # Skip tiny images, icons, or images without src
-                            src = img.get('src', '')
-                            if not src or src.startswith('data:'):
-                                continue
-                                
-                            # Check for width/height attributes
-                            width = img.get('width', '0')
-                            height = img.get('height', '0')
-                            
-                            try:
-                                # Convert to integers if possible
-                                width = int(width) if width and width.isdigit() else 0
-                                height = int(height) if height and height.isdigit() else 0
-                                
-                                # If the image is reasonably sized, use it
-                                if width > 100 and height > 100:
-                                    # Convert relative URL to absolute
-                                    if not src.startswith(('http://', 'https://')):
-                                        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                                        if src.startswith('/'):
-                                            src = f"{base_url}{src}"
-                                        else:
-                                            src = f"{base_url}/{src}"
-                                    
-                                    image = src
-                                    break
-                            except (ValueError, TypeError):
-                                continue
-            
-            # If we still don't have an image, try to guess a logo URL
-            if not image:
-                # Try common logo paths
-                common_logo_paths = [
-                    '/logo.png', 
-                    '/images/logo.png', 
-                    '/assets/logo.png',
-                    '/img/logo.png',
-                    '/static/logo.png',
-                    '/favicon.ico'
-                ]
-                
-                for path in common_logo_paths:
-                    logo_url = f"{parsed_url.scheme}://{parsed_url.netloc}{path}"
-                    try:
-                        logo_response = requests.head(logo_url, timeout=2)
-                        if logo_response.status_code == 200:
-                            image = logo_url
-                            break
-                    except:
-                        continue
-            
-            # Get source domain for display
-            source = domain
-            
-            return {
-                'title': title,
-                'description': description,
-                'image': image,
-                'source': source,
-                'url': url
-            }
-            
-        except Exception as e:
-            app.logger.error(f'Error fetching URL content: {str(e)}')
-            
-            # If we couldn't fetch the page, return a basic response based on the URL
-            domain_parts = domain.split('.')
-            site_name = domain_parts[-2] if len(domain_parts) >= 2 else domain
-            
-            # Capitalize the site name
-            site_name = site_name.capitalize()
-            
-            return {
-                'title': f"{site_name} Link",
-                'description': f"Link to content on {domain}",
-                'image': f"{parsed_url.scheme}://{domain}/favicon.ico",  # Try common favicon location
-                'source': domain,
-                'url': url
-            }
-            
-    except Exception as e:
-        app.logger.error(f'Error in get_link_preview: {str(e)}')
-        
-        # Last resort fallback
-        try:
-            # Try to extract domain from URL
-            if '://' in url:
-                domain = url.split('://')[1].split('/')[0]
-            else:
-                domain = url.split('/')[0]
-                
-            site_name = domain.split('.')[-2] if len(domain.split('.')) >= 2 else domain
-            site_name = site_name.capitalize()
-            
-            return {
-                'title': f"{site_name} Link",
-                'description': "Could not fetch preview for this URL",
-                'image': "",
-                'source': domain,
-                'url': url
-            }
-        except:
-            # Absolute last resort
-            return {
-                'title': url,
-                'description': "Could not fetch preview for this URL",
-                'image': "",
-                'source': "",
-                'url': url
-            }
-
 # Models (temporarily restored while we perfect the external package integration)
 class UserMusic(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -537,6 +424,42 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+def _pending_rerenders(target):
+    # Large re-renders wait for the flushing session's commit (see _session_after_commit)
+    session = db.inspect(target).session
+    return pending_rerenders(session) if session is not None else None
+
+@db.event.listens_for(db.session, 'after_commit')
+def _session_after_commit(session):
+    event_ids = take_pending_rerenders(session)
+    if event_ids:
+        submit_rerender(app, db, event_ids)
+    if take_typeahead_stale(session):
+        typeahead_index.invalidate()
+
+@db.event.listens_for(db.session, 'after_rollback')
+def _session_after_rollback(session):
+    take_pending_rerenders(session)
+    take_typeahead_stale(session)
+
+@db.event.listens_for(User, 'after_insert')
+def _user_after_insert(mapper, connection, target):
+    # Earlier @mentions of this username now resolve to the new user
+    rerender_mentions(connection, 'user', keys=[target.username], pending=_pending_rerenders(target))
+
+@db.event.listens_for(User, 'after_update')
+def _user_after_update(mapper, connection, target):
+    state = db.inspect(target)
+    history = state.attrs.username.history
+    if not history.has_changes():
+        return
+    if state.session is not None:
+        mark_typeahead_stale(state.session)
+    rerender_mentions(
+        connection, 'user', keys=[target.username] + list(history.deleted or []), target_ids=[target.id],
+        pending=_pending_rerenders(target),
+    )
+
 
 class Timeline(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -597,6 +520,34 @@ class Timeline(db.Model):
             'quote_author': self.quote_author
         }
 
+@db.event.listens_for(Timeline, 'after_insert')
+def _timeline_after_insert(mapper, connection, target):
+    # Hashtag timelines created outside the tag resolver still get their lookup key
+    if target.timeline_type == 'hashtag' and _apply_hashtag_key_schema.is_schema_ready():
+        stamp_hashtag_key(connection, target.id)
+    # Events already tagged with this name now belong to it
+    if target.timeline_type == 'hashtag':
+        reindex_timeline(connection, target.id)
+    # Earlier mentions of this name now resolve to it
+    if target.timeline_type in ('hashtag', 'community') and _apply_hashtag_key_schema.is_schema_ready():
+        rerender_mentions(connection, target.timeline_type, keys=[target.name], pending=_pending_rerenders(target))
+
+@db.event.listens_for(Timeline, 'after_update')
+def _timeline_after_update(mapper, connection, target):
+    bump_timeline_versions(connection, [target.id])
+    state = db.inspect(target)
+    if not (state.attrs.name.history.has_changes() or state.attrs.timeline_type.history.has_changes()):
+        return
+    if state.session is not None:
+        mark_typeahead_stale(state.session)
+    if _apply_hashtag_key_schema.is_schema_ready():
+        stamp_hashtag_key(connection, target.id)
+        # Mentions of the old and the new name resolve differently now
+        names = [target.name] + list(state.attrs.name.history.deleted or [])
+        for kind in ('hashtag', 'community'):
+            rerender_mentions(connection, kind, keys=names, target_ids=[target.id], pending=_pending_rerenders(target))
+    reindex_timeline(connection, target.id)
+
 class TimelineMember(db.Model):
     __tablename__ = 'timeline_member'
     
@@ -677,6 +628,7 @@ def _normalize_username_policy(username):
     return (str(username or '').strip()).lower()
 
 
+@schema_ensure('user_moderation_tables')
 def _ensure_user_moderation_tables():
     """Create user moderation and username blocklist tables if missing."""
     with db.engine.begin() as conn:
@@ -709,6 +661,7 @@ def _ensure_user_moderation_tables():
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_username_blocklist_active ON username_blocklist (is_active);"))
 
 
+@schema_ensure('user_follow_table')
 def _ensure_user_follow_table():
     """Validate user_follow table presence (schema owned by iTimeline-DB migrations)."""
     with db.engine.begin() as conn:
@@ -730,6 +683,7 @@ def _ensure_user_follow_table():
         )
 
 
+@schema_ensure('timeline_follow_table')
 def _ensure_timeline_follow_table():
     """Validate timeline_follow table presence (schema owned by iTimeline-DB migrations)."""
     with db.engine.begin() as conn:
@@ -751,47 +705,109 @@ def _ensure_timeline_follow_table():
         )
 
 
-def ensure_timeline_cover_settings_schema():
+@schema_ensure('timeline_cover_settings')
+def _apply_timeline_cover_settings_schema():
     """Safe additive schema ensure for timeline cover settings columns."""
-    try:
-        inspector = inspect(db.engine)
-        table_names = set(inspector.get_table_names())
-        if 'timeline' not in table_names:
-            return
+    inspector = inspect(db.engine)
+    table_names = set(inspector.get_table_names())
+    if 'timeline' not in table_names:
+        return
 
-        timeline_cols = {c['name'] for c in inspector.get_columns('timeline')}
-        changed = False
+    timeline_cols = {c['name'] for c in inspector.get_columns('timeline')}
+    changed = False
 
-        if 'cover_image_url' not in timeline_cols:
-            db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_image_url TEXT'))
-            changed = True
+    if 'cover_image_url' not in timeline_cols:
+        db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_image_url TEXT'))
+        changed = True
 
-        if 'cover_upload_enabled' not in timeline_cols:
-            db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_upload_enabled BOOLEAN NOT NULL DEFAULT TRUE'))
-            changed = True
+    if 'cover_upload_enabled' not in timeline_cols:
+        db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_upload_enabled BOOLEAN NOT NULL DEFAULT TRUE'))
+        changed = True
 
-        if 'cover_portrait_x' not in timeline_cols:
-            db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_portrait_x DOUBLE PRECISION NOT NULL DEFAULT 50'))
-            changed = True
+    if 'cover_portrait_x' not in timeline_cols:
+        db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_portrait_x DOUBLE PRECISION NOT NULL DEFAULT 50'))
+        changed = True
 
-        if 'cover_portrait_y' not in timeline_cols:
-            db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_portrait_y DOUBLE PRECISION NOT NULL DEFAULT 50'))
-            changed = True
+    if 'cover_portrait_y' not in timeline_cols:
+        db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_portrait_y DOUBLE PRECISION NOT NULL DEFAULT 50'))
+        changed = True
 
-        if 'cover_landscape_x' not in timeline_cols:
-            db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_landscape_x DOUBLE PRECISION NOT NULL DEFAULT 50'))
-            changed = True
+    if 'cover_landscape_x' not in timeline_cols:
+        db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_landscape_x DOUBLE PRECISION NOT NULL DEFAULT 50'))
+        changed = True
 
-        if 'cover_landscape_y' not in timeline_cols:
-            db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_landscape_y DOUBLE PRECISION NOT NULL DEFAULT 50'))
-            changed = True
+    if 'cover_landscape_y' not in timeline_cols:
+        db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_landscape_y DOUBLE PRECISION NOT NULL DEFAULT 50'))
+        changed = True
 
-        if 'cover_zoom' not in timeline_cols:
-            db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_zoom DOUBLE PRECISION NOT NULL DEFAULT 1'))
-            changed = True
+    if 'cover_zoom' not in timeline_cols:
+        db.session.execute(text('ALTER TABLE timeline ADD COLUMN cover_zoom DOUBLE PRECISION NOT NULL DEFAULT 1'))
+        changed = True
 
-        if changed:
-            db.session.commit()
+    if changed:
+        db.session.commit()
+
+
+@schema_ensure('event_mention_table')
+def _ensure_event_mention_table():
+    """Resolved mentions per event, used to re-render events when a name changes."""
+    with db.engine.begin() as conn:
+        ensure_event_mention_table(conn)
+
+
+@schema_ensure('timeline_hashtag_key')
+def _apply_hashtag_key_schema():
+    """Stored normalized hashtag key on timeline, used by the bulk tag resolver."""
+    with db.engine.begin() as conn:
+        ensure_hashtag_key_schema(conn)
+
+
+@schema_ensure('timeline_version_table')
+def _ensure_timeline_version_table():
+    """Per-timeline version counters behind the timeline ETags."""
+    with db.engine.begin() as conn:
+        ensure_timeline_version_table(conn)
+
+
+@schema_ensure('timeline_event_index')
+def _ensure_timeline_event_index_table():
+    """Denormalized timeline/event membership (see utils/timeline_event_index.py)."""
+    with db.engine.begin() as conn:
+        ensure_timeline_event_index_schema(conn)
+
+
+@schema_ensure('event_tag_filter_indexes')
+def _ensure_tag_filter_indexes():
+    """Indexes behind server-side tag filtering of timeline events."""
+    with db.engine.begin() as conn:
+        ensure_tag_filter_indexes(conn)
+
+
+@schema_ensure('timeline_directory_indexes')
+def _ensure_timeline_directory_indexes():
+    """Paging and name search indexes for the timeline directory."""
+    with db.engine.begin() as conn:
+        ensure_timeline_directory_indexes(conn)
+
+
+@schema_ensure('event_search_index')
+def _ensure_event_search_index():
+    """Detect event.search_vector (or create the FTS5 table on SQLite) behind /search/events."""
+    with db.engine.begin() as conn:
+        ensure_event_search_index(conn)
+
+
+@schema_ensure('timeline_event_change')
+def _ensure_timeline_event_change_table():
+    """Delta sync change log (see utils/timeline_changes.py)."""
+    with db.engine.begin() as conn:
+        ensure_timeline_event_change_table(conn)
+
+
+def ensure_timeline_cover_settings_schema():
+    """Ensure timeline cover settings columns. No-op once the startup schema check passed."""
+    try:
+        _apply_timeline_cover_settings_schema()
     except Exception as exc:
         try:
             app.logger.info(f"ensure_timeline_cover_settings_schema skipped or failed: {exc}")
@@ -816,18 +832,7 @@ def _is_username_blocklisted(normalized_username):
     return bool(row)
 
 
-def _get_user_moderation_state(user_id):
-    default_state = {
-        'require_username_change': False,
-        'is_restricted': False,
-        'restricted_until': None,
-        'is_suspended': False,
-        'suspended_permanent': False,
-        'suspended_until': None,
-    }
-    if not user_id:
-        return default_state
-
+def _load_user_moderation_row(user_id):
     _ensure_user_moderation_tables()
     with db.engine.begin() as conn:
         row = conn.execute(text(
@@ -835,27 +840,20 @@ def _get_user_moderation_state(user_id):
             SELECT require_username_change,
                    restricted_until,
                    suspended_permanent,
-                   suspended_until,
-                   (restricted_until IS NOT NULL AND restricted_until > NOW()) AS is_restricted,
-                   (suspended_permanent OR (suspended_until IS NOT NULL AND suspended_until > NOW())) AS is_suspended
+                   suspended_until
             FROM user_moderation_state
             WHERE user_id = :uid
             """
         ), {'uid': int(user_id)}).mappings().first()
+    return dict(row) if row else None
 
-    if not row:
-        return default_state
 
-    restricted_until = row.get('restricted_until')
-    suspended_until = row.get('suspended_until')
-    return {
-        'require_username_change': bool(row.get('require_username_change')),
-        'is_restricted': bool(row.get('is_restricted')),
-        'restricted_until': restricted_until.isoformat() if hasattr(restricted_until, 'isoformat') else None,
-        'is_suspended': bool(row.get('is_suspended')),
-        'suspended_permanent': bool(row.get('suspended_permanent')),
-        'suspended_until': suspended_until.isoformat() if hasattr(suspended_until, 'isoformat') else None,
-    }
+user_moderation_cache.set_loader(_load_user_moderation_row)
+
+
+def _get_user_moderation_state(user_id):
+    """Moderation state for user_id, served from the per-worker cache."""
+    return user_moderation_cache.get(user_id)
 
 
 def _report_action_restriction(user_id):
@@ -919,6 +917,52 @@ def check_personal_timeline_access(timeline_id, required_role=None):
     return timeline, 'forbidden'
 
 
+def _resolve_readable_timeline(timeline_id):
+    """Load a timeline for a read endpoint, applying ban and personal ACL checks.
+
+    Returns tuple (timeline, error_response); error_response is a ready-to-return
+    (json, status) pair when the caller may not read the timeline.
+    """
+    if _is_timeline_banned(timeline_id):
+        return None, _banned_timeline_response(403)
+
+    timeline = Timeline.query.get(timeline_id)
+    if not timeline:
+        return None, (jsonify({'error': 'Timeline not found'}), 404)
+
+    if getattr(timeline, 'timeline_type', None) == 'personal':
+        _, role = check_personal_timeline_access(timeline.id)
+        if role == 'not_found':
+            return None, (jsonify({'error': 'Personal timeline not found'}), 404)
+        if role == 'forbidden':
+            return None, (jsonify({'error': 'Access denied to personal timeline'}), 403)
+
+    return timeline, None
+
+
+def _timeline_etag(kind, timeline_id, *vary):
+    """Strong ETag for a timeline read endpoint, from the timeline's version counter."""
+    return build_etag(kind, timeline_id, get_timeline_version(db.session, timeline_id), *vary)
+
+
+def _not_modified_response(etag):
+    """304 response when If-None-Match already holds etag, else None."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = app.response_class(status=304)
+    return _with_etag(response, etag)
+
+
+def _with_etag(rv, etag):
+    """Attach etag to a view return value; clients must revalidate before reuse."""
+    response = make_response(rv)
+    if response.status_code in (200, 304):
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Authorization')
+    return response
+
+
 def _get_site_admin_role(user_id):
     """Return SiteOwner/SiteAdmin role string when available, else None."""
     try:
@@ -1133,6 +1177,15 @@ class Event(db.Model):
     def __repr__(self):
         return f'<Event {self.title}>'
 
+@db.event.listens_for(Event, 'after_insert')
+def _event_after_insert(mapper, connection, target):
+    record_event_mentions(connection, target.id, target.content)
+
+@db.event.listens_for(Event, 'after_update')
+def _event_after_update(mapper, connection, target):
+    if db.inspect(target).attrs.content.history.has_changes():
+        record_event_mentions(connection, target.id, target.content)
+
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -1220,12 +1273,47 @@ class Vote(db.Model):
         db.UniqueConstraint('event_id', 'user_id', name='uq_event_user_vote'),
     )
 
+def _bump_owner_timeline_version(mapper, connection, target):
+    bump_timeline_versions(connection, [target.timeline_id])
+
+# Rows that belong to one timeline and show up in its read endpoints
+for _timeline_scoped_model in (TimelineMember, TimelineAction, TimelineActionVote,
+                               EventTimelineAssociation, CommunityInfoCard):
+    for _flush_event in ('after_insert', 'after_update', 'after_delete'):
+        db.event.listen(_timeline_scoped_model, _flush_event, _bump_owner_timeline_version)
+
+def _jwt_revocation_retention():
+    """Longest token lifetime; older blocklist rows cannot match a live token."""
+    lifetimes = [
+        app.config.get('JWT_ACCESS_TOKEN_EXPIRES'),
+        app.config.get('JWT_REFRESH_TOKEN_EXPIRES'),
+    ]
+    return max(l for l in lifetimes if isinstance(l, timedelta))
+
+def _fetch_revoked_tokens_since(since):
+    try:
+        rows = db.session.execute(
+            text("SELECT jti, created_at FROM token_blocklist WHERE created_at >= :since"),
+            {'since': since}
+        ).all()
+    except Exception:
+        db.session.rollback()
+        raise
+    return [(r[0], r[1]) for r in rows]
+
+def _lookup_revoked_token(jti):
+    return TokenBlocklist.query.filter_by(jti=jti).first() is not None
+
+token_revocation_cache.configure(
+    fetch_since=_fetch_revoked_tokens_since,
+    lookup=_lookup_revoked_token,
+    retention=_jwt_revocation_retention(),
+)
+
 # JWT Configuration
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
-    jti = jwt_payload["jti"]
-    token = TokenBlocklist.query.filter_by(jti=jti).first()
-    return token is not None
+    return token_revocation_cache.is_revoked(jwt_payload["jti"])
 
 @jwt.unauthorized_loader
 def unauthorized_callback(error):
@@ -1424,20 +1512,17 @@ def create_post(timeline_id):
             created_by=1  # Temporary default user ID
         )
         
-        if new_post.url:
-            try:
-                link_preview = get_link_preview(new_post.url)
-                new_post.url_title = link_preview['url_title']
-                new_post.url_description = link_preview['url_description']
-                new_post.url_image = link_preview['url_image']
-            except Exception as preview_error:
-                print(f"Error fetching link preview: {str(preview_error)}")
-                # Continue without link preview if it fails
-                pass
+        # Use a cached preview if we have one; otherwise fill it in the background after commit
+        cached_preview = link_preview_service.get_cached(new_post.url) if new_post.url else None
+        if cached_preview:
+            apply_preview_to_post(new_post, cached_preview)
         
         db.session.add(new_post)
         db.session.commit()
         
+        if new_post.url and not cached_preview:
+            link_preview_service.schedule_post_fill(new_post.id, new_post.url)
+        
         user = User.query.get(1)  # Temporary default user ID
         
         return jsonify({
@@ -1495,17 +1580,17 @@ def create_post_without_timeline():
             image=image  # Add the image URL to the post
         )
 
-        # If URL is provided, fetch preview data
-        if url:
-            preview_data = get_link_preview(url)
-            if preview_data:
-                new_post.url_title = preview_data.get('title')
-                new_post.url_description = preview_data.get('description')
-                new_post.url_image = preview_data.get('image')
+        # If URL is provided, use a cached preview or fetch it in the background after commit
+        preview_data = link_preview_service.get_cached(url) if url else None
+        if preview_data:
+            apply_preview_to_post(new_post, preview_data)
 
         db.session.add(new_post)
         db.session.commit()
 
+        if url and not preview_data:
+            link_preview_service.schedule_post_fill(new_post.id, url)
+
         # Add tags
         for tag_name in tags:
             tag = Tag.query.filter(db.func.lower(Tag.name) == tag_name.lower()).first()
@@ -1858,45 +1943,64 @@ def get_user_music(user_id):
         app.logger.error(f'Error getting user music preferences: {str(e)}')
         return jsonify({'error': str(e)}), 500
 
+@schema_ensure('timeline_delete_job_table')
+def _ensure_timeline_delete_job_table():
+    with db.engine.begin() as conn:
+        timeline_deletion.ensure_timeline_delete_job_table(conn)
+
+def _delete_timeline_response(timeline_id):
+    """Delete a timeline set-based; large timelines go to a chunked background job (202)."""
+    timeline = Timeline.query.get(timeline_id)
+    if not timeline:
+        return jsonify({'error': 'Timeline not found'}), 404
+    timeline_id = timeline.id
+
+    total_events = timeline_deletion.count_direct_events(db.session, timeline_id)
+    if total_events <= timeline_deletion.SYNC_LIMIT:
+        result = timeline_deletion.delete_timeline_now(db.session, timeline_id)
+        return jsonify(dict(result, message='Timeline deleted successfully')), 200
+
+    _ensure_timeline_delete_job_table()
+    job = timeline_deletion.find_active_job(db.session, timeline_id)
+    if job is None:
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            identity = None
+        job_id = timeline_deletion.create_job(
+            db.session, timeline_id, total_events,
+            requested_by=int(identity) if identity else None
+        )
+        timeline_deletion.submit_job(app, db, job_id, timeline_id)
+        job = timeline_deletion.get_job(db.session, job_id)
+    return jsonify({
+        'message': 'Timeline deletion started',
+        'job': job,
+        'status_url': f"/api/v1/timeline-deletions/{job['job_id']}"
+    }), 202
+
+@app.route('/api/timeline-deletions/<int:job_id>', methods=['GET'])
+@app.route('/api/v1/timeline-deletions/<int:job_id>', methods=['GET'])
+def get_timeline_deletion_job(job_id):
+    try:
+        _ensure_timeline_delete_job_table()
+        job = timeline_deletion.get_job(db.session, job_id)
+        if not job:
+            return jsonify({'error': 'Deletion job not found'}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f'Error fetching timeline deletion job: {str(e)}')
+        return jsonify({'error': 'Failed to fetch deletion job'}), 500
+
 @app.route('/api/timelines/<int:timeline_id>', methods=['DELETE'])
 @app.route('/api/v1/timelines/<int:timeline_id>', methods=['DELETE'])
 @jwt_required()
 def delete_timeline(timeline_id):
     try:
         app.logger.info(f'Deleting timeline {timeline_id}')
-        
-        # Get the timeline
-        timeline = Timeline.query.get(timeline_id)
-        if not timeline:
-            return jsonify({'error': 'Timeline not found'}), 404
-            
-        # Get all events that are directly in this timeline
-        direct_events = Event.query.filter_by(timeline_id=timeline_id).all()
-        
-        # For each direct event, remove it from the timeline
-        for event in direct_events:
-            # If the event is referenced in other timelines, just remove it from this one
-            if event.referenced_in:
-                # Keep the event, but change its primary timeline to one of its references
-                event.timeline_id = event.referenced_in[0].id
-                # Remove this timeline from its references
-                event.referenced_in.remove(timeline)
-            else:
-                # If the event is not referenced elsewhere, delete it
-                db.session.delete(event)
-        
-        # Find tags associated with this timeline
-        associated_tags = Tag.query.filter_by(timeline_id=timeline_id).all()
-        
-        # For each tag, remove the timeline association
-        for tag in associated_tags:
-            tag.timeline_id = None
-        
-        # Delete the timeline
-        db.session.delete(timeline)
-        db.session.commit()
-        
-        return jsonify({'message': 'Timeline deleted successfully'}), 200
+        return _delete_timeline_response(timeline_id)
     except Exception as e:
         db.session.rollback()
         app.logger.error(f'Error deleting timeline: {str(e)}')
@@ -2110,6 +2214,7 @@ def logout():
         token_block = TokenBlocklist(jti=jti, user_id=user_id)
         db.session.add(token_block)
         db.session.commit()
+        token_revocation_cache.add(jti, token_block.created_at)
         
         return jsonify({'message': 'Successfully logged out'}), 200
     except Exception as e:
@@ -2191,6 +2296,7 @@ def update_profile():
                         updated_at = NOW()
                     """
                 ), {'uid': int(current_user_id)})
+            invalidate_user_moderation_cache(current_user_id)
             
         if 'email' in form_data and form_data['email'] != user.email:
             if User.query.filter_by(email=form_data['email']).first():
@@ -2256,6 +2362,7 @@ def complete_required_username_change():
                     updated_at = NOW()
                 """
             ), {'uid': current_user_id})
+        invalidate_user_moderation_cache(current_user_id)
 
         refreshed_state = _get_user_moderation_state(current_user_id)
         return jsonify({
@@ -2277,11 +2384,17 @@ def complete_required_username_change():
 @app.route('/api/timeline-v3', methods=['GET'])
 @app.route('/api/v1/timeline-v3', methods=['GET'])
 def get_timelines_v3():
+    """Every timeline, newest first. Prefer /timeline-v3/directory, which pages and searches."""
     try:
         banned_timeline_ids, _ = _get_active_banned_timeline_ids_and_names()
-        timelines = Timeline.query.order_by(Timeline.created_at.desc()).all()
+        # Only the columns the response needs, with bans filtered in SQL
+        query = db.session.query(
+            Timeline.id, Timeline.name, Timeline.description, Timeline.created_at,
+            Timeline.timeline_type, Timeline.created_by,
+        )
         if banned_timeline_ids:
-            timelines = [tl for tl in timelines if tl.id not in banned_timeline_ids]
+            query = query.filter(Timeline.id.notin_(banned_timeline_ids))
+        timelines = query.order_by(Timeline.created_at.desc()).all()
         return jsonify([{
             'id': timeline.id,
             'name': timeline.name,
@@ -2295,6 +2408,147 @@ def get_timelines_v3():
         app.logger.error(f'Error fetching timelines: {str(e)}')
         return jsonify({'error': 'Failed to fetch timelines'}), 500
 
+@app.route('/api/timeline-v3/directory', methods=['GET'])
+@app.route('/api/v1/timeline-v3/directory', methods=['GET'])
+@jwt_required(optional=True)
+def get_timeline_directory():
+    """
+    Paginated timeline directory for pickers and browsing.
+
+    Query params:
+      - limit: page size (default 50, max 200)
+      - cursor: opaque cursor returned as next_cursor by the previous page
+      - type: comma-separated timeline types (hashtag, community, personal)
+      - visibility: comma-separated visibilities (public, private)
+      - q: name search, case-insensitive
+      - mode: 'prefix' (default) or 'fuzzy' (trigram similarity)
+      - sort: 'recent' (default without q) or 'name' (default with q);
+        fuzzy results are ordered by similarity
+
+    Banned timelines and other users' personal timelines are left out.
+    Returns {'timelines': [...], 'next_cursor': str|None, 'has_more': bool}.
+    """
+    try:
+        try:
+            limit = parse_page_size(request.args.get('limit'))
+            filters = parse_directory_args(
+                request.args.get('type'),
+                request.args.get('visibility'),
+                request.args.get('q'),
+                request.args.get('mode'),
+                request.args.get('sort'),
+            )
+            banned_timeline_ids, _ = _get_active_banned_timeline_ids_and_names()
+            timelines, next_cursor = list_timelines(
+                db.session,
+                filters,
+                limit,
+                cursor=request.args.get('cursor') or None,
+                viewer_id=get_jwt_identity(),
+                banned_timeline_ids=banned_timeline_ids,
+            )
+        except FeedArgumentError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        return jsonify({
+            'timelines': timelines,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f'Error listing timeline directory: {str(e)}')
+        return jsonify({'error': 'Failed to list timelines'}), 500
+
+@app.route('/api/search/events', methods=['GET'])
+@app.route('/api/v1/search/events', methods=['GET'])
+@jwt_required(optional=True)
+def search_timeline_events():
+    """
+    Ranked full-text search over event titles, link titles and descriptions.
+
+    Query params:
+      - q: search text (required); on PostgreSQL quoted phrases, 'or' and
+        -word exclusions are understood
+      - timeline_id: search one timeline's events instead of every readable timeline
+      - type: comma-separated event types (remark, news, media)
+      - tag: comma-separated tag names; every tag must be on the event
+      - from / to: optional ISO dates bounding event_date (inclusive)
+      - limit: page size (default 50, max 200)
+      - cursor: opaque cursor returned as next_cursor by the previous page
+      - fields / include: sparse fieldset, as for get_timeline_v3_events
+
+    Events come back best match first in the same shape as
+    get_timeline_v3_events, wrapped as {'events': [...], 'next_cursor':
+    str|None, 'has_more': bool}.
+    """
+    try:
+        if search_backend() is None:
+            return jsonify({'error': 'Search is not available'}), 503
+        try:
+            limit = parse_page_size(request.args.get('limit'))
+            filters = parse_search_args(request.args.get('q'), request.args.get('type'), request.args.get('tag'))
+            date_from = parse_feed_datetime(request.args.get('from'), 'from')
+            date_to = parse_feed_datetime(request.args.get('to'), 'to')
+            fields = parse_event_fields(request.args.get('fields'), request.args.get('include'))
+        except (FeedArgumentError, EventFieldError) as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        timeline_id = request.args.get('timeline_id')
+        if timeline_id not in (None, ''):
+            if not str(timeline_id).isdigit():
+                return jsonify({'error': 'Timeline not found'}), 404
+            timeline, error_response = _resolve_readable_timeline(int(timeline_id))
+            if error_response:
+                return error_response
+            timeline_id = timeline.id
+        else:
+            timeline_id = None
+
+        banned_timeline_ids, banned_timeline_names = _get_active_banned_timeline_ids_and_names()
+        try:
+            event_ids, next_cursor = search_events(
+                db.session,
+                filters,
+                limit,
+                cursor=request.args.get('cursor') or None,
+                timeline_id=timeline_id,
+                date_from=date_from,
+                date_to=date_to,
+                viewer_id=get_jwt_identity(),
+                banned_timeline_ids=banned_timeline_ids,
+            )
+        except FeedArgumentError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        events_by_id = {}
+        if event_ids:
+            events_by_id = {
+                ev.id: ev
+                for ev in Event.query.options(*_event_load_options(fields)).filter(Event.id.in_(event_ids)).all()
+            }
+        page_events = [events_by_id[eid] for eid in event_ids if eid in events_by_id]
+
+        hydrated = hydrate_events(
+            db.session,
+            page_events,
+            banned_timeline_ids=banned_timeline_ids,
+            banned_timeline_names=banned_timeline_names,
+            sections=sections_for_fields(fields),
+        )
+
+        return jsonify({
+            'events': [serialize_event(event, hydrated.get(event.id), fields=fields) for event in page_events],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f'Error searching events: {str(e)}')
+        return jsonify({'error': 'Failed to search events'}), 500
+
 @app.route('/api/timeline-v3', methods=['POST'])
 @app.route('/api/v1/timeline-v3', methods=['POST'])
 @jwt_required()
@@ -2379,6 +2633,47 @@ def create_timeline_v3():
         db.session.rollback()
         return jsonify({'error': error_msg}), 500
 
+def _serialize_timeline_v3(timeline, member_count):
+    """Timeline payload shared by get_timeline_v3 and the page bundle."""
+    # Handle potentially null or invalid created_at datetime
+    created_at_str = None
+    if timeline.created_at:
+        try:
+            created_at_str = timeline.created_at.isoformat()
+        except (AttributeError, ValueError) as dt_error:
+            print(f"Warning: Invalid created_at for timeline {timeline.id}: {dt_error}")
+            created_at_str = datetime.now().isoformat()  # Use current time as fallback
+    else:
+        created_at_str = datetime.now().isoformat()  # Use current time if None
+    
+    # Handle privacy_changed_at datetime
+    privacy_changed_at_str = None
+    if hasattr(timeline, 'privacy_changed_at') and timeline.privacy_changed_at:
+        try:
+            privacy_changed_at_str = timeline.privacy_changed_at.isoformat()
+        except (AttributeError, ValueError) as dt_error:
+            print(f"Warning: Invalid privacy_changed_at for timeline {timeline.id}: {dt_error}")
+
+    return {
+        'id': timeline.id,
+        'name': timeline.name,
+        'description': timeline.description or '',
+        'created_by': timeline.created_by,
+        'created_at': created_at_str,
+        'timeline_type': timeline.timeline_type or 'hashtag',
+        'visibility': timeline.visibility or 'public',
+        'privacy_changed_at': privacy_changed_at_str,
+        'member_count': member_count,
+        'requires_approval': getattr(timeline, 'requires_approval', False),
+        'cover_image_url': (timeline.cover_image_url or '').strip() if getattr(timeline, 'cover_image_url', None) else '',
+        'cover_upload_enabled': bool(getattr(timeline, 'cover_upload_enabled', True)),
+        'cover_portrait_x': float(getattr(timeline, 'cover_portrait_x', 50.0) or 50.0),
+        'cover_portrait_y': float(getattr(timeline, 'cover_portrait_y', 50.0) or 50.0),
+        'cover_landscape_x': float(getattr(timeline, 'cover_landscape_x', 50.0) or 50.0),
+        'cover_landscape_y': float(getattr(timeline, 'cover_landscape_y', 50.0) or 50.0),
+        'cover_zoom': float(getattr(timeline, 'cover_zoom', 1.0) or 1.0)
+    }
+
 @app.route('/api/timeline-v3/<timeline_id>', methods=['GET'])
 @app.route('/api/v1/timeline-v3/<timeline_id>', methods=['GET'])
 @jwt_required(optional=True)
@@ -2404,25 +2699,11 @@ def get_timeline_v3(timeline_id):
             if role == 'forbidden':
                 return jsonify({'error': 'Access denied to personal timeline'}), 403
 
-        # Handle potentially null or invalid created_at datetime
-        created_at_str = None
-        if timeline.created_at:
-            try:
-                created_at_str = timeline.created_at.isoformat()
-            except (AttributeError, ValueError) as dt_error:
-                print(f"Warning: Invalid created_at for timeline {timeline_id}: {dt_error}")
-                created_at_str = datetime.now().isoformat()  # Use current time as fallback
-        else:
-            created_at_str = datetime.now().isoformat()  # Use current time if None
-        
-        # Handle privacy_changed_at datetime
-        privacy_changed_at_str = None
-        if hasattr(timeline, 'privacy_changed_at') and timeline.privacy_changed_at:
-            try:
-                privacy_changed_at_str = timeline.privacy_changed_at.isoformat()
-            except (AttributeError, ValueError) as dt_error:
-                print(f"Warning: Invalid privacy_changed_at for timeline {timeline_id}: {dt_error}")
-        
+        etag = _timeline_etag('timeline', timeline.id)
+        not_modified = _not_modified_response(etag)
+        if not_modified:
+            return not_modified
+
         # Get member count for community timelines
         member_count = 0
         if timeline.timeline_type == 'community':
@@ -2434,25 +2715,7 @@ def get_timeline_v3(timeline_id):
                 is_active_member=True
             ).count()
         
-        return jsonify({
-            'id': timeline.id,
-            'name': timeline.name,
-            'description': timeline.description or '',
-            'created_by': timeline.created_by,
-            'created_at': created_at_str,
-            'timeline_type': timeline.timeline_type or 'hashtag',
-            'visibility': timeline.visibility or 'public',
-            'privacy_changed_at': privacy_changed_at_str,
-            'member_count': member_count,
-            'requires_approval': getattr(timeline, 'requires_approval', False),
-            'cover_image_url': (timeline.cover_image_url or '').strip() if getattr(timeline, 'cover_image_url', None) else '',
-            'cover_upload_enabled': bool(getattr(timeline, 'cover_upload_enabled', True)),
-            'cover_portrait_x': float(getattr(timeline, 'cover_portrait_x', 50.0) or 50.0),
-            'cover_portrait_y': float(getattr(timeline, 'cover_portrait_y', 50.0) or 50.0),
-            'cover_landscape_x': float(getattr(timeline, 'cover_landscape_x', 50.0) or 50.0),
-            'cover_landscape_y': float(getattr(timeline, 'cover_landscape_y', 50.0) or 50.0),
-            'cover_zoom': float(getattr(timeline, 'cover_zoom', 1.0) or 1.0)
-        })
+        return _with_etag(jsonify(_serialize_timeline_v3(timeline, member_count)), etag)
     except Exception as e:
         app.logger.error(f'Error fetching timeline: {str(e)}')
         return jsonify({'error': 'Failed to fetch timeline'}), 500
@@ -2683,6 +2946,8 @@ def add_event_to_timeline(timeline_id, event_id):
             pass
         
         # Save changes
+        db.session.flush()
+        reindex_events(db.session, [event.id])
         db.session.commit()
         
         return jsonify({
@@ -2696,10 +2961,135 @@ def add_event_to_timeline(timeline_id, event_id):
         app.logger.error(f'Error adding event to timeline: {str(e)}')
         return jsonify({'error': f'Failed to add event to timeline: {str(e)}'}), 500
 
+def _event_load_options(fields):
+    """Query options that load only the Event columns a sparse fieldset needs."""
+    columns = columns_for_fields(fields)
+    if columns is None:
+        return []
+    return [load_only(*[getattr(Event, c) for c in columns])]
+
+
+def _tag_filter_from_request():
+    """Tag filter from ?tag= / ?tags_all= / ?tags_any= / ?tags_not= (comma-separated names)."""
+    return parse_tag_filter(
+        request.args.get('tag'),
+        request.args.get('tags_all'),
+        request.args.get('tags_any'),
+        request.args.get('tags_not'),
+    )
+
+
+def _build_timeline_v3_events(timeline, tag_filter, banned_timeline_ids, banned_timeline_names, fields=None):
+    """Event list payload for get_timeline_v3_events (no request context needed).
+
+    tag_filter: optional result of parse_tag_filter().
+    fields: optional sparse fieldset from parse_event_fields().
+    """
+    tags = None
+    if tag_filter:
+        tags = resolve_tag_filter(db.session, tag_filter)
+        if tags is None:
+            # A required tag does not exist
+            return []
+    load_options = _event_load_options(fields)
+    if index_read_ready(db.session):
+        # Direct and referenced events in one range scan; report removals are already excluded
+        params = {'tid': timeline.id}
+        filters = ['timeline_id = :tid', "source IN ('direct', 'ref')"]
+        if tags is not None:
+            filters.extend(tag_filter_clauses(tags, 'timeline_event_index.event_id', params))
+        member_ids = [row[0] for row in db.session.execute(text(
+            f"""
+            SELECT event_id FROM timeline_event_index
+            WHERE {' AND '.join(filters)}
+            """
+        ), params).all()]
+        all_events = Event.query.options(*load_options).filter(Event.id.in_(member_ids)).all() if member_ids else []
+    else:
+        # Get all events directly in this timeline
+        direct_events = Event.query.options(*load_options).filter_by(timeline_id=timeline.id).all()
+
+        # Get all events that reference this timeline
+        referenced_events = timeline.referenced_events.options(*load_options).all()
+
+        # Combine both sets of events
+        all_events = direct_events + referenced_events
+
+        # Filter out events that were removed from this timeline via resolved reports
+        removed_ids = removed_event_ids_for_timeline(db.session, timeline.id, [ev.id for ev in all_events])
+        if removed_ids:
+            all_events = [ev for ev in all_events if ev.id not in removed_ids]
+
+        params = {'ids': [ev.id for ev in all_events]}
+        clauses = tag_filter_clauses(tags, 'x.id', params) if tags is not None else []
+        if clauses and all_events:
+            matching = {row[0] for row in db.session.execute(text(
+                f"""
+                SELECT x.id FROM unnest(CAST(:ids AS INTEGER[])) AS x(id)
+                WHERE {' AND '.join(clauses)}
+                """
+            ), params).all()}
+            all_events = [ev for ev in all_events if ev.id in matching]
+
+    # Sort events by event_date
+    all_events.sort(key=lambda x: x.event_date, reverse=True)
+
+    # Hydrate tags, associations, block list and creators for all events in one batch
+    hydrated = hydrate_events(
+        db.session,
+        all_events,
+        banned_timeline_ids=banned_timeline_ids,
+        banned_timeline_names=banned_timeline_names,
+        sections=sections_for_fields(fields),
+    )
+
+    # List endpoint has no per-timeline removal context; removed_from_this_timeline defaults to False
+    events_json = [serialize_event(event, hydrated.get(event.id), fields=fields) for event in all_events]
+    return events_json
+
+
+def _timeline_events_etag(timeline_id, query_string, banned_timeline_ids):
+    # Hydrated tags depend on which timelines are banned site-wide
+    return _timeline_etag('events', timeline_id, query_string, ','.join(str(i) for i in sorted(banned_timeline_ids)))
+
+
+def _is_public_anonymous_read(timeline):
+    """Anonymous request for a public hashtag/community timeline (same response for every caller)."""
+    if get_jwt_identity() is not None:
+        return False
+    return (timeline.timeline_type or 'hashtag') in ('hashtag', 'community') and (timeline.visibility or 'public') == 'public'
+
+
+def _render_public_timeline_events(timeline_id, query_string, tag_filter, fields=None):
+    """(etag, body) for the shared response cache; also runs in background refreshes."""
+    timeline = Timeline.query.get(timeline_id)
+    if not timeline:
+        raise LookupError(f"timeline {timeline_id} no longer exists")
+    banned_timeline_ids, banned_timeline_names = _get_active_banned_timeline_ids_and_names()
+    etag = _timeline_events_etag(timeline_id, query_string, banned_timeline_ids)
+    events_json = _build_timeline_v3_events(timeline, tag_filter, banned_timeline_ids, banned_timeline_names, fields)
+    return etag, app.json.dumps(events_json).encode('utf-8')
+
+
 @app.route('/api/timeline-v3/<timeline_id>/events', methods=['GET'])
 @app.route('/api/v1/timeline-v3/<timeline_id>/events', methods=['GET'])
 @jwt_required(optional=True)
 def get_timeline_v3_events(timeline_id):
+    """
+    All events of a timeline, newest first.
+
+    Query params:
+      - tag / tags_all: only events carrying every one of these tags
+      - tags_any: only events carrying at least one of these tags
+      - tags_not: only events carrying none of these tags
+        (comma-separated names, matched on the normalized tag key; the
+        paginated /events/page endpoint takes the same parameters)
+      - fields: comma-separated payload keys (or 'marker', 'media',
+        'url_preview', 'creator') to return instead of the full event
+      - include: keys added on top of fields (or of 'marker' without fields)
+
+    Fields that are not requested are neither queried nor serialized.
+    """
     # Convert timeline_id to integer if it's numeric
     if isinstance(timeline_id, str) and timeline_id.isdigit():
         timeline_id = int(timeline_id)
@@ -2712,6 +3102,9 @@ def get_timeline_v3_events(timeline_id):
 
         banned_timeline_ids, banned_timeline_names = _get_active_banned_timeline_ids_and_names()
 
+        # Commits DDL, so run it before any events are loaded into the session
+        ensure_timeline_block_list_table()
+
         # Get timeline
         timeline = Timeline.query.get(timeline_id)
         if not timeline:
@@ -2725,180 +3118,609 @@ def get_timeline_v3_events(timeline_id):
             if role == 'forbidden':
                 return jsonify({'error': 'Access denied to personal timeline'}), 403
 
-        # Get all events directly in this timeline
-        direct_events = Event.query.filter_by(timeline_id=timeline_id).all()
-        
-        # Get all events that reference this timeline
-        referenced_events = timeline.referenced_events.all()
+        try:
+            fields = parse_event_fields(request.args.get('fields'), request.args.get('include'))
+        except EventFieldError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        try:
+            tag_filter = _tag_filter_from_request()
+        except FeedArgumentError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        query_string = request.query_string.decode('utf-8', 'replace')
+        etag = _timeline_events_etag(timeline.id, query_string, banned_timeline_ids)
+        not_modified = _not_modified_response(etag)
+        if not_modified:
+            return not_modified
+
+        if _is_public_anonymous_read(timeline):
+            etag, body = public_response_cache.get_or_render(
+                timeline_cache_key(timeline.id, 'events', query_string),
+                etag,
+                lambda: _render_public_timeline_events(timeline.id, query_string, tag_filter, fields),
+            )
+            return _with_etag(app.response_class(body, mimetype='application/json'), etag)
+
+        # The list does not depend on the viewer, so concurrent identical reads share one build
+        def _render():
+            events_json = _build_timeline_v3_events(timeline, tag_filter, banned_timeline_ids, banned_timeline_names, fields)
+            return app.json.dumps(events_json).encode('utf-8')
+
+        body = timeline_single_flight.do(f"events:{etag}", _render)
+        return _with_etag(app.response_class(body, mimetype='application/json'), etag)
         
-        # Combine both sets of events
-        all_events = direct_events + referenced_events
+    except Exception as e:
+        app.logger.error(f'Error getting timeline events: {str(e)}')
+        return jsonify({'error': f'Failed to get timeline events: {str(e)}'}), 500
+
+@app.route('/api/timeline-v3/<timeline_id>/events/page', methods=['GET'])
+@app.route('/api/v1/timeline-v3/<timeline_id>/events/page', methods=['GET'])
+@jwt_required(optional=True)
+def get_timeline_v3_events_page(timeline_id):
+    """
+    Cursor-paginated variant of get_timeline_v3_events.
+
+    Query params:
+      - limit: page size (default 50, max 200)
+      - cursor: opaque cursor returned as next_cursor by the previous page
+      - from / to: optional ISO dates bounding event_date (inclusive)
+      - order: 'desc' (default, newest first) or 'asc'
+      - fields / include: sparse fieldset, as for get_timeline_v3_events
+      - tag / tags_all / tags_any / tags_not: tag filter, as for get_timeline_v3_events
+
+    Events come back in the same shape as get_timeline_v3_events, wrapped as
+    {'events': [...], 'next_cursor': str|None, 'has_more': bool}.
+    """
+    if isinstance(timeline_id, str) and timeline_id.isdigit():
+        timeline_id = int(timeline_id)
+    elif isinstance(timeline_id, str):
+        return jsonify({'error': 'Timeline not found'}), 404
+
+    try:
+        try:
+            limit = parse_page_size(request.args.get('limit'))
+            date_from = parse_feed_datetime(request.args.get('from'), 'from')
+            date_to = parse_feed_datetime(request.args.get('to'), 'to')
+            cursor = request.args.get('cursor') or None
+            order = (request.args.get('order') or 'desc').lower()
+            fields = parse_event_fields(request.args.get('fields'), request.args.get('include'))
+            tag_filter = _tag_filter_from_request()
+        except (FeedArgumentError, EventFieldError) as exc:
+            return jsonify({'error': str(exc)}), 400
+        if order not in ('asc', 'desc'):
+            return jsonify({'error': "Invalid 'order'"}), 400
+
+        timeline, error_response = _resolve_readable_timeline(timeline_id)
+        if error_response:
+            return error_response
+
+        banned_timeline_ids, banned_timeline_names = _get_active_banned_timeline_ids_and_names()
+
+        try:
+            event_ids, next_cursor = fetch_timeline_event_page(
+                db.session,
+                timeline.id,
+                limit=limit,
+                cursor=cursor,
+                date_from=date_from,
+                date_to=date_to,
+                order=order,
+                tag_filter=tag_filter,
+            )
+        except FeedArgumentError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        events_by_id = {}
+        if event_ids:
+            events_by_id = {
+                ev.id: ev
+                for ev in Event.query.options(*_event_load_options(fields)).filter(Event.id.in_(event_ids)).all()
+            }
+        page_events = [events_by_id[eid] for eid in event_ids if eid in events_by_id]
+
+        hydrated = hydrate_events(
+            db.session,
+            page_events,
+            banned_timeline_ids=banned_timeline_ids,
+            banned_timeline_names=banned_timeline_names,
+            sections=sections_for_fields(fields),
+        )
+
+        return jsonify({
+            'events': [serialize_event(event, hydrated.get(event.id), fields=fields) for event in page_events],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }), 200
+
+    except Exception as e:
+        app.logger.error(f'Error getting timeline events page: {str(e)}')
+        return jsonify({'error': f'Failed to get timeline events: {str(e)}'}), 500
+
+def _bundle_membership(timeline, viewer_id, viewer):
+    """Membership status as check_membership_status_new reports it, without its creator backfill."""
+    is_member = False
+    role = viewer.get('member_role')
+    joined_at = viewer['joined_at'].isoformat() if viewer.get('joined_at') else None
+    if role is not None:
+        is_member = bool(viewer.get('is_active_member'))
+    elif timeline.timeline_type == 'community' and viewer.get('site_role') in {'SiteOwner', 'SiteAdmin'}:
+        is_member = True
+        role = viewer['site_role']
+    elif is_site_owner(viewer_id):
+        is_member = True
+        role = 'siteowner'
+    elif timeline.created_by == viewer_id:
+        is_member = True
+        role = 'admin'
+    return {
+        'is_member': is_member,
+        'role': role,
+        'joined_at': joined_at,
+        'timeline_id': timeline.id,
+        'timeline_name': timeline.name,
+        'timeline_type': timeline.timeline_type,
+        'timeline_visibility': timeline.visibility,
+        'is_creator': timeline.created_by == viewer_id,
+        'is_site_owner': is_site_owner(viewer_id),
+        'is_blocked': bool(viewer.get('is_blocked')) if role is not None else False
+    }
+
+
+def _bundle_warning_state(timeline_id, row):
+    if not row:
+        return {'active': False, 'timeline_id': timeline_id}
+    warning_until = row.get('warning_until')
+    return {
+        'active': True,
+        'timeline_id': timeline_id,
+        'warning_scope': _normalize_warning_scope(row.get('warning_scope')),
+        'warning_reason_public': row.get('warning_reason_public') or '',
+        'mask_content': bool(row.get('mask_content')),
+        'warning_until': warning_until.isoformat() if hasattr(warning_until, 'isoformat') else None,
+        'is_indef': bool(warning_until and hasattr(warning_until, 'year') and warning_until.year >= 9999),
+    }
+
+
+def _bundle_status_message(timeline_id, row):
+    if not row:
+        return {'active': False, 'timeline_id': timeline_id}
+    return {
+        'active': True,
+        'timeline_id': timeline_id,
+        'status_type': _normalize_status_message_type(row.get('status_type')),
+        'status_header': row.get('status_header') or '',
+        'status_body': row.get('status_body') or '',
+        'updated_at': row['updated_at'].isoformat() if hasattr(row.get('updated_at'), 'isoformat') else None,
+    }
+
+
+@app.route('/api/timeline-v3/<timeline_id>/bundle', methods=['GET'])
+@app.route('/api/v1/timeline-v3/<timeline_id>/bundle', methods=['GET'])
+@jwt_required(optional=True)
+def get_timeline_v3_bundle(timeline_id):
+    """
+    Everything a timeline page needs for first paint, in one request.
+
+    Query params:
+      - sections: comma-separated sections to include (default all):
+        timeline, member_count, membership, actions, info_cards, quote,
+        status_message, warning_state, follow_status, passport, events
+      - exclude: comma-separated sections to leave out
+      - limit: events on the first page (default 50, max 200)
+      - fields / include: sparse fieldset for events, as for get_timeline_v3_events
+
+    Access (bans, personal timeline ACL) is checked once. Each section has
+    the shape of its own endpoint's response body (events as in
+    get_timeline_v3_events_page). Sections that need a signed-in user are
+    null for anonymous callers, and a section that cannot be loaded is
+    null; both are explained under 'errors'.
+    """
+    if isinstance(timeline_id, str) and timeline_id.isdigit():
+        timeline_id = int(timeline_id)
+    elif isinstance(timeline_id, str):
+        return jsonify({'error': 'Timeline not found'}), 404
+
+    try:
+        try:
+            sections = parse_bundle_sections(request.args.get('sections'), request.args.get('exclude'))
+            limit = parse_page_size(request.args.get('limit'))
+            fields = parse_event_fields(request.args.get('fields'), request.args.get('include'))
+        except (FeedArgumentError, EventFieldError) as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        timeline, error_response = _resolve_readable_timeline(timeline_id)
+        if error_response:
+            return error_response
+
+        viewer_id = get_jwt_identity()
+        try:
+            viewer_id = int(viewer_id) if viewer_id is not None else None
+        except (TypeError, ValueError):
+            viewer_id = None
+
+        bundle = {'timeline_id': timeline.id, 'sections': sections}
+        errors = {}
+        if timeline.timeline_type == 'community' and timeline.created_by and 'timeline' in sections:
+            # Same creator backfill as get_timeline_v3, before any member counts are read
+            ensure_creator_membership(timeline.id, timeline.created_by)
+        tables = existing_tables(db.session, (
+            'site_admin', 'timeline_follow', 'timeline_warning_state', 'timeline_status_message',
+            'user_passport', 'user_moderation_state', 'timeline_action_vote',
+        ))
+        shared = {}
+
+        def _viewer():
+            if 'viewer' not in shared:
+                shared['viewer'] = load_viewer_context(db.session, timeline.id, viewer_id, tables)
+            return shared['viewer']
+
+        def _members():
+            if 'members' not in shared:
+                shared['members'] = load_member_stats(db.session, timeline.id, timeline.created_by)
+            return shared['members']
+
+        def _notices():
+            if 'notices' not in shared:
+                shared['notices'] = load_page_notices(db.session, timeline.id, tables)
+            return shared['notices']
+
+        def _timeline_section():
+            ensure_timeline_cover_settings_schema()
+            member_count = _members()['active'] if timeline.timeline_type == 'community' else 0
+            return _serialize_timeline_v3(timeline, member_count)
+
+        def _actions_section():
+            ensure_timeline_action_support_schema()
+            actions = TimelineAction.query.filter_by(timeline_id=timeline.id).order_by(TimelineAction.action_type).all()
+            tally = {'votes': {}, 'user_votes': set()}
+            if actions and 'timeline_action_vote' in tables:
+                tally = load_action_tally(db.session, timeline.id, viewer_id)
+            tally['member_count'] = _members()['active']
+            actions_data = []
+            for action in actions:
+                action_data = action.to_dict()
+                action_data['progress'] = _build_action_progress(action, timeline.id, viewer_id, tally)
+                actions_data.append(action_data)
+            return {'actions': actions_data, 'timeline_id': timeline.id, 'total': len(actions_data)}
+
+        def _info_cards_section():
+            if timeline.timeline_type != 'community':
+                return []
+            cards = CommunityInfoCard.query.filter_by(timeline_id=timeline.id).order_by(
+                CommunityInfoCard.card_order.asc(),
+                CommunityInfoCard.created_at.asc()
+            ).all()
+            return [card.to_dict() for card in cards]
+
+        def _quote_section():
+            if timeline.is_community() and _viewer().get('member_role') is None and not is_site_owner(viewer_id):
+                errors['quote'] = 'Access denied'
+                return None
+            return {'success': True, 'quote': _timeline_quote_data(timeline)}
+
+        def _follow_section():
+            viewer = _viewer()
+            if not viewer.get('is_following'):
+                return {'is_following': False, 'follow_kind': None, 'followed_at': None}
+            return {
+                'is_following': True,
+                'follow_kind': viewer.get('follow_kind') or 'watch',
+                'followed_at': viewer['followed_at'].isoformat() if viewer.get('followed_at') else None,
+            }
+
+        def _passport_section():
+            passport = load_passport(db.session, viewer_id, tables)
+            site_role = _viewer().get('site_role')
+            passport.update({'site_role': site_role, 'is_site_admin': bool(site_role)})
+            passport['last_updated'] = passport['last_updated'] or datetime.now().isoformat()
+            return passport
+
+        def _events_section():
+            banned_timeline_ids, banned_timeline_names = _get_active_banned_timeline_ids_and_names()
+            event_ids, next_cursor = fetch_timeline_event_page(db.session, timeline.id, limit=limit)
+            events_by_id = {}
+            if event_ids:
+                events_by_id = {
+                    ev.id: ev
+                    for ev in Event.query.options(*_event_load_options(fields)).filter(Event.id.in_(event_ids)).all()
+                }
+            page_events = [events_by_id[eid] for eid in event_ids if eid in events_by_id]
+            hydrated = hydrate_events(
+                db.session,
+                page_events,
+                banned_timeline_ids=banned_timeline_ids,
+                banned_timeline_names=banned_timeline_names,
+                sections=sections_for_fields(fields),
+            )
+            return {
+                'events': [serialize_event(event, hydrated.get(event.id), fields=fields) for event in page_events],
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+
+        builders = {
+            'timeline': _timeline_section,
+            'member_count': lambda: {'count': _members()['visible']},
+            'membership': lambda: _bundle_membership(timeline, viewer_id, _viewer()),
+            'actions': _actions_section,
+            'info_cards': _info_cards_section,
+            'quote': _quote_section,
+            'status_message': lambda: _bundle_status_message(timeline.id, _notices()[1]),
+            'warning_state': lambda: _bundle_warning_state(timeline.id, _notices()[0]),
+            'follow_status': _follow_section,
+            'passport': _passport_section,
+            'events': _events_section,
+        }
+        for name in sections:
+            if name in BUNDLE_VIEWER_SECTIONS and viewer_id is None:
+                bundle[name] = None
+                errors[name] = 'Authentication required'
+                continue
+            try:
+                bundle[name] = builders[name]()
+            except Exception as e:
+                # Sections only read, so rolling back just lets the remaining sections run
+                db.session.rollback()
+                bundle[name] = None
+                errors[name] = 'Failed to load'
+                app.logger.error(f'Error building timeline bundle section {name} for {timeline.id}: {str(e)}')
+        bundle['errors'] = errors
+        return jsonify(bundle), 200
+
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f'Error building timeline bundle: {str(e)}')
+        return jsonify({'error': 'Failed to load timeline'}), 500
+
+@app.route('/api/timeline-v3/<timeline_id>/events/changes', methods=['GET'])
+@app.route('/api/v1/timeline-v3/<timeline_id>/events/changes', methods=['GET'])
+@jwt_required(optional=True)
+def get_timeline_v3_event_changes(timeline_id):
+    """
+    Delta sync: events created, updated or removed on a timeline since a token.
+
+    Query params:
+      - since: next_token from the previous call; omit it to get a first token
+      - fields / include: sparse fieldset, as for get_timeline_v3_events
+
+    Returns {'events': [...], 'tombstones': [{'event_id', 'reason',
+    'changed_at'}], 'next_token': str, 'full_resync': bool}. Membership
+    follows get_timeline_v3_events_page. Changes may repeat across calls.
+    When full_resync is true (no or expired token, or too many changes) the
+    client refetches the event list and continues from next_token.
+    """
+    if isinstance(timeline_id, str) and timeline_id.isdigit():
+        timeline_id = int(timeline_id)
+    elif isinstance(timeline_id, str):
+        return jsonify({'error': 'Timeline not found'}), 404
+
+    try:
+        try:
+            fields = parse_event_fields(request.args.get('fields'), request.args.get('include'))
+        except EventFieldError as exc:
+            return jsonify({'error': str(exc)}), 400
+        since = request.args.get('since') or None
+
+        timeline, error_response = _resolve_readable_timeline(timeline_id)
+        if error_response:
+            return error_response
+
+        # Taken before reading so anything committed meanwhile shows up on the next call
+        next_token = current_sync_token(db.session)
+        resync = {'events': [], 'tombstones': [], 'next_token': next_token, 'full_resync': True}
+        if since is None:
+            return jsonify(resync), 200
+        try:
+            if token_expired(since):
+                return jsonify(resync), 200
+            changes = collect_changes(
+                db.session, timeline.id, since, lambda ids: feed_member_ids(db.session, timeline.id, ids)
+            )
+        except SyncTokenError as exc:
+            return jsonify({'error': str(exc)}), 400
+        if changes is None:
+            return jsonify(resync), 200
+        event_ids, tombstones = changes
+
+        banned_timeline_ids, banned_timeline_names = _get_active_banned_timeline_ids_and_names()
+        events = []
+        if event_ids:
+            events = Event.query.options(*_event_load_options(fields)).filter(Event.id.in_(event_ids)).all()
+        events.sort(key=lambda ev: (ev.event_date, ev.id), reverse=True)
+        hydrated = hydrate_events(
+            db.session,
+            events,
+            banned_timeline_ids=banned_timeline_ids,
+            banned_timeline_names=banned_timeline_names,
+            sections=sections_for_fields(fields),
+        )
+
+        return jsonify({
+            'events': [serialize_event(event, hydrated.get(event.id), fields=fields) for event in events],
+            'tombstones': tombstones,
+            'next_token': next_token,
+            'full_resync': False
+        }), 200
+
+    except Exception as e:
+        app.logger.error(f'Error getting timeline event changes: {str(e)}')
+        return jsonify({'error': f'Failed to get timeline event changes: {str(e)}'}), 500
+
+def _render_timeline_facets(timeline_id, query_string, date_from, date_to, top_n):
+    """(etag, body) of the facets response; also runs in background cache refreshes."""
+    banned_timeline_ids, banned_timeline_names = _get_active_banned_timeline_ids_and_names()
+    etag = _timeline_etag('facets', timeline_id, query_string, ','.join(str(i) for i in sorted(banned_timeline_ids)))
+    facets = compute_facets(
+        db.session, timeline_id, date_from=date_from, date_to=date_to, top_n=top_n,
+        banned_timeline_names=banned_timeline_names,
+    )
+    return etag, app.json.dumps(facets).encode('utf-8')
+
+
+@app.route('/api/timeline-v3/<timeline_id>/events/facets', methods=['GET'])
+@app.route('/api/v1/timeline-v3/<timeline_id>/events/facets', methods=['GET'])
+@jwt_required(optional=True)
+def get_timeline_v3_event_facets(timeline_id):
+    """
+    Event counts per type, media subtype, top tags and top creators.
+
+    Query params:
+      - from / to: optional ISO dates bounding event_date (inclusive)
+      - top: how many tags and creators to return (default 10, max 50)
+
+    Counts cover the same events as get_timeline_v3_events_page. Responses
+    carry an ETag from the timeline version and are cached per version.
+    """
+    if isinstance(timeline_id, str) and timeline_id.isdigit():
+        timeline_id = int(timeline_id)
+    elif isinstance(timeline_id, str):
+        return jsonify({'error': 'Timeline not found'}), 404
+
+    try:
+        try:
+            date_from = parse_feed_datetime(request.args.get('from'), 'from')
+            date_to = parse_feed_datetime(request.args.get('to'), 'to')
+        except FeedArgumentError as exc:
+            return jsonify({'error': str(exc)}), 400
+        try:
+            top_n = int(request.args.get('top') or DEFAULT_FACET_TOP_N)
+        except ValueError:
+            return jsonify({'error': "Invalid 'top'"}), 400
+        top_n = max(1, min(top_n, MAX_FACET_TOP_N))
+
+        timeline, error_response = _resolve_readable_timeline(timeline_id)
+        if error_response:
+            return error_response
+
+        banned_timeline_ids, _ = _get_active_banned_timeline_ids_and_names()
+        query_string = request.query_string.decode('utf-8', 'replace')
+        etag = _timeline_etag('facets', timeline.id, query_string, ','.join(str(i) for i in sorted(banned_timeline_ids)))
+        not_modified = _not_modified_response(etag)
+        if not_modified:
+            return not_modified
+
+        # Facets do not depend on the viewer and access was checked above, so every read shares the cache
+        etag, body = public_response_cache.get_or_render(
+            timeline_cache_key(timeline.id, 'facets', query_string),
+            etag,
+            lambda: _render_timeline_facets(timeline.id, query_string, date_from, date_to, top_n),
+        )
+        return _with_etag(app.response_class(body, mimetype='application/json'), etag)
+
+    except Exception as e:
+        app.logger.error(f'Error getting timeline event facets: {str(e)}')
+        return jsonify({'error': f'Failed to get timeline event facets: {str(e)}'}), 500
+
+def _render_timeline_density(timeline_id, query_string, granularity, date_from, date_to, rank, per_bucket, fields,
+                             vote_window):
+    """(etag, body) of the density response; also runs in background cache refreshes."""
+    banned_timeline_ids, banned_timeline_names = _get_active_banned_timeline_ids_and_names()
+    etag = _timeline_etag(
+        'density', timeline_id, query_string, ','.join(str(i) for i in sorted(banned_timeline_ids)), vote_window
+    )
+    buckets = bucket_events(
+        db.session, timeline_id, granularity, date_from=date_from, date_to=date_to, rank=rank, per_bucket=per_bucket
+    )
+    event_ids = [eid for bucket in buckets for eid in bucket['event_ids']]
+    events_by_id = {}
+    if event_ids:
+        events_by_id = {
+            ev.id: ev
+            for ev in Event.query.options(*_event_load_options(fields)).filter(Event.id.in_(event_ids)).all()
+        }
+    hydrated = hydrate_events(
+        db.session,
+        list(events_by_id.values()),
+        banned_timeline_ids=banned_timeline_ids,
+        banned_timeline_names=banned_timeline_names,
+        sections=sections_for_fields(fields),
+    )
+    payload = {
+        'granularity': granularity,
+        'rank': rank,
+        'total': sum(bucket['count'] for bucket in buckets),
+        'buckets': [
+            {
+                'start': bucket['start'].isoformat(),
+                'count': bucket['count'],
+                'events': [
+                    serialize_event(events_by_id[eid], hydrated.get(eid), fields=fields)
+                    for eid in bucket['event_ids'] if eid in events_by_id
+                ],
+            }
+            for bucket in buckets
+        ],
+    }
+    return etag, app.json.dumps(payload).encode('utf-8')
+
+
+@app.route('/api/timeline-v3/<timeline_id>/events/density', methods=['GET'])
+@app.route('/api/v1/timeline-v3/<timeline_id>/events/density', methods=['GET'])
+@jwt_required(optional=True)
+def get_timeline_v3_event_density(timeline_id):
+    """
+    Event counts per date bucket with a few representative events each.
+
+    Query params:
+      - granularity: hour, day, week, month (default), year or decade
+      - from / to: optional ISO dates bounding event_date (inclusive)
+      - rank: 'votes' (default) or 'recent', how representatives are chosen
+      - per_bucket: representatives per bucket (default 3, max 10, 0 for none)
+      - fields / include: sparse fieldset of the representatives (default 'marker')
+
+    Returns {'granularity', 'rank', 'total', 'buckets': [{'start', 'count',
+    'events'}]} in date order, over the same events as
+    get_timeline_v3_events_page; 400 when the range holds too many buckets.
+    """
+    if isinstance(timeline_id, str) and timeline_id.isdigit():
+        timeline_id = int(timeline_id)
+    elif isinstance(timeline_id, str):
+        return jsonify({'error': 'Timeline not found'}), 404
+
+    try:
+        try:
+            granularity, rank, per_bucket = parse_density_args(
+                request.args.get('granularity'), request.args.get('rank'), request.args.get('per_bucket')
+            )
+            date_from = parse_feed_datetime(request.args.get('from'), 'from')
+            date_to = parse_feed_datetime(request.args.get('to'), 'to')
+            fields = parse_event_fields(request.args.get('fields'), request.args.get('include'))
+        except (FeedArgumentError, EventFieldError) as exc:
+            return jsonify({'error': str(exc)}), 400
+        if fields is None:
+            fields = parse_event_fields('marker')
+
+        timeline, error_response = _resolve_readable_timeline(timeline_id)
+        if error_response:
+            return error_response
 
-        # Filter out events that were removed from this timeline via resolved reports
+        banned_timeline_ids, _ = _get_active_banned_timeline_ids_and_names()
+        query_string = request.query_string.decode('utf-8', 'replace')
+        vote_window = int(time.time() // VOTE_RANK_WINDOW_SECONDS) if rank == 'votes' else 0
+        etag = _timeline_etag(
+            'density', timeline.id, query_string, ','.join(str(i) for i in sorted(banned_timeline_ids)), vote_window
+        )
+        not_modified = _not_modified_response(etag)
+        if not_modified:
+            return not_modified
+
+        # Viewer-independent like the facets; access was checked above
         try:
-            from sqlalchemy import text as _sql_text
-            pruned = []
-            for ev in all_events:
-                # Skip if a resolved 'remove' exists for (timeline_id,event_id)
-                q = db.session.execute(_sql_text(
-                    """
-                    SELECT 1
-                    FROM reports
-                    WHERE timeline_id = :tid
-                      AND event_id = :eid
-                      AND status = 'resolved'
-                      AND resolution = 'remove'
-                    LIMIT 1
-                    """
-                ), { 'tid': timeline_id, 'eid': ev.id }).first()
-                if q:
-                    continue
-                pruned.append(ev)
-            all_events = pruned
-        except Exception as _e:
-            app.logger.info(f"Skipping removed-events filter due to error: {_e}")
-        
-        # Get tag filter from query parameters
-        tag_filter = request.args.get('tag')
-        
-        # If tag filter is provided, filter events by tag
-        if tag_filter:
-            # Handle case-insensitive matching
-            tag_filter = tag_filter.lower()
-            
-            # Try to find the tag (case insensitive)
-            tag = Tag.query.filter(db.func.lower(Tag.name) == tag_filter).first()
-            
-            if tag:
-                # Filter events that have this tag
-                filtered_events = []
-                for event in all_events:
-                    for event_tag in event.tags:
-                        if db.func.lower(event_tag.name) == tag_filter:
-                            filtered_events.append(event)
-                            break
-                all_events = filtered_events
-            else:
-                # If tag doesn't exist, return empty list
-                all_events = []
-        
-        # Sort events by event_date
-        all_events.sort(key=lambda x: x.event_date, reverse=True)
-        
-        # Convert events to JSON
-        events_json = []
-        for event in all_events:
-            # Get tags for this event
-            app.logger.info(f"Event ID {event.id} has {len(event.tags)} tags")
-            tags = []
-            for tag in event.tags:
-                app.logger.info(f"Processing tag: {tag.name} (ID: {tag.id})")
-                normalized_tag_name = _normalize_timeline_policy_name(tag.name)
-                if normalized_tag_name and normalized_tag_name in banned_timeline_names:
-                    continue
-                tags.append({'id': tag.id, 'name': tag.name})
+            etag, body = public_response_cache.get_or_render(
+                timeline_cache_key(timeline.id, 'density', query_string),
+                etag,
+                lambda: _render_timeline_density(
+                    timeline.id, query_string, granularity, date_from, date_to, rank, per_bucket, fields, vote_window
+                ),
+            )
+        except FeedArgumentError as exc:
+            return jsonify({'error': str(exc)}), 400
+        return _with_etag(app.response_class(body, mimetype='application/json'), etag)
 
-            # Build associated_timelines: include owning timeline, explicit associations, and hashtag timelines derived from tags
-            associated_timelines = []
-            try:
-                from sqlalchemy import text as _sql_text
-                # Fetch associated timeline IDs (owning + associations)
-                # Check both event_timeline_association (new) and event_timeline_refs (old)
-                id_rows = db.session.execute(_sql_text(
-                    """
-                    SELECT DISTINCT timeline_id AS tid FROM event_timeline_association WHERE event_id = :eid
-                    UNION
-                    SELECT DISTINCT timeline_id AS tid FROM event_timeline_refs WHERE event_id = :eid
-                    UNION
-                    SELECT timeline_id AS tid FROM event WHERE id = :eid
-                    """
-                ), { 'eid': event.id }).all()
-                assoc_ids = [int(r[0]) for r in id_rows if r and r[0] is not None]
-                # Also include hashtag timelines whose name matches this event's tags (case-insensitive)
-                if event.tags:
-                    tag_names = [t.name for t in event.tags if getattr(t, 'name', None)]
-                    if tag_names:
-                        tl_hash_rows = db.session.execute(_sql_text(
-                            """
-                            SELECT id, name, timeline_type FROM timeline
-                            WHERE timeline_type = 'hashtag' AND LOWER(name) = ANY(:names)
-                            """
-                        ), { 'names': [str(n).lower() for n in tag_names] }).mappings().all()
-                        for tl in tl_hash_rows:
-                            assoc_ids.append(int(tl['id']))
-                # De-duplicate
-                assoc_ids = sorted(set(assoc_ids))
-                if banned_timeline_ids:
-                    assoc_ids = [tid for tid in assoc_ids if tid not in banned_timeline_ids]
-                if assoc_ids:
-                    # Fetch timeline details in one query, including owner info for personal timelines
-                    tl_rows = db.session.execute(_sql_text(
-                        """
-                        SELECT t.id, t.name, t.timeline_type, t.created_by, u.username as owner_username, u.avatar_url as owner_avatar
-                        FROM timeline t
-                        LEFT JOIN "user" u ON t.created_by = u.id
-                        WHERE t.id = ANY(:ids)
-                        """
-                    ), { 'ids': assoc_ids }).mappings().all()
-                    for tl in tl_rows:
-                        associated_timelines.append({
-                            'id': int(tl['id']),
-                            'name': tl['name'],
-                            'type': tl.get('timeline_type') or 'hashtag',
-                            'created_by': tl.get('created_by'),
-                            'owner_username': tl.get('owner_username'),
-                            'owner_avatar': tl.get('owner_avatar')
-                        })
-                # Fetch removed timeline ids for this event from block list
-                ensure_timeline_block_list_table()
-                rm_rows = db.session.execute(_sql_text(
-                    """
-                    SELECT timeline_id FROM timeline_block_list WHERE event_id = :eid
-                    """
-                ), { 'eid': event.id }).all()
-                removed_timeline_ids = [int(r[0]) for r in rm_rows]
-            except Exception as _e:
-                app.logger.info(f"Skipping associated_timelines build due to error: {_e}")
-                removed_timeline_ids = []
-
-            # Get the creator's username
-            creator = User.query.get(event.created_by)
-            creator_username = creator.username if creator else "Unknown"
-            creator_avatar = creator.avatar_url if creator else None
-            
-            # Format the event data
-            event_data = {
-                'id': event.id,
-                'title': event.title,
-                'description': event.description,
-                'content': event.content,
-                'event_date': event.event_date.isoformat() if event.event_date else None,
-                'type': event.type,
-                'url': event.url,
-                'url_title': event.url_title,
-                'url_description': event.url_description,
-                'url_image': event.url_image,
-                'media_url': event.media_url,
-                'media_type': event.media_type,
-                'timeline_id': event.timeline_id,
-                'created_by': event.created_by,
-                'created_by_username': creator_username,
-                'created_by_avatar': creator_avatar,
-                'created_at': event.created_at.isoformat() if hasattr(event.created_at, 'isoformat') else str(event.created_at),
-                'edit_locked': bool(getattr(event, 'edit_locked', False)),
-                'tags': tags,
-                'associated_timelines': associated_timelines,
-                # List endpoint has no per-timeline removal context; default to False
-                'removed_from_this_timeline': False,
-                'removed_timeline_ids': removed_timeline_ids
-            }
-            events_json.append(event_data)
-        
-        return jsonify(events_json), 200
-        
     except Exception as e:
-        app.logger.error(f'Error getting timeline events: {str(e)}')
-        return jsonify({'error': f'Failed to get timeline events: {str(e)}'}), 500
+        app.logger.error(f'Error getting timeline event density: {str(e)}')
+        return jsonify({'error': f'Failed to get timeline event density: {str(e)}'}), 500
 
 @app.route('/api/timeline-v3/<timeline_id>/events/<event_id>', methods=['GET'])
 @app.route('/api/v1/timeline-v3/<timeline_id>/events/<event_id>', methods=['GET'])
@@ -2920,6 +3742,9 @@ def get_timeline_v3_event(timeline_id, event_id):
 
         banned_timeline_ids, banned_timeline_names = _get_active_banned_timeline_ids_and_names()
 
+        # Commits DDL, so run it before the event is loaded into the session
+        ensure_timeline_block_list_table()
+
         timeline = Timeline.query.get(timeline_id)
         if not timeline:
             return jsonify({'error': 'Timeline not found'}), 404
@@ -2932,130 +3757,33 @@ def get_timeline_v3_event(timeline_id, event_id):
         is_direct = (event.timeline_id == timeline_id)
         is_referenced = False
         try:
-            # referenced_events is used in get_timeline_v3_events
-            referenced = timeline.referenced_events.all()
-            is_referenced = any(ev.id == event.id for ev in referenced)
+            # Check the reference table directly instead of loading every referenced event
+            is_referenced = bool(db.session.execute(text(
+                """
+                SELECT 1 FROM event_timeline_refs
+                WHERE timeline_id = :tid AND event_id = :eid
+                LIMIT 1
+                """
+            ), {'tid': timeline_id, 'eid': event.id}).first())
         except Exception:
             # If relationship access fails, do not hard fail; proceed with direct only
             is_referenced = False
 
         # Determine if this event was explicitly removed from this timeline via reports
-        removed_for_timeline = False
-        try:
-            from sqlalchemy import text as _sql_text
-            rm = db.session.execute(_sql_text(
-                """
-                SELECT 1
-                FROM reports
-                WHERE timeline_id = :tid
-                  AND event_id = :eid
-                  AND status = 'resolved'
-                  AND resolution = 'remove'
-                LIMIT 1
-                """
-            ), { 'tid': timeline_id, 'eid': event_id }).first()
-            removed_for_timeline = bool(rm)
-        except Exception as _e:
-            app.logger.info(f"Removed check failed (proceeding): {_e}")
+        removed_for_timeline = event.id in removed_event_ids_for_timeline(db.session, timeline_id, [event.id])
 
         # Allow fetch even if removed_for_timeline (so Admin can still view via ticket),
         # but if it neither belongs directly nor by reference AND not removed_for_timeline, 404
         if not (is_direct or is_referenced or removed_for_timeline):
             return jsonify({'error': 'Event does not belong to this timeline'}), 404
 
-        # Tags
-        tags = []
-        for t in event.tags:
-            normalized_tag_name = _normalize_timeline_policy_name(t.name)
-            if normalized_tag_name and normalized_tag_name in banned_timeline_names:
-                continue
-            tags.append({'id': t.id, 'name': t.name})
-
-        # Build associated_timelines: include owning timeline, explicit associations, and hashtag timelines derived from tags
-        associated_timelines = []
-        try:
-            from sqlalchemy import text as _sql_text
-            # Fetch associated timeline IDs (owning + associations)
-            # Check both event_timeline_association (new) and event_timeline_refs (old)
-            id_rows = db.session.execute(_sql_text(
-                """
-                SELECT DISTINCT timeline_id AS tid FROM event_timeline_association WHERE event_id = :eid
-                UNION
-                SELECT DISTINCT timeline_id AS tid FROM event_timeline_refs WHERE event_id = :eid
-                UNION
-                SELECT timeline_id AS tid FROM event WHERE id = :eid
-                """
-            ), { 'eid': event_id }).all()
-            assoc_ids = [int(r[0]) for r in id_rows if r and r[0] is not None]
-            # Also include hashtag timelines matched by tag names for this event
-            if event.tags:
-                tag_names = [t.name for t in event.tags if getattr(t, 'name', None)]
-                if tag_names:
-                    tl_hash_rows = db.session.execute(_sql_text(
-                        """
-                        SELECT id, name, timeline_type FROM timeline
-                        WHERE LOWER(name) = ANY(:names)
-                        """
-                    ), { 'names': [str(n).lower() for n in tag_names] }).mappings().all()
-                    for tl in tl_hash_rows:
-                        assoc_ids.append(int(tl['id']))
-            # De-duplicate
-            assoc_ids = sorted(set(assoc_ids))
-            if banned_timeline_ids:
-                assoc_ids = [tid for tid in assoc_ids if tid not in banned_timeline_ids]
-            if assoc_ids:
-                tl_rows = db.session.execute(_sql_text(
-                    """
-                    SELECT id, name, timeline_type FROM timeline WHERE id = ANY(:ids)
-                    """
-                ), { 'ids': assoc_ids }).mappings().all()
-                for tl in tl_rows:
-                    associated_timelines.append({
-                        'id': int(tl['id']),
-                        'name': tl['name'],
-                        'type': tl.get('timeline_type') or 'hashtag'
-                    })
-            # Block list: get removed timeline ids for this event
-            ensure_timeline_block_list_table()
-            rm_rows = db.session.execute(_sql_text(
-                """
-                SELECT timeline_id FROM timeline_block_list WHERE event_id = :eid
-                """
-            ), { 'eid': event_id }).all()
-            removed_timeline_ids = [int(r[0]) for r in rm_rows]
-        except Exception as _e:
-            app.logger.info(f"Skipping associated_timelines build due to error: {_e}")
-            removed_timeline_ids = []
-
-        # Creator info
-        creator = User.query.get(event.created_by)
-        creator_username = creator.username if creator else "Unknown"
-        creator_avatar = creator.avatar_url if creator else None
-
-        event_data = {
-            'id': event.id,
-            'title': event.title,
-            'description': event.description,
-            'content': event.content,
-            'event_date': event.event_date.isoformat() if event.event_date else None,
-            'type': event.type,
-            'url': event.url,
-            'url_title': event.url_title,
-            'url_description': event.url_description,
-            'url_image': event.url_image,
-            'media_url': event.media_url,
-            'media_type': event.media_type,
-            'timeline_id': event.timeline_id,
-            'created_by': event.created_by,
-            'created_by_username': creator_username,
-            'created_by_avatar': creator_avatar,
-            'created_at': event.created_at.isoformat() if hasattr(event.created_at, 'isoformat') else str(event.created_at),
-            'edit_locked': bool(getattr(event, 'edit_locked', False)),
-            'tags': tags,
-            'associated_timelines': associated_timelines,
-            'removed_from_this_timeline': removed_for_timeline,
-            'removed_timeline_ids': removed_timeline_ids
-        }
+        hydrated = hydrate_events(
+            db.session,
+            [event],
+            banned_timeline_ids=banned_timeline_ids,
+            banned_timeline_names=banned_timeline_names,
+        )
+        event_data = serialize_event(event, hydrated.get(event.id), removed_from_this_timeline=removed_for_timeline)
 
         return jsonify(event_data), 200
 
@@ -3308,126 +4036,41 @@ def create_timeline_v3_event(timeline_id):
             elif 'public_id' in data and data['public_id']:
                 new_event.cloudinary_id = data['public_id']
         
-        # Handle tags
+        # Handle tags: resolve/create every tag and hashtag timeline in a few set-based statements
         if 'tags' in data and data['tags']:
             app.logger.info(f"Processing tags: {data['tags']}")
-            for tag_name in data['tags']:
-                # Clean tag name
-                tag_name = str(tag_name or '').strip().lower().replace('#', '')
-                # Canonical hashtag naming: treat hyphens as spaces to avoid
-                # duplicate timeline materialization (e.g., BAN-TEST vs BAN TEST).
-                tag_name = ' '.join(tag_name.replace('-', ' ').split())
-                if not tag_name:
-                    continue
-
-                app.logger.info(f"Processing tag: {tag_name}")
-
-                # Find or create tag (case insensitive)
-                tag = Tag.query.filter(db.func.lower(Tag.name) == tag_name).first()
-                if not tag:
-                    app.logger.info(f"Creating new tag: {tag_name}")
-                    # Create new tag
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-
-                    # Create or reuse a *hashtag* timeline for this tag.
-                    # We intentionally restrict to hashtag-type timelines so that
-                    # community (i-) timelines are never reused as hashtag timelines
-                    # even if the raw name matches.
-                    capitalized_tag_name = tag_name.upper()
-
-                    tag_timeline = Timeline.query.filter(
-                        Timeline.timeline_type == 'hashtag',
-                        db.or_(
-                            db.func.lower(Timeline.name) == tag_name,
-                            db.func.lower(Timeline.name) == f"#{tag_name}",
-                            db.func.replace(db.func.lower(Timeline.name), '-', ' ') == tag_name
-                        )
-                    ).first()
-
-                    if not tag_timeline:
-                        app.logger.info(f"Creating new hashtag timeline for tag: {capitalized_tag_name}")
-                        # Create a new hashtag timeline with ALL CAPS name
-                        tag_timeline = Timeline(
-                            name=capitalized_tag_name,
-                            description=f"Timeline for #{tag_name}",
-                            created_by=current_user_id,  # Use authenticated user's ID
-                            timeline_type='hashtag'
-                        )
-                        db.session.add(tag_timeline)
-                        db.session.flush()  # Get the timeline ID
-                        tag.timeline_id = tag_timeline.id
-                    else:
-                        app.logger.info(f"Using existing hashtag timeline for tag: {tag_timeline.name} (ID: {tag_timeline.id})")
-                        # Use existing hashtag timeline
-                        tag.timeline_id = tag_timeline.id
-
-                    # Add this event as a reference in the timeline, but only if it's not the same as the current timeline
-                    current_timeline = Timeline.query.get(timeline_id)
-                    if current_timeline and tag_timeline.name.lower() != current_timeline.name.lower():
-                        app.logger.info(f"Adding reference to tag timeline: {tag_timeline.name} (ID: {tag_timeline.id})")
-                        new_event.referenced_in.append(tag_timeline)
-                    else:
-                        app.logger.info(f"Skipping reference to current timeline: {tag_timeline.name} (ID: {tag_timeline.id})")
-                else:
-                    app.logger.info(f"Using existing tag: {tag.name} (ID: {tag.id})")
-                    # If tag exists, ensure this event is added to the corresponding hashtag timeline
-                    if tag.timeline_id:
-                        existing_timeline = Timeline.query.get(tag.timeline_id)
-
-                        # If this tag is currently bound to a non-hashtag timeline (e.g. a community),
-                        # remap it to a proper hashtag timeline for this tag name.
-                        if existing_timeline and existing_timeline.timeline_type != 'hashtag':
-                            capitalized_tag_name = tag_name.upper()
-
-                            remap_timeline = Timeline.query.filter(
-                                Timeline.timeline_type == 'hashtag',
-                                db.or_(
-                                    db.func.lower(Timeline.name) == tag_name,
-                                    db.func.lower(Timeline.name) == f"#{tag_name}",
-                                    db.func.replace(db.func.lower(Timeline.name), '-', ' ') == tag_name
-                                )
-                            ).first()
-
-                            if not remap_timeline:
-                                remap_timeline = Timeline(
-                                    name=capitalized_tag_name,
-                                    description=f"Timeline for #{tag_name}",
-                                    created_by=current_user_id,
-                                    timeline_type='hashtag'
-                                )
-                                db.session.add(remap_timeline)
-                                db.session.flush()
-
-                            tag.timeline_id = remap_timeline.id
-                            existing_timeline = remap_timeline
-
-                        current_timeline = Timeline.query.get(timeline_id)
-                        
-                        # Only add the reference if it's not the same as the current timeline
-                        if existing_timeline and existing_timeline not in new_event.referenced_in:
-                            # Compare timeline names case-insensitively
-                            if current_timeline and existing_timeline.name.lower() != current_timeline.name.lower():
-                                app.logger.info(f"Adding event to existing timeline: {existing_timeline.name} (ID: {existing_timeline.id})")
-                                new_event.referenced_in.append(existing_timeline)
-                            else:
-                                app.logger.info(f"Skipping reference to current timeline: {existing_timeline.name} (ID: {existing_timeline.id})")
-                        
-                # Always add the tag to the event
+            _apply_hashtag_key_schema()
+            resolved_tags = resolve_tags(db.session, data['tags'], created_by=current_user_id)
+            tags_by_id = {
+                tag.id: tag for tag in Tag.query.filter(Tag.id.in_([r['tag_id'] for r in resolved_tags])).all()
+            }
+            timeline_ids = [r['timeline_id'] for r in resolved_tags if r['timeline_id']]
+            timelines_by_id = {
+                t.id: t for t in Timeline.query.filter(Timeline.id.in_(timeline_ids)).all()
+            } if timeline_ids else {}
+            current_timeline = Timeline.query.get(timeline_id)
+            current_timeline_name = current_timeline.name.lower() if current_timeline else None
+
+            for resolved in resolved_tags:
+                tag = tags_by_id[resolved['tag_id']]
                 app.logger.info(f"Adding tag to event: {tag.name} (ID: {tag.id})")
                 new_event.tags.append(tag)
-                
-                # Check if this tag's timeline is the same as the current timeline
-                # If so, don't add it as a reference to prevent duplication
-                current_timeline = Timeline.query.get(timeline_id)
-                if current_timeline and tag.timeline_id:
-                    tag_timeline_name = Timeline.query.get(tag.timeline_id).name.lower() if Timeline.query.get(tag.timeline_id) else None
-                    current_timeline_name = current_timeline.name.lower()
-                    app.logger.info(f"Comparing timelines: tag timeline '{tag_timeline_name}' vs current timeline '{current_timeline_name}'")
+
+                # Reference the tag's timeline unless it is the timeline being posted to
+                tag_timeline = timelines_by_id.get(resolved['timeline_id'])
+                if not tag_timeline or current_timeline_name is None:
+                    continue
+                if tag_timeline.name.lower() == current_timeline_name:
+                    app.logger.info(f"Skipping reference to current timeline: {tag_timeline.name} (ID: {tag_timeline.id})")
+                elif tag_timeline not in new_event.referenced_in:
+                    app.logger.info(f"Adding reference to tag timeline: {tag_timeline.name} (ID: {tag_timeline.id})")
+                    new_event.referenced_in.append(tag_timeline)
         
         app.logger.info('Attempting to save event to database')
         try:
             db.session.add(new_event)
+            db.session.flush()
+            reindex_events(db.session, [new_event.id])
             db.session.commit()
             app.logger.info('Event saved successfully')
             
@@ -3690,6 +4333,8 @@ def update_timeline_v3_event(timeline_id, event_id):
                         if tag_timeline not in event.referenced_in:
                             event.referenced_in.append(tag_timeline)
 
+        db.session.flush()
+        reindex_events(db.session, [event.id])
         db.session.commit()
 
         # Prepare updated response
@@ -3740,39 +4385,7 @@ def update_timeline_v3_event(timeline_id, event_id):
 def delete_timeline_v3(timeline_id):
     try:
         app.logger.info(f'Deleting timeline {timeline_id}')
-        
-        # Get the timeline
-        timeline = Timeline.query.get(timeline_id)
-        if not timeline:
-            return jsonify({'error': 'Timeline not found'}), 404
-            
-        # Get all events that are directly in this timeline
-        direct_events = Event.query.filter_by(timeline_id=timeline_id).all()
-        
-        # For each direct event, remove it from the timeline
-        for event in direct_events:
-            # If the event is referenced in other timelines, just remove it from this one
-            if event.referenced_in:
-                # Keep the event, but change its primary timeline to one of its references
-                event.timeline_id = event.referenced_in[0].id
-                # Remove this timeline from its references
-                event.referenced_in.remove(timeline)
-            else:
-                # If the event is not referenced elsewhere, delete it
-                db.session.delete(event)
-        
-        # Find tags associated with this timeline
-        associated_tags = Tag.query.filter_by(timeline_id=timeline_id).all()
-        
-        # For each tag, remove the timeline association
-        for tag in associated_tags:
-            tag.timeline_id = None
-        
-        # Delete the timeline
-        db.session.delete(timeline)
-        db.session.commit()
-        
-        return jsonify({'message': 'Timeline deleted successfully'}), 200
+        return _delete_timeline_response(timeline_id)
     except Exception as e:
         db.session.rollback()
         app.logger.error(f'Error deleting timeline: {str(e)}')
@@ -3821,7 +4434,8 @@ def url_preview():
             return jsonify({'error': 'URL is required'}), 400
             
         url = data['url']
-        preview_data = get_link_preview(url)
+        # Bounded wait: slow sites return a fallback with pending=True and finish in the background
+        preview_data = link_preview_service.preview_for_request(url)
         
         if not preview_data:
             return jsonify({'error': 'Failed to fetch preview'}), 500
@@ -3869,6 +4483,44 @@ def get_user_profile(user_id):
         logger.error(f"Error getting user profile: {str(e)}")
         return jsonify({'error': 'An error occurred while fetching the user profile'}), 500
 
+@app.route('/api/typeahead', methods=['GET'])
+@app.route('/api/v1/typeahead', methods=['GET'])
+@jwt_required()
+def typeahead():
+    """
+    Autocomplete for @user, #hashtag and i-community mentions.
+
+    Query params:
+      - q: prefix, optionally with its sigil ('@al', '#foo', 'i-co'); the
+        sigil picks the kind
+      - kind: comma-separated kinds to search without a sigil
+        (user, hashtag, community; default all)
+      - limit: matches per kind (default 8, max 25)
+
+    Matches come from a per-worker prefix index, most popular first, as
+    {'query': prefix, 'results': {kind: [...]}}. Banned timelines are left out.
+    New names show up within TYPEAHEAD_REFRESH_SECONDS; a rename or timeline
+    deletion is reflected on the worker that handled it once its background
+    rebuild finishes, and within TYPEAHEAD_REBUILD_SECONDS on the others.
+    'ready' is False (and results empty) while a worker builds its index.
+    """
+    try:
+        try:
+            kinds, prefix = parse_typeahead_query(request.args.get('q'), request.args.get('kind'))
+            limit = parse_typeahead_limit(request.args.get('limit'))
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        banned_timeline_ids, _ = _get_active_banned_timeline_ids_and_names()
+        results = typeahead_index.lookup(
+            db.session, kinds, prefix, limit=limit, banned_timeline_ids=banned_timeline_ids
+        )
+        return jsonify({'query': prefix, 'results': results, 'ready': typeahead_index.ready()}), 200
+    except Exception as e:
+        logger.error(f"Error in typeahead lookup: {str(e)}")
+        return jsonify({'error': 'Failed to look up suggestions'}), 500
+
+
 @app.route('/api/users/lookup', methods=['GET'])
 @jwt_required()
 def lookup_user_by_username():
@@ -4245,16 +4897,17 @@ def get_user_events(user_id):
         # Get events created by the user, ordered by creation date (newest first)
         events = Event.query.filter_by(created_by=user_id).order_by(Event.created_at.desc()).all()
         
+        # Tags and creator profile for every event in one batch
+        hydrated = hydrate_events(db.session, events, sections=('tags', 'creators'))
+
         # Format the events
         events_data = []
         for event in events:
-            # Get the tags for this event
-            tags = [tag.name for tag in event.tags]
-            
-            # Get the creator's username
-            creator = User.query.get(event.created_by)
-            creator_username = creator.username if creator else "Unknown"
-            creator_avatar = creator.avatar_url if creator else None
+            event_hydration = hydrated.get(event.id) or {}
+            tags = [tag['name'] for tag in event_hydration.get('tags', [])]
+            creator = event_hydration.get('creator')
+            creator_username = creator['username'] if creator else "Unknown"
+            creator_avatar = creator['avatar_url'] if creator else None
             
             # Format the event data
             event_data = {
@@ -4315,12 +4968,28 @@ def health_check():
             "headers": app.config.get("CORS_HEADERS", "Content-Type,Authorization")
         }
         
+        # Startup schema readiness (per worker)
+        schema_info = schema_status()
+        
+        # Per-worker cache counters
+        cache_stats = {
+            "timeline_bans": timeline_ban_registry.stats(),
+            "link_previews": link_preview_service.stats(),
+            "token_revocations": token_revocation_cache.stats(),
+            "user_moderation": user_moderation_cache.stats(),
+            "public_responses": public_response_cache.stats(),
+            "single_flight": timeline_single_flight.stats(),
+            "typeahead": typeahead_index.stats()
+        }
+        
         # Return comprehensive health information
         return jsonify({
             "status": "ok",
             "database": db_status,
             "environment": env_info,
             "cors": cors_config,
+            "caches": cache_stats,
+            "schema": schema_info,
             "message": "iTimeline API is running"
         })
     except Exception as e:
@@ -4418,6 +5087,8 @@ def delete_timeline_v3_event(timeline_id, event_id):
                 print(f"Media file deletion result: {delete_result}")
         
         # Delete the event from the database
+        bump_event_timelines(db.session, [event.id])
+        record_event_deletions(db.session, [event.id])
         db.session.delete(event)
         db.session.commit()
         
@@ -5007,22 +5678,28 @@ def _normalize_action_type(action_type):
     return s if s in VALID_ACTION_TYPES else None
 
 
-def ensure_timeline_action_support_schema():
+@schema_ensure('timeline_action_support')
+def _apply_timeline_action_support_schema():
     """Safe additive schema ensure for Action Cards support fields/tables."""
-    try:
-        inspector = inspect(db.engine)
-        table_names = set(inspector.get_table_names())
-
-        # Add baseline stamp column for member-threshold goals if missing.
-        if 'timeline_action' in table_names:
-            action_cols = {c['name'] for c in inspector.get_columns('timeline_action')}
-            if 'baseline_member_count' not in action_cols:
-                db.session.execute(text('ALTER TABLE timeline_action ADD COLUMN baseline_member_count INTEGER'))
-                db.session.commit()
+    inspector = inspect(db.engine)
+    table_names = set(inspector.get_table_names())
+
+    # Add baseline stamp column for member-threshold goals if missing.
+    if 'timeline_action' in table_names:
+        action_cols = {c['name'] for c in inspector.get_columns('timeline_action')}
+        if 'baseline_member_count' not in action_cols:
+            db.session.execute(text('ALTER TABLE timeline_action ADD COLUMN baseline_member_count INTEGER'))
+            db.session.commit()
+
+    # Ensure vote table exists (one vote per user per timeline+tier).
+    if 'timeline_action_vote' not in table_names:
+        TimelineActionVote.__table__.create(bind=db.engine, checkfirst=True)
+
 
-        # Ensure vote table exists (one vote per user per timeline+tier).
-        if 'timeline_action_vote' not in table_names:
-            TimelineActionVote.__table__.create(bind=db.engine, checkfirst=True)
+def ensure_timeline_action_support_schema():
+    """Ensure Action Cards schema. No-op once the startup schema check passed."""
+    try:
+        _apply_timeline_action_support_schema()
     except Exception as e:
         db.session.rollback()
         print(f"[ActionCards] ensure_timeline_action_support_schema failed: {e}")
@@ -5035,24 +5712,38 @@ def _get_active_member_count(timeline_id):
     ).count()
 
 
-def _build_action_progress(action, timeline_id, user_id):
+def _load_action_tally(timeline_id, user_id):
+    """Member count and vote counts for every tier of a timeline, for _build_action_progress."""
+    tally = load_action_tally(db.session, timeline_id, user_id)
+    tally['member_count'] = _get_active_member_count(timeline_id)
+    return tally
+
+
+def _build_action_progress(action, timeline_id, user_id, tally=None):
     threshold_type = (action.threshold_type or 'members').strip().lower()
     threshold_value = int(action.threshold_value or 0)
     baseline_member_count = action.baseline_member_count
-    current_member_count = _get_active_member_count(timeline_id)
 
-    current_votes = TimelineActionVote.query.filter_by(
-        timeline_id=timeline_id,
-        action_type=action.action_type
-    ).count()
+    if tally is not None:
+        # Counts loaded once for all tiers (see _load_action_tally)
+        current_member_count = tally['member_count']
+        current_votes = tally['votes'].get(action.action_type, 0)
+        user_voted = action.action_type in tally['user_votes']
+    else:
+        current_member_count = _get_active_member_count(timeline_id)
 
-    user_voted = False
-    if user_id is not None:
-        user_voted = TimelineActionVote.query.filter_by(
+        current_votes = TimelineActionVote.query.filter_by(
             timeline_id=timeline_id,
-            action_type=action.action_type,
-            user_id=user_id
-        ).first() is not None
+            action_type=action.action_type
+        ).count()
+
+        user_voted = False
+        if user_id is not None:
+            user_voted = TimelineActionVote.query.filter_by(
+                timeline_id=timeline_id,
+                action_type=action.action_type,
+                user_id=user_id
+            ).first() is not None
 
     if threshold_type == 'members':
         if baseline_member_count is None:
@@ -5112,6 +5803,12 @@ def get_timeline_actions(timeline_id):
         timeline = Timeline.query.get(timeline_id)
         if not timeline:
             return jsonify({"error": "Timeline not found"}), 404
+
+        # Progress includes the caller's own vote
+        etag = _timeline_etag('actions', timeline_id, user_id)
+        not_modified = _not_modified_response(etag)
+        if not_modified:
+            return not_modified
         
         # Get all actions for this timeline (both active and inactive)
         actions = TimelineAction.query.filter_by(
@@ -5119,17 +5816,18 @@ def get_timeline_actions(timeline_id):
         ).order_by(TimelineAction.action_type).all()
         
         # Convert to dictionary format + include progress details
+        tally = _load_action_tally(timeline_id, user_id) if actions else None
         actions_data = []
         for action in actions:
             action_data = action.to_dict()
-            action_data['progress'] = _build_action_progress(action, timeline_id, user_id)
+            action_data['progress'] = _build_action_progress(action, timeline_id, user_id, tally)
             actions_data.append(action_data)
         
-        return jsonify({
+        return _with_etag((jsonify({
             'actions': actions_data,
             'timeline_id': timeline_id,
             'total': len(actions_data)
-        }), 200
+        }), 200), etag)
         
     except Exception as e:
         print(f"Error getting timeline actions: {e}")
@@ -5552,89 +6250,11 @@ def _parse_description_to_content(description):
     - #timeline_name (hashtag mentions) → clickable to hashtag timeline
     - i-community_name (community mentions) → clickable to community timeline
     - www.url or https://url (links) → clickable URLs
+
+    Mentions carry the user_id / timeline_id they resolve to (None when no
+    such name exists), looked up in one batched query; see utils/event_mentions.py.
     """
-    import json
-    import re
-    
-    if not description or not isinstance(description, str):
-        return None
-    
-    content_items = []
-    last_end = 0
-    
-    # Pattern to match all mention and link types
-    # @username, #timeline_name, i-community_name, www.url, https://url
-    pattern = r'(@[a-zA-Z0-9_]+)|(\#[a-zA-Z0-9_]+)|(i-[a-zA-Z0-9_]+)|(www\.[^\s]+)|(https?://[^\s]+)'
-    
-    for match in re.finditer(pattern, description):
-        # Add text before this match
-        if match.start() > last_end:
-            text_before = description[last_end:match.start()]
-            if text_before.strip():
-                content_items.append({
-                    'type': 'text',
-                    'value': text_before
-                })
-        
-        matched_text = match.group(0)
-        
-        # Determine mention type and extract name/url
-        if matched_text.startswith('@'):
-            # User mention
-            username = matched_text[1:]
-            content_items.append({
-                'type': 'user_mention',
-                'username': username,
-                'text': matched_text
-            })
-        elif matched_text.startswith('#'):
-            # Hashtag mention
-            name = matched_text[1:]
-            content_items.append({
-                'type': 'hashtag_mention',
-                'name': name,
-                'text': matched_text
-            })
-        elif matched_text.startswith('i-'):
-            # Community mention
-            name = matched_text[2:]
-            content_items.append({
-                'type': 'community_mention',
-                'name': name,
-                'text': matched_text
-            })
-        elif matched_text.startswith('http'):
-            # Full URL
-            content_items.append({
-                'type': 'link',
-                'url': matched_text,
-                'text': matched_text
-            })
-        elif matched_text.startswith('www.'):
-            # www URL (convert to https)
-            url = f"https://{matched_text}"
-            content_items.append({
-                'type': 'link',
-                'url': url,
-                'text': matched_text
-            })
-        
-        last_end = match.end()
-    
-    # Add remaining text
-    if last_end < len(description):
-        text_after = description[last_end:]
-        if text_after.strip():
-            content_items.append({
-                'type': 'text',
-                'value': text_after
-            })
-    
-    # Only return content if we found mentions/links
-    if not content_items:
-        return None
-    
-    return json.dumps({'content': content_items})
+    return render_content(db.session, description)
 
 
 def _extract_plain_text_from_content(content_data):
@@ -5680,6 +6300,11 @@ def get_info_cards(timeline_id):
         timeline = Timeline.query.filter_by(id=timeline_id, timeline_type='community').first()
         if not timeline:
             return jsonify({"error": "Community timeline not found"}), 404
+
+        etag = _timeline_etag('info-cards', timeline_id)
+        not_modified = _not_modified_response(etag)
+        if not_modified:
+            return not_modified
         
         # Get all info cards ordered by card_order
         cards = CommunityInfoCard.query.filter_by(timeline_id=timeline_id).order_by(
@@ -5687,7 +6312,7 @@ def get_info_cards(timeline_id):
             CommunityInfoCard.created_at.asc()
         ).all()
         
-        return jsonify([card.to_dict() for card in cards]), 200
+        return _with_etag((jsonify([card.to_dict() for card in cards]), 200), etag)
         
     except Exception as e:
         print(f"Error getting info cards: {e}")
@@ -6280,6 +6905,18 @@ def remove_personal_timeline_viewer(timeline_id, user_id):
 # TIMELINE QUOTE ENDPOINTS
 # =============================================================================
 
+DEFAULT_TIMELINE_QUOTE_TEXT = "Those who make Peaceful Revolution impossible, will make violent Revolution inevitable."
+DEFAULT_TIMELINE_QUOTE_AUTHOR = "John F. Kennedy"
+
+
+def _timeline_quote_data(timeline):
+    return {
+        "text": timeline.quote_text or DEFAULT_TIMELINE_QUOTE_TEXT,
+        "author": timeline.quote_author or DEFAULT_TIMELINE_QUOTE_AUTHOR,
+        "is_custom": bool(timeline.quote_text)  # True if custom quote is set
+    }
+
+
 @app.route('/api/v1/timelines/<int:timeline_id>/quote', methods=['GET'])
 @jwt_required()
 def get_timeline_quote(timeline_id):
@@ -6307,11 +6944,7 @@ def get_timeline_quote(timeline_id):
                 return jsonify({"error": "Access denied"}), 403
         
         # Return quote data (with defaults if not set)
-        quote_data = {
-            "text": timeline.quote_text or "Those who make Peaceful Revolution impossible, will make violent Revolution inevitable.",
-            "author": timeline.quote_author or "John F. Kennedy",
-            "is_custom": bool(timeline.quote_text)  # True if custom quote is set
-        }
+        quote_data = _timeline_quote_data(timeline)
         
         return jsonify({
             "success": True,
@@ -6367,11 +7000,7 @@ def update_timeline_quote(timeline_id):
         db.session.commit()
         
         # Return updated quote data
-        quote_data = {
-            "text": timeline.quote_text or "Those who make Peaceful Revolution impossible, will make violent Revolution inevitable.",
-            "author": timeline.quote_author or "John F. Kennedy",
-            "is_custom": bool(timeline.quote_text)
-        }
+        quote_data = _timeline_quote_data(timeline)
         
         return jsonify({
             "success": True,
@@ -6587,17 +7216,7 @@ def cast_vote(event_id):
         db.session.commit()
         
         # Return updated vote stats
-        promote_count = Vote.query.filter_by(event_id=event_id, vote_type='promote').count()
-        demote_count = Vote.query.filter_by(event_id=event_id, vote_type='demote').count()
-        user_vote = Vote.query.filter_by(event_id=event_id, user_id=current_user_id).first()
-        
-        return jsonify({
-            'event_id': event_id,
-            'promote_count': promote_count,
-            'demote_count': demote_count,
-            'total_count': promote_count + demote_count,
-            'user_vote': user_vote.vote_type if user_vote else None
-        }), 200
+        return jsonify(fetch_vote_tally(db.session, event_id, current_user_id)), 200
         
     except Exception as e:
         db.session.rollback()
@@ -6613,30 +7232,49 @@ def get_vote_stats(event_id):
     Returns promote count, demote count, and current user's vote (if authenticated).
     """
     try:
-        # Check if event exists
-        event = Event.query.get(event_id)
-        if not event:
-            return jsonify({'error': 'Event not found'}), 404
+        identity = get_jwt_identity()
+        current_user_id = int(identity) if identity else None
         
-        promote_count = Vote.query.filter_by(event_id=event_id, vote_type='promote').count()
-        demote_count = Vote.query.filter_by(event_id=event_id, vote_type='demote').count()
+        # Existence check, counts and the caller's vote in one statement
+        tally = fetch_vote_tally(db.session, event_id, current_user_id)
+        if tally is None:
+            return jsonify({'error': 'Event not found'}), 404
         
-        user_vote = None
-        if get_jwt_identity():
-            current_user_id = int(get_jwt_identity())
-            vote = Vote.query.filter_by(event_id=event_id, user_id=current_user_id).first()
-            user_vote = vote.vote_type if vote else None
+        return jsonify(tally), 200
         
+    except Exception as e:
+        app.logger.error(f'Error getting vote stats: {str(e)}')
+        return jsonify({'error': f'Failed to get vote stats: {str(e)}'}), 500
+
+
+@app.route('/api/v1/events/votes', methods=['GET'])
+@jwt_required(optional=True)
+def get_vote_stats_bulk():
+    """
+    Get vote statistics for many events at once.
+    Query: ids=1,2,3 (up to 200). Returns a tally per existing event, keyed by event id.
+    """
+    try:
+        try:
+            event_ids = parse_event_ids(request.args.get('ids'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not event_ids:
+            return jsonify({'error': 'ids is required'}), 400
+        if len(event_ids) > MAX_BULK_EVENT_IDS:
+            return jsonify({'error': f'At most {MAX_BULK_EVENT_IDS} ids per request'}), 400
+        
+        identity = get_jwt_identity()
+        current_user_id = int(identity) if identity else None
+        
+        tallies = fetch_vote_tallies(db.session, event_ids, current_user_id)
         return jsonify({
-            'event_id': event_id,
-            'promote_count': promote_count,
-            'demote_count': demote_count,
-            'total_count': promote_count + demote_count,
-            'user_vote': user_vote
+            'votes': {str(eid): tallies[eid] for eid in event_ids if eid in tallies},
+            'missing_ids': [eid for eid in event_ids if eid not in tallies]
         }), 200
         
     except Exception as e:
-        app.logger.error(f'Error getting vote stats: {str(e)}')
+        app.logger.error(f'Error getting bulk vote stats: {str(e)}')
         return jsonify({'error': f'Failed to get vote stats: {str(e)}'}), 500
 
 
@@ -6667,21 +7305,17 @@ def remove_vote(event_id):
         db.session.commit()
         
         # Return updated vote stats
-        promote_count = Vote.query.filter_by(event_id=event_id, vote_type='promote').count()
-        demote_count = Vote.query.filter_by(event_id=event_id, vote_type='demote').count()
-        
-        return jsonify({
-            'event_id': event_id,
-            'promote_count': promote_count,
-            'demote_count': demote_count,
-            'total_count': promote_count + demote_count,
-            'user_vote': None
-        }), 200
+        return jsonify(fetch_vote_tally(db.session, event_id, current_user_id)), 200
         
     except Exception as e:
         db.session.rollback()
         app.logger.error(f'Error removing vote: {str(e)}')
         return jsonify({'error': f'Failed to remove vote: {str(e)}'}), 500
 
+# Apply additive schema checks once per worker at startup (see utils/schema_readiness.py).
+# Request-path ensure_* calls become no-ops once their check has passed.
+with app.app_context():
+    run_schema_checks()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -1,3 +1,11 @@
+import os
+
 workers = 4
+# Threaded workers, so concurrent identical reads within a worker share one
+# build (utils/single_flight.py). Each thread holds at most one pooled DB
+# connection; 4 threads plus the background refresh threads stay within
+# SQLAlchemy's default pool (5 + 10 overflow) per worker.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
 bind = "0.0.0.0:10000"
 timeout = 120
@@ -0,0 +1,62 @@
+"""
+Migration script to add the full-text search vector behind /search/events.
+
+Creates (if missing):
+1. event.search_vector, a stored generated tsvector (title weighted A,
+   url_title B, description C)
+2. idx_event_search_vector, a GIN index on it, built CONCURRENTLY
+
+Adding the generated column rewrites the event table under an exclusive
+lock, so run this in a maintenance window rather than at app startup.
+Workers detect the column when they boot; restart them afterwards to
+enable search.
+
+Usage:
+    from migrations.add_event_search_vector import run_migration
+    run_migration()
+"""
+
+import os
+import sys
+import sqlalchemy as sa
+
+# Add parent directory for app import
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from utils.event_search import search_vector_sql
+
+
+def run_migration():
+    print("Starting migration: add event search vector")
+
+    try:
+        with app.app_context():
+            if db.engine.dialect.name != 'postgresql':
+                print("Not PostgreSQL; the FTS5 table is created at startup instead")
+                return
+
+            db.session.execute(sa.text(
+                f"""
+                ALTER TABLE event ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS ({search_vector_sql()}) STORED
+                """
+            ))
+            db.session.commit()
+            print("Ensured: event.search_vector")
+
+            # CONCURRENTLY cannot run inside a transaction block
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                conn.execute(sa.text(
+                    'CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_event_search_vector ON event USING gin (search_vector)'
+                ))
+            print("Ensured: idx_event_search_vector")
+            print("Migration completed successfully")
+    except Exception as exc:
+        db.session.rollback()
+        print(f"Migration failed: {exc}")
+        raise
+
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,49 @@
+"""
+Migration script to add indexes backing the paginated timeline event feed.
+
+Creates (if missing):
+1. idx_event_timeline_date on event (timeline_id, event_date, id)
+2. idx_event_timeline_refs_timeline on event_timeline_refs (timeline_id, event_id)
+3. idx_event_timeline_assoc_timeline on event_timeline_association (timeline_id, event_id)
+
+Usage:
+    from migrations.add_timeline_feed_indexes import run_migration
+    run_migration()
+"""
+
+import os
+import sys
+import sqlalchemy as sa
+
+# Add parent directory for app import
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+
+
+FEED_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_event_timeline_date ON event (timeline_id, event_date, id)',
+    'CREATE INDEX IF NOT EXISTS idx_event_timeline_refs_timeline ON event_timeline_refs (timeline_id, event_id)',
+    'CREATE INDEX IF NOT EXISTS idx_event_timeline_assoc_timeline ON event_timeline_association (timeline_id, event_id)',
+]
+
+
+def run_migration():
+    print("Starting migration: add timeline feed indexes")
+
+    try:
+        with app.app_context():
+            for statement in FEED_INDEXES:
+                db.session.execute(sa.text(statement))
+                print(f"Ensured: {statement}")
+
+            db.session.commit()
+            print("Migration completed successfully")
+    except Exception as exc:
+        db.session.rollback()
+        print(f"Migration failed: {exc}")
+        raise
+
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,39 @@
+"""
+Migration script to index token_blocklist.created_at.
+
+The per-worker revocation cache refreshes incrementally with
+"created_at >= :since", and the purge job deletes by created_at.
+
+Usage:
+    from migrations.add_token_blocklist_created_at_index import run_migration
+    run_migration()
+"""
+
+import os
+import sys
+import sqlalchemy as sa
+
+# Add parent directory for app import
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+
+
+def run_migration():
+    print("Starting migration: add token_blocklist created_at index")
+
+    try:
+        with app.app_context():
+            db.session.execute(sa.text(
+                'CREATE INDEX IF NOT EXISTS ix_token_blocklist_created_at ON token_blocklist (created_at)'
+            ))
+            db.session.commit()
+            print("Migration completed successfully")
+    except Exception as exc:
+        db.session.rollback()
+        print(f"Migration failed: {exc}")
+        raise
+
+
+if __name__ == '__main__':
+    run_migration()
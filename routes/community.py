@@ -16,6 +16,8 @@ from sqlalchemy.exc import IntegrityError
 from marshmallow import ValidationError
 import sqlite3
 import logging
+from utils.timeline_event_index import reindex_events
+from utils.timeline_version import bump_timeline_versions
 
 # Create blueprint first, before any circular imports can happen
 community_bp = Blueprint('community', __name__)
@@ -648,6 +650,7 @@ def block_timeline_member_v2(timeline_id, user_id):
             
             if result.rowcount == 0:
                 return jsonify({"error": "Member not found"}), 404
+            bump_timeline_versions(conn, [timeline_id])
         
         return jsonify({
             'message': 'Member blocked',
@@ -790,6 +793,7 @@ def unblock_timeline_member_v2(timeline_id, user_id):
             
             if result.rowcount == 0:
                 return jsonify({"error": "Member not found"}), 404
+            bump_timeline_versions(conn, [timeline_id])
         
         return jsonify({
             'message': 'Member unblocked',
@@ -983,6 +987,7 @@ def remove_timeline_member_v2(timeline_id, user_id):
             
             if result.rowcount == 0:
                 return jsonify({"error": "Member not found"}), 404
+            bump_timeline_versions(conn, [timeline_id])
         
         return jsonify({
             "message": "Member kicked successfully",
@@ -1109,6 +1114,7 @@ def update_member_role(timeline_id, user_id):
             )
             if result.rowcount == 0:
                 return jsonify({"error": "Member not found"}), 404
+            bump_timeline_versions(conn, [timeline_id])
 
             # Return updated record
             updated = conn.execute(
@@ -1220,6 +1226,7 @@ def update_timeline_visibility(timeline_id):
             text("UPDATE timeline SET visibility = :vis, privacy_changed_at = :changed_at WHERE id = :tid"),
             {"vis": new_visibility, "changed_at": datetime.now(), "tid": timeline_id}
         )
+        bump_timeline_versions(conn, [timeline_id])
     
     # Return updated timeline data
     return jsonify({
@@ -1699,6 +1706,8 @@ def share_event(timeline_id, event_id):
     )
     
     db.session.add(association)
+    db.session.flush()
+    reindex_events(db.session, [event_id])
     db.session.commit()
     
     result = association_schema.dump(association)
@@ -1724,6 +1733,8 @@ def unshare_event(timeline_id, event_id):
     
     # Delete the association
     db.session.delete(association)
+    db.session.flush()
+    reindex_events(db.session, [event_id])
     db.session.commit()
     
     return jsonify({"message": "Event removed from timeline"}), 200
@@ -4,6 +4,12 @@ from datetime import datetime, timezone, timedelta
 import logging
 from sqlalchemy import text
 from utils.db_helper import get_db_engine
+from utils.ban_registry import invalidate_timeline_ban_cache
+from utils.moderation_cache import user_moderation_cache, invalidate_user_moderation_cache
+from utils.schema_readiness import schema_ensure
+from utils.timeline_event_index import reindex_events
+from utils.timeline_changes import record_event_deletions
+from utils.timeline_version import bump_event_timelines, bump_timeline_versions
 
 # We import helpers from community routes for consistent access control semantics
 from routes.community import check_timeline_access, get_user_id
@@ -16,6 +22,7 @@ STATUS_HEADER_MAX_CHARS = 120
 STATUS_BODY_MAX_CHARS = 320
 
 
+@schema_ensure('reports_table', boot=lambda: _ensure_reports_table(get_db_engine()))
 def _ensure_reports_table(engine):
     """Create the reports table and indexes if they don't already exist.
     Non-destructive and safe to call repeatedly.
@@ -58,6 +65,7 @@ def _ensure_reports_table(engine):
         conn.execute(text("UPDATE reports SET report_type = 'post' WHERE report_type IS NULL;"))
 
 
+@schema_ensure('timeline_status_message_table', boot=lambda: _ensure_timeline_status_message_table(get_db_engine()))
 def _ensure_timeline_status_message_table(engine):
     with engine.begin() as conn:
         conn.execute(text(
@@ -155,6 +163,7 @@ def _normalize_username_policy(username):
     return (str(username or '').strip()).lower()
 
 
+@schema_ensure('reports_user_moderation_tables', boot=lambda: _ensure_user_moderation_tables(get_db_engine()))
 def _ensure_user_moderation_tables(engine):
     with engine.begin() as conn:
         conn.execute(text(
@@ -201,6 +210,7 @@ def _parse_iso_datetime_utc(value):
         return None
 
 
+@schema_ensure('report_policy_tables', boot=lambda: _ensure_report_policy_tables(get_db_engine()))
 def _ensure_report_policy_tables(engine):
     with engine.begin() as conn:
         conn.execute(text(
@@ -279,6 +289,7 @@ def _ensure_report_policy_tables(engine):
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_timeline_name_blocklist_active ON timeline_name_blocklist (is_active);"))
 
 
+@schema_ensure('broken_event_queue_table', boot=lambda: _ensure_broken_event_queue_table(get_db_engine()))
 def _ensure_broken_event_queue_table(engine):
     with engine.begin() as conn:
         conn.execute(text(
@@ -381,42 +392,28 @@ def _normalize_timeline_name_policy(name):
     return (str(name or '').strip()).lower()
 
 
-def _get_user_moderation_state(conn, user_id):
-    if not user_id:
-        return {
-            'require_username_change': False,
-            'is_restricted': False,
-            'restricted_until': None,
-            'is_suspended': False,
-        }
-
+def _load_user_moderation_row(conn, user_id):
     row = conn.execute(text(
         """
         SELECT require_username_change,
                restricted_until,
                suspended_permanent,
-               suspended_until,
-               (restricted_until IS NOT NULL AND restricted_until > NOW()) AS is_restricted,
-               (suspended_permanent OR (suspended_until IS NOT NULL AND suspended_until > NOW())) AS is_suspended
+               suspended_until
         FROM user_moderation_state
         WHERE user_id = :uid
         """
     ), {'uid': int(user_id)}).mappings().first()
+    return dict(row) if row else None
 
-    if not row:
-        return {
-            'require_username_change': False,
-            'is_restricted': False,
-            'restricted_until': None,
-            'is_suspended': False,
-        }
 
-    restricted_until = row.get('restricted_until')
+def _get_user_moderation_state(conn, user_id):
+    # Shares the per-worker cache with app._get_user_moderation_state; conn is only used on a miss
+    state = user_moderation_cache.get(user_id, loader=lambda uid: _load_user_moderation_row(conn, uid))
     return {
-        'require_username_change': bool(row.get('require_username_change')),
-        'is_restricted': bool(row.get('is_restricted')),
-        'restricted_until': restricted_until.isoformat() if hasattr(restricted_until, 'isoformat') else None,
-        'is_suspended': bool(row.get('is_suspended')),
+        'require_username_change': state['require_username_change'],
+        'is_restricted': state['is_restricted'],
+        'restricted_until': state['restricted_until'],
+        'is_suspended': state['is_suspended'],
     }
 
 
@@ -963,6 +960,8 @@ def delete_broken_event_by_id(event_id):
             except Exception:
                 media_deleted = False
 
+        bump_event_timelines(conn, [event_id])
+        record_event_deletions(conn, [event_id])
         conn.execute(text("DELETE FROM vote WHERE event_id = :event_id"), {'event_id': int(event_id)})
         conn.execute(text("DELETE FROM event_timeline_association WHERE event_id = :event_id"), {'event_id': int(event_id)})
         conn.execute(text("DELETE FROM event_timeline_refs WHERE event_id = :event_id"), {'event_id': int(event_id)})
@@ -1357,6 +1356,11 @@ def resolve_site_report(report_id):
         if not res:
             return jsonify({'error': 'Report not found'}), 404
 
+        # Any resolution may change what these timelines serve; bump before the event can be deleted
+        bump_timeline_versions(conn, [timeline_id, reported_timeline_id])
+        if event_id_for_report is not None:
+            bump_event_timelines(conn, [event_id_for_report])
+
         if event_id_for_report is not None and (action == 'edit' or (lock_edit and action in {'safeguard', 'remove'})):
             try:
                 conn.execute(text(
@@ -1698,6 +1702,9 @@ def resolve_site_report(report_id):
                 except Exception:
                     return False
 
+            # Tombstones need the memberships, so record them before anything is unlinked
+            record_event_deletions(conn, [event_id_for_report])
+
             deleted_assoc_total = 0
             if _reg_exists('event_timeline_association'):
                 try:
@@ -1886,6 +1893,10 @@ def resolve_site_report(report_id):
             full_delete_required = False
             full_delete_reason = None
 
+        if event_id_for_report is not None:
+            # The resolution may have removed the event from this timeline or dropped its associations
+            reindex_events(conn, [event_id_for_report])
+
         try:
             from sqlalchemy import text as _sql_text
             rm_rows_resp = conn.execute(_sql_text(
@@ -1895,6 +1906,11 @@ def resolve_site_report(report_id):
         except Exception:
             removed_timeline_ids_resp = []
 
+    if banned_timeline_id is not None:
+        invalidate_timeline_ban_cache()
+    if moderation_update:
+        invalidate_user_moderation_cache(moderation_update.get('user_id'))
+
     return jsonify({
         'message': f'Report resolved with action {action}',
         'report_id': res['id'],
@@ -1971,6 +1987,7 @@ def unban_timeline_from_report(report_id):
             WHERE timeline_id = :tid
             """
         ), {'tid': target_timeline_id, 'actor': get_user_id()})
+        bump_timeline_versions(conn, [target_timeline_id])
 
         if normalized_name:
             conn.execute(text(
@@ -1991,6 +2008,8 @@ def unban_timeline_from_report(report_id):
             """
         ), {'rid': report_id})
 
+    invalidate_timeline_ban_cache()
+
     return jsonify({
         'success': True,
         'report_id': report_id,
@@ -2041,6 +2060,7 @@ def lift_timeline_warning_from_report(report_id):
             WHERE timeline_id = :tid
             """
         ), {'tid': target_timeline_id, 'actor': get_user_id()})
+        bump_timeline_versions(conn, [target_timeline_id])
 
     return jsonify({
         'success': True,
@@ -2188,6 +2208,7 @@ def update_timeline_status_message(timeline_id):
             'is_active': is_active,
             'updated_by': get_user_id(),
         })
+        bump_timeline_versions(conn, [timeline_id])
 
     return jsonify({
         'success': True,
@@ -2644,6 +2665,11 @@ def resolve_report(timeline_id, report_id):
         if not res:
             return jsonify({'error': 'Report not found'}), 404
 
+        # Any resolution may change what these timelines serve; bump before the event can be deleted
+        bump_timeline_versions(conn, [timeline_id])
+        if event_id_for_report is not None:
+            bump_event_timelines(conn, [event_id_for_report])
+
         if action == 'safeguard':
             parsed_until, parse_err = _parse_safeguard_until(data, allow_custom=False)
             if parse_err:
@@ -2831,6 +2857,9 @@ def resolve_report(timeline_id, report_id):
                 except Exception:
                     return False
 
+            # Tombstones need the memberships, so record them before anything is unlinked
+            record_event_deletions(conn, [event_id_for_report])
+
             # Delete associations to timelines
             deleted_assoc_total = 0
             if _reg_exists('event_timeline_association'):
@@ -2885,6 +2914,10 @@ def resolve_report(timeline_id, report_id):
             full_delete_required = False
             full_delete_reason = None
 
+        if event_id_for_report is not None:
+            # The resolution may have removed the event from this timeline or dropped its associations
+            reindex_events(conn, [event_id_for_report])
+
         # Fetch removed_timeline_ids for response context (must stay inside the connection scope)
         try:
             from sqlalchemy import text as _sql_text
@@ -5,6 +5,7 @@ import json
 import logging
 
 from utils.db_helper import get_db_engine
+from utils.schema_readiness import schema_ensure
 
 site_settings_bp = Blueprint('site_settings', __name__)
 logger = logging.getLogger(__name__)
@@ -50,6 +51,12 @@ def _default_home_hero_slides():
     ]
 
 
+def _boot_site_settings_table():
+    with get_db_engine().begin() as conn:
+        _ensure_site_settings_table(conn)
+
+
+@schema_ensure('site_settings_table', boot=_boot_site_settings_table)
 def _ensure_site_settings_table(conn):
     conn.execute(text(
         """
@@ -385,9 +392,13 @@ def get_landing_rotator_settings():
     with engine.begin() as conn:
         landing_rotator = _load_landing_rotator(conn)
 
-    return jsonify({
+    # Site-wide settings have no timeline version; a content-hash ETag is just as cheap here
+    response = jsonify({
         'landing_rotator': landing_rotator
-    }), 200
+    })
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 
 @site_settings_bp.route('/site-settings/landing-rotator', methods=['PUT'])
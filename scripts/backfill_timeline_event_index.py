@@ -0,0 +1,41 @@
+"""
+Build timeline_event_index from the existing membership tables.
+
+Processes events in id order, committing one batch at a time, then records
+the backfill so the timeline feeds start reading from the index. Live writes
+keep the index current while this runs, and re-running it is safe.
+
+Usage:
+    python scripts/backfill_timeline_event_index.py [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from utils.timeline_event_index import DEFAULT_BATCH_SIZE, backfill
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            processed = backfill(
+                db.session,
+                batch_size=args.batch_size,
+                progress=lambda n: print(f"Indexed {n} events"),
+            )
+        except Exception as exc:
+            db.session.rollback()
+            print(f"Backfill failed: {exc}")
+            raise
+        print(f"Backfill completed: {processed} events indexed")
+
+
+if __name__ == '__main__':
+    main()
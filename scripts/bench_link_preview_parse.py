@@ -0,0 +1,172 @@
+"""
+Benchmark link preview HTML parsing: legacy full BeautifulSoup parse vs the
+streaming head-only extractor used by utils.link_preview.
+
+Runs both over the saved pages in scripts/fixtures/link_preview (plus a
+padded "large page" variant of each), checks they produce the same
+title/description/image, and prints per-fixture timings. A page whose only
+image sits past the byte cap is reported as "capped" rather than a mismatch.
+
+Usage:
+    python scripts/bench_link_preview_parse.py [--repeat 50] [--pad-kb 1024]
+
+No network or database access; HTTP is stubbed.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.html_metadata import DEFAULT_MAX_BYTES
+from utils.link_preview import fetch_link_preview
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'link_preview')
+FIXTURE_URL = 'https://fixture.example.com/page'
+
+
+class _StubResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        self.encoding = 'utf-8'
+        self.bytes_served = 0
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), chunk_size):
+            chunk = self.body[i:i + chunk_size]
+            self.bytes_served += len(chunk)
+            yield chunk
+
+    def close(self):
+        pass
+
+
+def _no_logo(url, timeout=None):
+    return _StubResponse(b'', status_code=404)
+
+
+def legacy_extract(html_text, url=FIXTURE_URL):
+    """The pre-streaming BeautifulSoup extraction (without logo HEAD probes)."""
+    from bs4 import BeautifulSoup
+
+    parsed_url = urlparse(url)
+    soup = BeautifulSoup(html_text, 'html.parser')
+
+    title = ''
+    og_title = soup.find('meta', property='og:title')
+    if og_title and og_title.get('content'):
+        title = og_title.get('content')
+    elif soup.title:
+        title = soup.title.string
+
+    description = ''
+    og_description = soup.find('meta', property='og:description')
+    if og_description and og_description.get('content'):
+        description = og_description.get('content')
+    else:
+        description_meta = soup.find('meta', attrs={'name': 'description'})
+        if description_meta and description_meta.get('content'):
+            description = description_meta.get('content')
+
+    image = ''
+    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    og_image = soup.find('meta', property='og:image')
+    twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
+    favicon = soup.find('link', rel='icon') or soup.find('link', rel='shortcut icon')
+    if og_image and og_image.get('content'):
+        image = og_image.get('content')
+    elif twitter_image and twitter_image.get('content'):
+        image = twitter_image.get('content')
+    elif favicon and favicon.get('href'):
+        href = favicon.get('href')
+        if not href.startswith(('http://', 'https://')):
+            href = f"{base_url}{href}" if href.startswith('/') else f"{base_url}/{href}"
+        image = href
+    else:
+        for img in soup.find_all('img'):
+            src = img.get('src', '')
+            if not src or src.startswith('data:'):
+                continue
+            width = img.get('width', '0')
+            height = img.get('height', '0')
+            width = int(width) if width and width.isdigit() else 0
+            height = int(height) if height and height.isdigit() else 0
+            if width > 100 and height > 100:
+                if not src.startswith(('http://', 'https://')):
+                    src = f"{base_url}{src}" if src.startswith('/') else f"{base_url}/{src}"
+                image = src
+                break
+
+    return {'title': title, 'description': description, 'image': image}
+
+
+def streaming_extract(body):
+    response = _StubResponse(body)
+    preview = fetch_link_preview(FIXTURE_URL, http_get=lambda *a, **k: response, http_head=_no_logo)
+    return {k: preview[k] for k in ('title', 'description', 'image')}, response.bytes_served
+
+
+def _pad(body, pad_kb):
+    # Simulate a heavy page: lots of markup right after <body>, before the existing body content
+    filler = ('<div class="card"><p>' + 'lorem ipsum dolor sit amet ' * 20 + '</p></div>\n').encode('utf-8')
+    padding = filler * max(1, (pad_kb * 1024) // len(filler))
+    marker = body.find(b'<body')
+    if marker == -1:
+        return body + padding
+    insert_at = body.find(b'>', marker) + 1
+    return body[:insert_at] + padding + body[insert_at:]
+
+
+def _time(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) * 1000.0 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--pad-kb', type=int, default=1024)
+    args = parser.parse_args()
+
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html'))):
+        with open(path, 'rb') as f:
+            body = f.read()
+        name = os.path.splitext(os.path.basename(path))[0]
+        fixtures.append((name, body))
+        fixtures.append((f"{name}+{args.pad_kb}kb", _pad(body, args.pad_kb)))
+
+    print(f"{'fixture':40} {'size':>9} {'legacy ms':>10} {'stream ms':>10} {'read':>9} {'match':>6}")
+    mismatches = 0
+    for name, body in fixtures:
+        legacy_ms, legacy = _time(lambda: legacy_extract(body.decode('utf-8')), args.repeat)
+        stream_ms, (streamed, bytes_read) = _time(lambda: streaming_extract(body), args.repeat)
+        if legacy == streamed:
+            match = 'yes'
+        elif bytes_read >= DEFAULT_MAX_BYTES:
+            # Expected: a body image beyond the byte cap is not looked for
+            match = 'capped'
+        else:
+            match = 'NO'
+            mismatches += 1
+        print(f"{name:40} {len(body):>9} {legacy_ms:>10.2f} {stream_ms:>10.2f} {bytes_read:>9} {match:>6}")
+        if match == 'NO':
+            print(f"    legacy:    {legacy}\n    streaming: {streamed}")
+
+    if mismatches:
+        print(f"{mismatches} fixture(s) produced different previews")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare timeline_event_index with the live timeline/event membership.
+
+Recomputes membership (direct, refs, associations, hashtag timelines, minus
+resolved 'remove' reports) batch by batch and reports index rows that are
+missing, extra, or carry a stale source/event_date. Read-only unless
+--repair is given, which reindexes the affected events.
+
+Exits with status 1 when differences were found (and not repaired).
+
+Usage:
+    python scripts/check_timeline_event_index.py [--repair] [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from utils.timeline_event_index import DEFAULT_BATCH_SIZE, check_consistency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repair', action='store_true', help='reindex events whose rows differ')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            report = check_consistency(db.session, batch_size=args.batch_size, repair=args.repair)
+        except Exception as exc:
+            db.session.rollback()
+            print(f"Check failed: {exc}")
+            raise
+
+    print(f"Events checked: {report['events_checked']}")
+    print(f"Missing rows:   {report['missing']}")
+    print(f"Extra rows:     {report['extra']}")
+    print(f"Stale rows:     {report['mismatched']}")
+    for timeline_id, event_id, problem in report['samples']:
+        print(f"  {problem}: timeline {timeline_id}, event {event_id}")
+    if args.repair:
+        print(f"Repaired events: {report['repaired_events']}")
+
+    differences = report['missing'] + report['extra'] + report['mismatched']
+    if differences and not args.repair:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
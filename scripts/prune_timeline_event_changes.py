@@ -0,0 +1,36 @@
+"""
+Delete timeline_event_change rows older than the delta sync retention window.
+
+Sync tokens older than the window already get a full resync, so their rows
+are no longer read. Safe to run from cron at any frequency.
+
+Usage:
+    python scripts/prune_timeline_event_changes.py [--days 30]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from utils.timeline_changes import DEFAULT_RETENTION_DAYS, prune_changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=DEFAULT_RETENTION_DAYS, help='retention window in days')
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            removed = prune_changes(db.session, retention_days=args.days)
+        except Exception as exc:
+            db.session.rollback()
+            print(f"Prune failed: {exc}")
+            raise
+        print(f"Removed {removed} timeline_event_change rows older than {args.days} days")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Delete token_blocklist rows whose tokens have expired.
+
+A token revoked at created_at expires no later than created_at plus the
+longest of JWT_ACCESS_TOKEN_EXPIRES / JWT_REFRESH_TOKEN_EXPIRES, after which
+flask-jwt-extended rejects it before the blocklist is consulted. Safe to run
+from cron at any frequency.
+
+Usage:
+    python scripts/purge_token_blocklist.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db, _jwt_revocation_retention
+from utils.revocation_cache import purge_expired_revocations
+
+
+def main():
+    with app.app_context():
+        retention = _jwt_revocation_retention()
+        try:
+            removed = purge_expired_revocations(db.session, retention)
+        except Exception as exc:
+            db.session.rollback()
+            print(f"Purge failed: {exc}")
+            raise
+        print(f"Removed {removed} token_blocklist rows older than {retention}")
+
+
+if __name__ == '__main__':
+    main()
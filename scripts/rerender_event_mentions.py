@@ -0,0 +1,41 @@
+"""
+Re-render every event's content with mentions resolved to user / timeline ids.
+
+Fills event_mention for events written before it existed, so later renames
+re-render them too. Processes events in id order, committing one batch at a
+time; re-running it is safe.
+
+Usage:
+    python scripts/rerender_event_mentions.py [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, db
+from utils.event_mentions import DEFAULT_BATCH_SIZE, rerender_all
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with app.app_context():
+        try:
+            rewritten = rerender_all(
+                db.session,
+                batch_size=args.batch_size,
+                progress=lambda n: print(f"Processed {n} events"),
+            )
+        except Exception as exc:
+            db.session.rollback()
+            print(f"Re-render failed: {exc}")
+            raise
+        print(f"Re-render completed: {rewritten} events rewritten")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Process-local cache of the active timeline ban set.
+
+Almost every read path asks whether a timeline (or a tag name) is banned.
+Ban state changes rarely, so each worker keeps the active set in memory for a
+short TTL and drops it explicitly when the reports routes change ban state.
+Workers other than the one handling the ban/unban pick the change up when
+their TTL expires.
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BAN_CACHE_TTL_SECONDS = 30.0
+
+
+class TimelineBanRegistry:
+    """TTL cache around a loader returning (banned_ids, banned_names)."""
+
+    def __init__(self, ttl_seconds=DEFAULT_BAN_CACHE_TTL_SECONDS):
+        self.ttl_seconds = float(ttl_seconds)
+        self._loader = None
+        self._lock = threading.Lock()
+        self._ids = frozenset()
+        self._names = frozenset()
+        self._expires_at = 0.0
+        # Bumped by invalidate(); a load that straddles an invalidation is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def set_loader(self, loader):
+        """Register the callable used to read ban state from the database."""
+        self._loader = loader
+        self.invalidate()
+
+    def get(self):
+        """Return (banned_ids, banned_names) as frozensets."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._expires_at:
+                self.hits += 1
+                return self._ids, self._names
+            self.misses += 1
+            generation = self._generation
+
+        if self._loader is None:
+            return frozenset(), frozenset()
+
+        try:
+            ids, names = self._loader()
+        except Exception as e:
+            # Do not cache failures; the next request retries the lookup
+            logger.info(f"timeline ban registry load failed: {e}")
+            return frozenset(), frozenset()
+
+        ids, names = frozenset(ids), frozenset(names)
+        with self._lock:
+            if self._generation == generation:
+                self._ids = ids
+                self._names = names
+                self._expires_at = time.monotonic() + self.ttl_seconds
+        return ids, names
+
+    def is_banned(self, timeline_id):
+        try:
+            return int(timeline_id) in self.get()[0]
+        except (TypeError, ValueError):
+            return False
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0.0
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'ttl_seconds': self.ttl_seconds,
+                'banned_count': len(self._ids),
+            }
+
+
+timeline_ban_registry = TimelineBanRegistry(
+    ttl_seconds=float(os.getenv('TIMELINE_BAN_CACHE_TTL', DEFAULT_BAN_CACHE_TTL_SECONDS))
+)
+
+
+def invalidate_timeline_ban_cache():
+    """Drop this worker's cached ban set (call after committing a ban change)."""
+    timeline_ban_registry.invalidate()
@@ -0,0 +1,358 @@
+"""
+Batched event hydration for timeline-v3 event responses.
+
+The event endpoints used to run several lookups per event (tags, associated
+timelines, block list, report removals, creator profile). The helpers here
+take a list of event ids and resolve all of that with a fixed number of
+set-based queries, regardless of how many events are being returned.
+"""
+import logging
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Sections that hydrate_events() knows how to fill.
+ALL_SECTIONS = frozenset({'tags', 'associations', 'block_list', 'removed', 'creators'})
+
+# Payload keys of serialize_event(), in response order.
+EVENT_FIELDS = (
+    'id', 'title', 'description', 'content', 'event_date', 'type',
+    'url', 'url_title', 'url_description', 'url_image', 'media_url', 'media_type',
+    'timeline_id', 'created_by', 'created_by_username', 'created_by_avatar', 'created_at',
+    'edit_locked', 'tags', 'associated_timelines', 'removed_from_this_timeline', 'removed_timeline_ids',
+)
+
+# Shorthands accepted by fields= / include=.
+FIELD_GROUPS = {
+    'marker': ('id', 'title', 'event_date', 'type', 'media_url', 'media_type', 'timeline_id'),
+    'media': ('media_url', 'media_type'),
+    'url_preview': ('url', 'url_title', 'url_description', 'url_image'),
+    'creator': ('created_by', 'created_by_username', 'created_by_avatar'),
+}
+
+# Payload keys that need a hydration section.
+_FIELD_SECTIONS = {
+    'tags': 'tags',
+    'associated_timelines': 'associations',
+    'removed_timeline_ids': 'block_list',
+    'created_by_username': 'creators',
+    'created_by_avatar': 'creators',
+}
+
+# Event columns each payload key reads; id, timeline_id, created_by and
+# event_date are always loaded because sorting and hydration need them.
+_FIELD_COLUMNS = {
+    'title': ('title',),
+    'description': ('description',),
+    'content': ('content',),
+    'type': ('type',),
+    'url': ('url',),
+    'url_title': ('url_title',),
+    'url_description': ('url_description',),
+    'url_image': ('url_image',),
+    'media_url': ('media_url',),
+    'media_type': ('media_type',),
+    'created_at': ('created_at',),
+    'edit_locked': ('edit_locked',),
+}
+_BASE_COLUMNS = ('id', 'timeline_id', 'created_by', 'event_date')
+
+
+class EventFieldError(ValueError):
+    """Raised when fields= / include= name an unknown field."""
+
+
+def _expand_field_names(raw, param):
+    names = []
+    for part in str(raw or '').split(','):
+        name = part.strip()
+        if not name:
+            continue
+        if name in FIELD_GROUPS:
+            names.extend(FIELD_GROUPS[name])
+        elif name == 'removed_from_timeline':
+            names.append('removed_from_this_timeline')
+        elif name in EVENT_FIELDS:
+            names.append(name)
+        else:
+            raise EventFieldError(f"Unknown field '{name}' in '{param}'")
+    return names
+
+
+def parse_event_fields(fields=None, include=None):
+    """Resolve the fields= / include= query values of an event list request.
+
+    fields lists the payload keys (or FIELD_GROUPS shorthands) to return;
+    include adds keys on top of fields, or on top of the 'marker' group when
+    fields is absent. Returns None when neither is given (full payload),
+    otherwise a frozenset of payload keys that always contains 'id'.
+    """
+    if not fields and not include:
+        return None
+    selected = set(_expand_field_names(fields, 'fields') if fields else FIELD_GROUPS['marker'])
+    selected.update(_expand_field_names(include, 'include'))
+    selected.add('id')
+    return frozenset(selected)
+
+
+def sections_for_fields(fields):
+    """Hydration sections needed to serialize the given payload keys (None = all)."""
+    if fields is None:
+        return ALL_SECTIONS
+    return frozenset(_FIELD_SECTIONS[f] for f in fields if f in _FIELD_SECTIONS)
+
+
+def columns_for_fields(fields):
+    """Event column names to load for the given payload keys, or None for every column."""
+    if fields is None:
+        return None
+    columns = list(_BASE_COLUMNS)
+    for field in fields:
+        for column in _FIELD_COLUMNS.get(field, ()):
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def _normalize_timeline_policy_name(name):
+    raw = str(name or '').strip().lower().replace('#', '')
+    return ' '.join(raw.replace('-', ' ').split())
+
+
+def _empty_hydration():
+    return {
+        'tags': [],
+        'associated_timelines': [],
+        'removed_timeline_ids': [],
+        'removed_from_timeline': False,
+        'creator': None,
+    }
+
+
+def hydrate_events(session, events, banned_timeline_ids=None, banned_timeline_names=None,
+                   removed_for_timeline_id=None, sections=None):
+    """Resolve per-event response data for many events at once.
+
+    Args:
+        session: SQLAlchemy session used to run the queries.
+        events: iterable of Event rows (only ``id``, ``timeline_id`` and
+            ``created_by`` are read, so no relationship is lazy loaded).
+        banned_timeline_ids: timeline ids hidden from associated_timelines.
+        banned_timeline_names: normalized names of banned timelines; tags
+            with a matching name are dropped.
+        removed_for_timeline_id: when given, flag events removed from this
+            timeline through a resolved 'remove' report.
+        sections: subset of ALL_SECTIONS to hydrate (default: all).
+
+    Returns:
+        dict mapping event id -> {'tags', 'associated_timelines',
+        'removed_timeline_ids', 'removed_from_timeline', 'creator'}.
+    """
+    events = [ev for ev in events if ev is not None]
+    result = {int(ev.id): _empty_hydration() for ev in events}
+    if not result:
+        return result
+
+    sections = ALL_SECTIONS if sections is None else frozenset(sections)
+    banned_timeline_ids = set(banned_timeline_ids or ())
+    banned_timeline_names = set(banned_timeline_names or ())
+    event_ids = list(result.keys())
+
+    # Raw tag names per event (including banned ones) drive hashtag association lookups
+    tag_names_by_event = {}
+    if 'tags' in sections or 'associations' in sections:
+        try:
+            rows = session.execute(text(
+                """
+                SELECT et.event_id, t.id, t.name
+                FROM event_tags et
+                JOIN tag t ON t.id = et.tag_id
+                WHERE et.event_id = ANY(:ids)
+                ORDER BY et.event_id, t.id
+                """
+            ), {'ids': event_ids}).all()
+            for event_id, tag_id, tag_name in rows:
+                event_id = int(event_id)
+                if event_id not in result:
+                    continue
+                tag_names_by_event.setdefault(event_id, []).append(tag_name)
+                if 'tags' not in sections:
+                    continue
+                normalized = _normalize_timeline_policy_name(tag_name)
+                if normalized and normalized in banned_timeline_names:
+                    continue
+                result[event_id]['tags'].append({'id': tag_id, 'name': tag_name})
+        except Exception as e:
+            logger.info(f"event hydration: tag lookup skipped ({e})")
+
+    if 'associations' in sections:
+        try:
+            assoc_ids_by_event = {}
+            for ev in events:
+                if ev.timeline_id is not None:
+                    assoc_ids_by_event.setdefault(int(ev.id), set()).add(int(ev.timeline_id))
+
+            # Explicit associations (new) and references (old) in one round trip
+            rows = session.execute(text(
+                """
+                SELECT event_id, timeline_id FROM event_timeline_association WHERE event_id = ANY(:ids)
+                UNION
+                SELECT event_id, timeline_id FROM event_timeline_refs WHERE event_id = ANY(:ids)
+                """
+            ), {'ids': event_ids}).all()
+            for event_id, timeline_id in rows:
+                if event_id is None or timeline_id is None:
+                    continue
+                assoc_ids_by_event.setdefault(int(event_id), set()).add(int(timeline_id))
+
+            # Hashtag timelines whose name matches any of the events' tags
+            all_tag_names = sorted({str(n).lower() for names in tag_names_by_event.values() for n in names if n})
+            if all_tag_names:
+                hashtag_rows = session.execute(text(
+                    """
+                    SELECT id, LOWER(name) AS lname FROM timeline
+                    WHERE timeline_type = 'hashtag' AND LOWER(name) = ANY(:names)
+                    """
+                ), {'names': all_tag_names}).all()
+                hashtag_ids_by_name = {}
+                for tl_id, lname in hashtag_rows:
+                    hashtag_ids_by_name.setdefault(lname, set()).add(int(tl_id))
+                for event_id, names in tag_names_by_event.items():
+                    for name in names:
+                        for tl_id in hashtag_ids_by_name.get(str(name or '').lower(), ()):
+                            assoc_ids_by_event.setdefault(event_id, set()).add(tl_id)
+
+            all_timeline_ids = set()
+            for event_id, ids in assoc_ids_by_event.items():
+                if banned_timeline_ids:
+                    ids.difference_update(banned_timeline_ids)
+                all_timeline_ids.update(ids)
+
+            if all_timeline_ids:
+                tl_rows = session.execute(text(
+                    """
+                    SELECT t.id, t.name, t.timeline_type, t.created_by, u.username as owner_username, u.avatar_url as owner_avatar
+                    FROM timeline t
+                    LEFT JOIN "user" u ON t.created_by = u.id
+                    WHERE t.id = ANY(:ids)
+                    """
+                ), {'ids': sorted(all_timeline_ids)}).mappings().all()
+                timelines_by_id = {
+                    int(tl['id']): {
+                        'id': int(tl['id']),
+                        'name': tl['name'],
+                        'type': tl.get('timeline_type') or 'hashtag',
+                        'created_by': tl.get('created_by'),
+                        'owner_username': tl.get('owner_username'),
+                        'owner_avatar': tl.get('owner_avatar')
+                    }
+                    for tl in tl_rows
+                }
+                for event_id, ids in assoc_ids_by_event.items():
+                    if event_id not in result:
+                        continue
+                    result[event_id]['associated_timelines'] = [
+                        dict(timelines_by_id[tid]) for tid in sorted(ids) if tid in timelines_by_id
+                    ]
+        except Exception as e:
+            logger.info(f"event hydration: associated_timelines skipped ({e})")
+
+    if 'block_list' in sections:
+        try:
+            rows = session.execute(text(
+                """
+                SELECT event_id, timeline_id FROM timeline_block_list WHERE event_id = ANY(:ids)
+                """
+            ), {'ids': event_ids}).all()
+            for event_id, timeline_id in rows:
+                if int(event_id) in result:
+                    result[int(event_id)]['removed_timeline_ids'].append(int(timeline_id))
+        except Exception as e:
+            logger.info(f"event hydration: block list lookup skipped ({e})")
+
+    if 'removed' in sections and removed_for_timeline_id is not None:
+        for event_id in removed_event_ids_for_timeline(session, removed_for_timeline_id, event_ids):
+            result[event_id]['removed_from_timeline'] = True
+
+    if 'creators' in sections:
+        creator_ids = sorted({int(ev.created_by) for ev in events if ev.created_by is not None})
+        if creator_ids:
+            try:
+                rows = session.execute(text(
+                    """
+                    SELECT id, username, avatar_url FROM "user" WHERE id = ANY(:ids)
+                    """
+                ), {'ids': creator_ids}).mappings().all()
+                creators = {int(r['id']): {'username': r['username'], 'avatar_url': r['avatar_url']} for r in rows}
+                for ev in events:
+                    if ev.created_by is not None:
+                        result[int(ev.id)]['creator'] = creators.get(int(ev.created_by))
+            except Exception as e:
+                logger.info(f"event hydration: creator lookup skipped ({e})")
+
+    return result
+
+
+def removed_event_ids_for_timeline(session, timeline_id, event_ids):
+    """Return the subset of event_ids removed from timeline_id via resolved reports."""
+    event_ids = [int(eid) for eid in event_ids]
+    if not event_ids:
+        return set()
+    try:
+        rows = session.execute(text(
+            """
+            SELECT DISTINCT event_id
+            FROM reports
+            WHERE timeline_id = :tid
+              AND event_id = ANY(:ids)
+              AND status = 'resolved'
+              AND resolution = 'remove'
+            """
+        ), {'tid': int(timeline_id), 'ids': event_ids}).all()
+        return {int(r[0]) for r in rows if r[0] is not None}
+    except Exception as e:
+        logger.info(f"event hydration: removed-events lookup skipped ({e})")
+        return set()
+
+
+def _created_at(event, *_):
+    return event.created_at.isoformat() if hasattr(event.created_at, 'isoformat') else str(event.created_at)
+
+
+# payload key -> builder(event, hydrated, creator, removed_from_this_timeline)
+_FIELD_BUILDERS = {
+    'id': lambda ev, h, c, r: ev.id,
+    'title': lambda ev, h, c, r: ev.title,
+    'description': lambda ev, h, c, r: ev.description,
+    'content': lambda ev, h, c, r: ev.content,
+    'event_date': lambda ev, h, c, r: ev.event_date.isoformat() if ev.event_date else None,
+    'type': lambda ev, h, c, r: ev.type,
+    'url': lambda ev, h, c, r: ev.url,
+    'url_title': lambda ev, h, c, r: ev.url_title,
+    'url_description': lambda ev, h, c, r: ev.url_description,
+    'url_image': lambda ev, h, c, r: ev.url_image,
+    'media_url': lambda ev, h, c, r: ev.media_url,
+    'media_type': lambda ev, h, c, r: ev.media_type,
+    'timeline_id': lambda ev, h, c, r: ev.timeline_id,
+    'created_by': lambda ev, h, c, r: ev.created_by,
+    'created_by_username': lambda ev, h, c, r: c['username'] if c else "Unknown",
+    'created_by_avatar': lambda ev, h, c, r: c['avatar_url'] if c else None,
+    'created_at': _created_at,
+    'edit_locked': lambda ev, h, c, r: bool(getattr(ev, 'edit_locked', False)),
+    'tags': lambda ev, h, c, r: h.get('tags', []),
+    'associated_timelines': lambda ev, h, c, r: h.get('associated_timelines', []),
+    'removed_from_this_timeline': lambda ev, h, c, r: bool(r),
+    'removed_timeline_ids': lambda ev, h, c, r: h.get('removed_timeline_ids', []),
+}
+
+
+def serialize_event(event, hydrated, removed_from_this_timeline=False, fields=None):
+    """Build the timeline-v3 event payload from an Event row and its hydration.
+
+    fields: optional set of payload keys from parse_event_fields(); other
+        keys are neither computed nor returned.
+    """
+    hydrated = hydrated or _empty_hydration()
+    creator = hydrated.get('creator')
+    keys = EVENT_FIELDS if fields is None else [k for k in EVENT_FIELDS if k in fields]
+    return {key: _FIELD_BUILDERS[key](event, hydrated, creator, removed_from_this_timeline) for key in keys}
@@ -0,0 +1,362 @@
+"""
+Rich content rendering for descriptions, with mentions resolved to ids.
+
+Descriptions are split into text, link and mention items (@username,
+#hashtag, i-community); see render_content(). Every mention in a description
+is resolved with one batched query and stored on its item as user_id or
+timeline_id (None when nothing by that name exists), so clients no longer
+look each one up separately:
+
+  - user: username, case-insensitive
+  - hashtag: the hashtag timeline with that normalized key (timeline.hashtag_key)
+  - community: a community timeline whose name matches with spaces read as
+    underscores, case-insensitive (mentions cannot contain spaces)
+
+event_mention keeps one row per (event, kind, key) with the id it resolved
+to. When a user or timeline is created, renamed or deleted, rerender_mentions()
+finds the events naming it through that table and re-renders just those, in
+batches with one resolution query per batch. Up to MENTION_RERENDER_SYNC_LIMIT
+events are re-rendered in the caller's transaction; more than that are queued
+on the session (pending_rerenders()) and handed to a background job after the
+commit, which re-renders and commits one batch at a time.
+scripts/rerender_event_mentions.py re-renders every event (and fills
+event_mention for older events).
+"""
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import text
+from utils.tag_resolver import normalize_tag_name
+from utils.timeline_version import bump_event_timelines
+
+logger = logging.getLogger(__name__)
+
+CONTENT_PATTERN = re.compile(
+    r'(@[a-zA-Z0-9_]+)|(\#[a-zA-Z0-9_]+)|(i-[a-zA-Z0-9_]+)|(www\.[^\s]+)|(https?://[^\s]+)'
+)
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_SYNC_LIMIT = 500
+SYNC_LIMIT = int(os.getenv('MENTION_RERENDER_SYNC_LIMIT', DEFAULT_SYNC_LIMIT))
+PENDING_KEY = 'pending_mention_rerenders'
+
+# content item type -> (mention kind, field holding the resolved id)
+MENTION_ITEMS = {
+    'user_mention': ('user', 'user_id'),
+    'hashtag_mention': ('hashtag', 'timeline_id'),
+    'community_mention': ('community', 'timeline_id'),
+}
+
+_state = {'table': False}
+
+
+def ensure_event_mention_table(conn):
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS event_mention (
+            event_id INTEGER NOT NULL REFERENCES event(id) ON DELETE CASCADE,
+            kind VARCHAR(16) NOT NULL,
+            mention_key VARCHAR(100) NOT NULL,
+            target_id INTEGER NULL,
+            PRIMARY KEY (event_id, kind, mention_key)
+        );
+        """
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_event_mention_key ON event_mention (kind, mention_key);"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_event_mention_target ON event_mention (kind, target_id) WHERE target_id IS NOT NULL;"
+    ))
+    _state['table'] = True
+
+
+def mention_key(kind, name):
+    """Lookup key for a mentioned name."""
+    if kind == 'hashtag':
+        return normalize_tag_name(name)
+    if kind == 'community':
+        return str(name or '').strip().lower().replace(' ', '_')
+    return str(name or '').strip().lower()
+
+
+def parse_description(description):
+    """Split a description into content items, without resolving mentions. None when there are none."""
+    if not description or not isinstance(description, str):
+        return None
+
+    items = []
+    last_end = 0
+    for match in CONTENT_PATTERN.finditer(description):
+        if match.start() > last_end:
+            text_before = description[last_end:match.start()]
+            if text_before.strip():
+                items.append({'type': 'text', 'value': text_before})
+
+        matched_text = match.group(0)
+        if matched_text.startswith('@'):
+            items.append({'type': 'user_mention', 'username': matched_text[1:], 'text': matched_text})
+        elif matched_text.startswith('#'):
+            items.append({'type': 'hashtag_mention', 'name': matched_text[1:], 'text': matched_text})
+        elif matched_text.startswith('i-'):
+            items.append({'type': 'community_mention', 'name': matched_text[2:], 'text': matched_text})
+        elif matched_text.startswith('http'):
+            items.append({'type': 'link', 'url': matched_text, 'text': matched_text})
+        elif matched_text.startswith('www.'):
+            items.append({'type': 'link', 'url': f"https://{matched_text}", 'text': matched_text})
+        last_end = match.end()
+
+    if last_end < len(description):
+        text_after = description[last_end:]
+        if text_after.strip():
+            items.append({'type': 'text', 'value': text_after})
+
+    return items or None
+
+
+def _item_mention(item):
+    kind, _ = MENTION_ITEMS[item['type']]
+    name = item.get('username') if kind == 'user' else item.get('name')
+    return kind, mention_key(kind, name)
+
+
+def item_mentions(items):
+    """Set of (kind, key) mentioned by content items."""
+    return {_item_mention(item) for item in items or [] if item.get('type') in MENTION_ITEMS}
+
+
+def resolve_mentions(conn, mentions):
+    """Map (kind, key) pairs to user / timeline ids with one query; unknown names are left out."""
+    keys = {'user': [], 'hashtag': [], 'community': []}
+    for kind, key in mentions or []:
+        if key and key not in keys[kind]:
+            keys[kind].append(key)
+    if not any(keys.values()):
+        return {}
+    rows = conn.execute(text(
+        """
+        SELECT 'user', LOWER(u.username), MIN(u.id)
+        FROM "user" u
+        WHERE LOWER(u.username) = ANY(:users)
+        GROUP BY LOWER(u.username)
+        UNION ALL
+        SELECT 'hashtag', t.hashtag_key, MIN(t.id)
+        FROM timeline t
+        WHERE t.timeline_type = 'hashtag' AND t.hashtag_key = ANY(:hashtags)
+        GROUP BY t.hashtag_key
+        UNION ALL
+        SELECT 'community', LOWER(REPLACE(t.name, ' ', '_')), MIN(t.id)
+        FROM timeline t
+        WHERE t.timeline_type = 'community' AND LOWER(REPLACE(t.name, ' ', '_')) = ANY(:communities)
+        GROUP BY LOWER(REPLACE(t.name, ' ', '_'))
+        """
+    ), {'users': keys['user'], 'hashtags': keys['hashtag'], 'communities': keys['community']}).all()
+    return {(r[0], r[1]): int(r[2]) for r in rows}
+
+
+def _apply_resolution(items, resolved):
+    for item in items:
+        if item.get('type') in MENTION_ITEMS:
+            _, field = MENTION_ITEMS[item['type']]
+            item[field] = resolved.get(_item_mention(item))
+
+
+def render_content(conn, description):
+    """Content JSON for a description with its mentions resolved, or None without mentions/links.
+
+    conn may be a Connection or a Session. If resolution fails the content
+    is still returned, with unresolved mentions.
+    """
+    items = parse_description(description)
+    if not items:
+        return None
+    resolved = {}
+    mentions = item_mentions(items)
+    if mentions:
+        try:
+            with conn.begin_nested():
+                resolved = resolve_mentions(conn, mentions)
+        except Exception as e:
+            logger.info(f"mention resolution failed: {e}")
+    _apply_resolution(items, resolved)
+    return json.dumps({'content': items})
+
+
+def _content_items(content):
+    try:
+        data = json.loads(content) if isinstance(content, str) else content
+        items = data.get('content') if isinstance(data, dict) else None
+        return items if isinstance(items, list) else []
+    except (TypeError, ValueError):
+        return []
+
+
+def record_event_mentions(conn, event_id, content):
+    """Rewrite event_mention rows for one event from its content. Does not commit."""
+    if event_id is None or not _state['table']:
+        return
+    _replace_mentions(conn, {int(event_id): _content_items(content)})
+
+
+def _replace_mentions(conn, items_by_event):
+    ids = sorted(items_by_event)
+    conn.execute(text("DELETE FROM event_mention WHERE event_id = ANY(:ids)"), {'ids': ids})
+    rows = []
+    for event_id in ids:
+        seen = set()
+        for item in items_by_event[event_id]:
+            if item.get('type') not in MENTION_ITEMS:
+                continue
+            kind, key = _item_mention(item)
+            if not key or (kind, key) in seen:
+                continue
+            seen.add((kind, key))
+            _, field = MENTION_ITEMS[item['type']]
+            rows.append({'event_id': event_id, 'kind': kind, 'key': key[:100], 'target_id': item.get(field)})
+    if rows:
+        conn.execute(text(
+            """
+            INSERT INTO event_mention (event_id, kind, mention_key, target_id)
+            VALUES (:event_id, :kind, :key, :target_id)
+            ON CONFLICT DO NOTHING
+            """
+        ), rows)
+
+
+def rerender_events(conn, event_ids):
+    """Re-render content for the given events with one resolution query. Does not commit.
+
+    Only events whose content changes are written; their timelines get a
+    version bump. Returns the number of events rewritten.
+    """
+    ids = sorted({int(i) for i in event_ids or [] if i is not None})
+    if not ids:
+        return 0
+    rows = conn.execute(text(
+        "SELECT id, description, content FROM event WHERE id = ANY(:ids)"
+    ), {'ids': ids}).all()
+    parsed = {int(r[0]): (parse_description(r[1]), r[2]) for r in rows}
+    mentions = set()
+    for items, _ in parsed.values():
+        mentions |= item_mentions(items)
+    resolved = resolve_mentions(conn, mentions)
+
+    changed = []
+    items_by_event = {}
+    for event_id, (items, old_content) in parsed.items():
+        if items:
+            _apply_resolution(items, resolved)
+        content = json.dumps({'content': items}) if items else None
+        items_by_event[event_id] = items or []
+        if content != old_content:
+            changed.append({'id': event_id, 'content': content})
+    if changed:
+        conn.execute(text("UPDATE event SET content = :content WHERE id = :id"), changed)
+        bump_event_timelines(conn, [c['id'] for c in changed])
+    if _state['table'] and items_by_event:
+        _replace_mentions(conn, items_by_event)
+    return len(changed)
+
+
+def rerender_mentions(conn, kind, keys=None, target_ids=None, batch_size=DEFAULT_BATCH_SIZE, pending=None):
+    """Re-render events that mention any of keys, or that resolved to any of target_ids.
+
+    Call after a user or timeline is created, renamed or deleted, passing its
+    old and new names. Does not commit. When pending (see pending_rerenders())
+    is given and more than SYNC_LIMIT events are affected, their ids are added
+    to it instead. Returns the number of events rewritten here.
+    """
+    if not _state['table']:
+        return 0
+    keys = sorted({mention_key(kind, k) for k in keys or [] if k})
+    target_ids = sorted({int(i) for i in target_ids or [] if i is not None})
+    if not keys and not target_ids:
+        return 0
+    event_ids = [int(r[0]) for r in conn.execute(text(
+        """
+        SELECT DISTINCT event_id FROM event_mention
+        WHERE kind = :kind AND (mention_key = ANY(:keys) OR target_id = ANY(:targets))
+        ORDER BY event_id
+        """
+    ), {'kind': kind, 'keys': keys, 'targets': target_ids}).all()]
+    if pending is not None and len(event_ids) > SYNC_LIMIT:
+        pending.update(event_ids)
+        return 0
+    rewritten = 0
+    for start in range(0, len(event_ids), batch_size):
+        rewritten += rerender_events(conn, event_ids[start:start + batch_size])
+    return rewritten
+
+
+def pending_rerenders(session):
+    """Set of event ids to re-render in the background once session commits."""
+    return session.info.setdefault(PENDING_KEY, set())
+
+
+def take_pending_rerenders(session):
+    """Remove and return the event ids queued on session."""
+    return session.info.pop(PENDING_KEY, None) or set()
+
+
+def rerender_event_batches(session, event_ids, batch_size=DEFAULT_BATCH_SIZE):
+    """Re-render the given events, committing per batch. Returns the count rewritten."""
+    ids = sorted({int(i) for i in event_ids or []})
+    rewritten = 0
+    for start in range(0, len(ids), batch_size):
+        rewritten += rerender_events(session, ids[start:start + batch_size])
+        session.commit()
+    return rewritten
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def submit_rerender(app, db, event_ids):
+    """Re-render events on this worker's background thread, one batch per commit."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mention-rerender')
+            _executor_pid = os.getpid()
+        executor = _executor
+
+    def _run():
+        with app.app_context():
+            try:
+                rewritten = rerender_event_batches(db.session, event_ids)
+                logger.info(f"mention re-render: {rewritten} of {len(event_ids)} events rewritten")
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"mention re-render failed: {e}")
+            finally:
+                db.session.remove()
+
+    return executor.submit(_run)
+
+
+def rerender_all(session, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Re-render every event with a description, committing per batch. Returns the count rewritten."""
+    last_id = 0
+    rewritten = 0
+    processed = 0
+    while True:
+        ids = [int(r[0]) for r in session.execute(text(
+            """
+            SELECT id FROM event
+            WHERE id > :last AND COALESCE(description, '') <> ''
+            ORDER BY id
+            LIMIT :limit
+            """
+        ), {'last': last_id, 'limit': int(batch_size)}).all()]
+        if not ids:
+            return rewritten
+        rewritten += rerender_events(session, ids)
+        session.commit()
+        processed += len(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(processed)
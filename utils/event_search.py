@@ -0,0 +1,294 @@
+"""
+Full-text search over event titles, link titles and descriptions.
+
+Finding an event used to mean downloading whole timelines and filtering on
+the client. search_events() ranks matches in the database and pages them
+with a (score, id) keyset cursor, either across every readable timeline or
+within one timeline's feed, optionally narrowed by event type, tags and an
+event_date window.
+
+Two backends, picked from the connection dialect:
+
+  - PostgreSQL: a generated event.search_vector column (title weighted A,
+    url_title B, description C) with a GIN index, queried with
+    websearch_to_tsquery (quoted phrases, 'or', -exclusions) and ranked by
+    ts_rank_cd. Adding the column rewrites the event table, so it and the
+    index are created by migrations/add_event_search_vector.py rather than
+    at startup; until then search is unavailable
+  - SQLite: an external-content FTS5 table kept in step with event by
+    triggers and ranked by bm25, so the search can be exercised without
+    Postgres; the query is reduced to its words, all of which must match
+
+Visibility follows the event list endpoints: report removals are left out
+of a timeline's results, and global results skip events whose home
+timeline is banned or is someone else's personal timeline.
+"""
+import base64
+import json
+import logging
+import re
+from sqlalchemy import bindparam, inspect, text
+from utils.tag_resolver import HASHTAG_KEY_SQL, normalize_tag_name
+from utils.timeline_feed import FeedArgumentError, MAX_FILTER_TAGS, feed_members_sql
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'english'
+MAX_QUERY_LENGTH = 200
+EVENT_TYPES = ('remark', 'news', 'media')
+# ts_rank_cd weights for D, C, B, A
+PG_RANK_WEIGHTS = '{0.1, 0.2, 0.4, 1.0}'
+# bm25 weights for the FTS5 columns (title, url_title, description)
+SQLITE_RANK_WEIGHTS = (10.0, 4.0, 1.0)
+
+_state = {'backend': None}
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_vector_sql():
+    """Expression behind the generated event.search_vector column."""
+    return (
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(title, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(url_title, '')), 'B') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(description, '')), 'C')"
+    )
+
+
+def ensure_event_search_index(conn):
+    """Detect the search vector (Postgres) or create the FTS5 table and its upkeep (SQLite)."""
+    dialect = conn.dialect.name
+    if dialect == 'postgresql':
+        has_vector = conn.execute(text(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'event' AND column_name = 'search_vector'
+            """
+        )).first()
+        if has_vector:
+            _state['backend'] = 'postgres'
+        else:
+            _state['backend'] = None
+            logger.info("event search: event.search_vector missing, run migrations/add_event_search_vector.py")
+    elif dialect == 'sqlite':
+        _ensure_sqlite_fts(conn)
+        _state['backend'] = 'sqlite'
+    else:
+        _state['backend'] = None
+        logger.info(f"event search: no full-text backend for dialect {dialect}")
+
+
+def _ensure_sqlite_fts(conn):
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_search'"
+    )).first()
+    conn.execute(text(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS event_search USING fts5(
+            title, url_title, description,
+            content='event', content_rowid='id', tokenize='porter unicode61'
+        )
+        """
+    ))
+    conn.execute(text(
+        """
+        CREATE TRIGGER IF NOT EXISTS event_search_ai AFTER INSERT ON event BEGIN
+            INSERT INTO event_search (rowid, title, url_title, description)
+            VALUES (new.id, new.title, new.url_title, new.description);
+        END
+        """
+    ))
+    conn.execute(text(
+        """
+        CREATE TRIGGER IF NOT EXISTS event_search_ad AFTER DELETE ON event BEGIN
+            INSERT INTO event_search (event_search, rowid, title, url_title, description)
+            VALUES ('delete', old.id, old.title, old.url_title, old.description);
+        END
+        """
+    ))
+    conn.execute(text(
+        """
+        CREATE TRIGGER IF NOT EXISTS event_search_au AFTER UPDATE OF title, url_title, description ON event BEGIN
+            INSERT INTO event_search (event_search, rowid, title, url_title, description)
+            VALUES ('delete', old.id, old.title, old.url_title, old.description);
+            INSERT INTO event_search (rowid, title, url_title, description)
+            VALUES (new.id, new.title, new.url_title, new.description);
+        END
+        """
+    ))
+    if not exists:
+        # Index the events that predate the table
+        conn.execute(text("INSERT INTO event_search (event_search) VALUES ('rebuild')"))
+
+
+def search_backend():
+    """'postgres', 'sqlite', or None when search is unavailable."""
+    return _state['backend']
+
+
+def parse_search_args(q, types=None, tags=None):
+    """Validate search query values into a filter dict (dates are parsed by the caller)."""
+    query = ' '.join(str(q or '').split())
+    if not query:
+        raise FeedArgumentError("'q' is required")
+    if len(query) > MAX_QUERY_LENGTH:
+        raise FeedArgumentError("'q' is too long")
+    picked_types = []
+    for part in str(types or '').split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part not in EVENT_TYPES:
+            raise FeedArgumentError(f"Invalid 'type' (use {', '.join(EVENT_TYPES)})")
+        if part not in picked_types:
+            picked_types.append(part)
+    tag_keys = []
+    for raw in str(tags or '').split(','):
+        key = normalize_tag_name(raw)
+        if key and key not in tag_keys:
+            tag_keys.append(key)
+    if len(tag_keys) > MAX_FILTER_TAGS:
+        raise FeedArgumentError(f'At most {MAX_FILTER_TAGS} tags can be combined')
+    return {'q': query, 'types': picked_types, 'tags': tag_keys}
+
+
+def _fts5_query(query):
+    # Quoted words cannot be read as FTS5 operators or column filters
+    words = _WORD_RE.findall(query)
+    return ' '.join('"' + word + '"' for word in words)
+
+
+def _encode_cursor(score, event_id):
+    payload = json.dumps([str(score), int(event_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, event_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return float(score), int(event_id)
+    except Exception:
+        raise FeedArgumentError('Invalid cursor')
+
+
+def search_events(session, filters, limit, cursor=None, timeline_id=None, date_from=None, date_to=None,
+                  viewer_id=None, banned_timeline_ids=None):
+    """Return one page of event ids matching a search, best match first.
+
+    Args:
+        session: SQLAlchemy session.
+        filters: result of parse_search_args().
+        limit: page size (already clamped by the caller).
+        cursor: opaque cursor from the previous page.
+        timeline_id: restrict to this timeline's feed (the caller checks access),
+            or None to search every readable timeline.
+        date_from / date_to: optional inclusive event_date window.
+        viewer_id: current user id; their own personal timelines are searchable.
+        banned_timeline_ids: timelines whose events are left out of global results.
+
+    Returns:
+        (event_ids, next_cursor) where next_cursor is None on the last page.
+    """
+    backend = _state['backend']
+    if backend is None:
+        raise RuntimeError('Event search is not available')
+
+    params = {'limit': int(limit) + 1}
+    expanding = []
+    where = []
+    if backend == 'postgres':
+        if not _WORD_RE.search(filters['q']):
+            return [], None
+        source = "event e, websearch_to_tsquery(:config, :q) AS query"
+        where.append('e.search_vector @@ query')
+        score_sql = f"ROUND(ts_rank_cd('{PG_RANK_WEIGHTS}', e.search_vector, query)::numeric, 6)"
+        tag_key_sql = HASHTAG_KEY_SQL.format(col='t.name')
+        params.update({'config': SEARCH_CONFIG, 'q': filters['q']})
+    else:
+        match = _fts5_query(filters['q'])
+        if not match:
+            return [], None
+        source = 'event_search s JOIN event e ON e.id = s.rowid'
+        where.append('event_search MATCH :q')
+        weights = ', '.join(str(w) for w in SQLITE_RANK_WEIGHTS)
+        score_sql = f'ROUND(-bm25(event_search, {weights}), 6)'
+        tag_key_sql = "trim(replace(replace(lower(t.name), '#', ''), '-', ' '))"
+        params['q'] = match
+
+    if filters['types']:
+        where.append('e.type IN :types')
+        params['types'] = filters['types']
+        expanding.append('types')
+    if date_from is not None:
+        where.append('e.event_date >= :date_from')
+        params['date_from'] = date_from
+    if date_to is not None:
+        where.append('e.event_date <= :date_to')
+        params['date_to'] = date_to
+    for n, key in enumerate(filters['tags']):
+        where.append(
+            f"EXISTS (SELECT 1 FROM event_tags et JOIN tag t ON t.id = et.tag_id "
+            f"WHERE et.event_id = e.id AND {tag_key_sql} = :tag_{n})"
+        )
+        params[f'tag_{n}'] = key
+
+    if timeline_id is not None:
+        # Same membership as the feed (reads timeline_event_index once backfilled), report removals included
+        params['tid'] = int(timeline_id)
+        where.append(f"e.id IN (SELECT fm.event_id FROM ({feed_members_sql(session, params)}) fm)")
+    else:
+        if viewer_id is None:
+            where.append("EXISTS (SELECT 1 FROM timeline ht WHERE ht.id = e.timeline_id AND ht.timeline_type <> 'personal')")
+        else:
+            where.append(
+                "EXISTS (SELECT 1 FROM timeline ht WHERE ht.id = e.timeline_id "
+                "AND (ht.timeline_type <> 'personal' OR ht.created_by = :viewer))"
+            )
+            params['viewer'] = int(viewer_id)
+        if banned_timeline_ids:
+            where.append('e.timeline_id NOT IN :banned')
+            params['banned'] = sorted(int(i) for i in banned_timeline_ids)
+            expanding.append('banned')
+        if inspect(session.connection()).has_table('reports'):
+            where.append(
+                """
+                NOT EXISTS (
+                    SELECT 1 FROM reports r
+                    WHERE r.timeline_id = e.timeline_id
+                      AND r.event_id = e.id
+                      AND r.status = 'resolved'
+                      AND r.resolution = 'remove'
+                )
+                """
+            )
+
+    outer = ''
+    position = _decode_cursor(cursor)
+    if position is not None:
+        outer = 'WHERE (m.score, m.id) < (:cursor_score, :cursor_id)'
+        params['cursor_score'], params['cursor_id'] = position
+
+    statement = text(
+        f"""
+        SELECT m.id, m.score
+        FROM (
+            SELECT e.id, {score_sql} AS score
+            FROM {source}
+            WHERE {' AND '.join(where)}
+        ) m
+        {outer}
+        ORDER BY m.score DESC, m.id DESC
+        LIMIT :limit
+        """
+    )
+    if expanding:
+        statement = statement.bindparams(*(bindparam(name, expanding=True) for name in expanding))
+    rows = session.execute(statement, params).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_cursor(rows[-1][1], rows[-1][0]) if has_more and rows else None
+    return [int(r[0]) for r in rows], next_cursor
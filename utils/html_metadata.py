@@ -0,0 +1,137 @@
+"""
+Single-pass, head-only HTML metadata extraction for link previews.
+
+Instead of building a full BeautifulSoup tree and scanning it once per field,
+HeadMetadataParser collects the title, OpenGraph / Twitter / description meta
+tags and icon links in one pass over the stream and stops at </head>. Only
+when the head yields no image candidate does it keep reading the body, looking
+for the first reasonably sized <img>, and even then it stops at max_bytes.
+"""
+import codecs
+from html.parser import HTMLParser
+
+DEFAULT_MAX_BYTES = 512 * 1024
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# meta keys we keep (property= or name=), first occurrence wins
+META_KEYS = {'og:title', 'og:description', 'og:image', 'twitter:image', 'description'}
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class HeadMetadataParser(HTMLParser):
+    """Collects preview fields; raises _StopParsing internally once it has enough."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.title = None
+        self.icon = None
+        self.body_image = None
+        self.head_closed = False
+        self._in_title = False
+        self._title_parts = []
+
+    @property
+    def has_head_image(self):
+        return bool(self.meta.get('og:image') or self.meta.get('twitter:image') or self.icon)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            attrs = dict(attrs)
+            key = (attrs.get('property') or attrs.get('name') or '').strip().lower()
+            content = attrs.get('content')
+            if key in META_KEYS and content and key not in self.meta:
+                self.meta[key] = content
+        elif tag == 'title' and self.title is None:
+            self._in_title = True
+        elif tag == 'link' and self.icon is None:
+            attrs = dict(attrs)
+            rel = (attrs.get('rel') or '').lower().split()
+            if 'icon' in rel and attrs.get('href'):
+                self.icon = attrs['href']
+        elif tag == 'body':
+            self._close_head()
+        elif tag == 'img' and self.head_closed and self.body_image is None:
+            attrs = dict(attrs)
+            src = attrs.get('src') or ''
+            if src and not src.startswith('data:'):
+                width = attrs.get('width') or '0'
+                height = attrs.get('height') or '0'
+                width = int(width) if width.isdigit() else 0
+                height = int(height) if height.isdigit() else 0
+                if width > 100 and height > 100:
+                    self.body_image = src
+                    raise _StopParsing()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self.title = ''.join(self._title_parts)
+        elif tag == 'head':
+            self._close_head()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+
+    def _close_head(self):
+        if self.head_closed:
+            return
+        self.head_closed = True
+        if self._in_title:
+            self._in_title = False
+            self.title = ''.join(self._title_parts)
+        if self.has_head_image:
+            raise _StopParsing()
+
+    def result(self):
+        return {
+            'title': self.title,
+            'meta': dict(self.meta),
+            'icon': self.icon,
+            'body_image': self.body_image,
+        }
+
+
+def extract_head_metadata(chunks, encoding='utf-8', max_bytes=DEFAULT_MAX_BYTES):
+    """Parse an iterable of byte (or str) chunks, reading no more than necessary.
+
+    Returns a dict with 'title', 'meta' ({key: content}), 'icon',
+    'body_image' and 'bytes_read'.
+    """
+    parser = HeadMetadataParser()
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    bytes_read = 0
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if isinstance(chunk, str):
+                text_chunk = chunk
+                chunk_len = len(chunk)
+            else:
+                chunk = chunk[:max(0, max_bytes - bytes_read)]
+                chunk_len = len(chunk)
+                text_chunk = decoder.decode(chunk)
+            bytes_read += chunk_len
+            parser.feed(text_chunk)
+            if bytes_read >= max_bytes:
+                break
+        parser.close()
+    except _StopParsing:
+        pass
+    result = parser.result()
+    result['bytes_read'] = bytes_read
+    return result
+
+
+def extract_metadata_from_html(html, max_bytes=DEFAULT_MAX_BYTES):
+    """Convenience wrapper for an already-downloaded document (str or bytes)."""
+    step = STREAM_CHUNK_SIZE
+    return extract_head_metadata((html[i:i + step] for i in range(0, len(html), step)), max_bytes=max_bytes)
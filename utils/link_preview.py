@@ -0,0 +1,185 @@
+"""
+Link preview extraction (title, description, image) for shared URLs.
+
+fetch_link_preview() raises when the page cannot be fetched so callers such
+as the preview cache can tell a real preview from a fallback;
+get_link_preview() keeps the original always-returns-a-dict contract.
+"""
+import logging
+import requests
+from urllib.parse import urlparse
+
+from utils.html_metadata import extract_head_metadata, DEFAULT_MAX_BYTES, STREAM_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+PREVIEW_FETCH_TIMEOUT_SECONDS = 10
+
+
+def _ensure_scheme(url):
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+def _response_encoding(response):
+    # requests falls back to ISO-8859-1 for text/* without a charset; most pages are UTF-8
+    content_type = (response.headers.get('Content-Type') or '').lower()
+    if 'charset=' in content_type and response.encoding:
+        return response.encoding
+    return 'utf-8'
+
+
+def _absolute_url(parsed_url, src):
+    """Resolve a relative href/src against the page's scheme and host."""
+    if not src:
+        return ''
+    if src.startswith(('http://', 'https://')):
+        return src
+    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    if src.startswith('/'):
+        return f"{base_url}{src}"
+    return f"{base_url}/{src}"
+
+
+def fetch_link_preview(url, http_get=None, http_head=None, timeout=PREVIEW_FETCH_TIMEOUT_SECONDS,
+                       max_bytes=DEFAULT_MAX_BYTES):
+    """Fetch a page and extract its preview fields.
+
+    Only the document head is parsed (plus as much of the body as needed to
+    find an image, capped at max_bytes). http_get / http_head default to
+    requests.get / requests.head and can be swapped out (e.g. to target a
+    local stub server in tests); http_get is called with stream=True.
+    Raises on network or HTTP errors.
+    """
+    http_get = http_get or requests.get
+    http_head = http_head or requests.head
+    url = _ensure_scheme(url)
+
+    # Parse the URL to get domain information
+    parsed_url = urlparse(url)
+    domain = parsed_url.netloc.lower()
+
+    # Stream the page and stop reading once the head (or the byte cap) has what we need
+    response = http_get(url, headers=PREVIEW_REQUEST_HEADERS, timeout=timeout, stream=True)
+    try:
+        response.raise_for_status()
+        metadata = extract_head_metadata(
+            response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+            encoding=_response_encoding(response),
+            max_bytes=max_bytes,
+        )
+    finally:
+        response.close()
+
+    meta = metadata['meta']
+
+    # Get title - first try Open Graph, then regular title
+    title = meta.get('og:title') or metadata['title'] or ''
+
+    # Try to get meta description - first Open Graph, then regular meta description
+    description = meta.get('og:description') or meta.get('description') or ''
+
+    # Try to get image - first Open Graph, then Twitter card, then favicon, then a significant body image
+    image = (
+        meta.get('og:image')
+        or meta.get('twitter:image')
+        or _absolute_url(parsed_url, metadata['icon'])
+        or _absolute_url(parsed_url, metadata['body_image'])
+        or ''
+    )
+
+    # If we still don't have an image, try to guess a logo URL
+    if not image:
+        # Try common logo paths
+        common_logo_paths = [
+            '/logo.png',
+            '/images/logo.png',
+            '/assets/logo.png',
+            '/img/logo.png',
+            '/static/logo.png',
+            '/favicon.ico'
+        ]
+
+        for path in common_logo_paths:
+            logo_url = f"{parsed_url.scheme}://{parsed_url.netloc}{path}"
+            try:
+                logo_response = http_head(logo_url, timeout=2)
+                if logo_response.status_code == 200:
+                    image = logo_url
+                    break
+            except Exception:
+                continue
+
+    return {
+        'title': title,
+        'description': description,
+        'image': image,
+        # Get source domain for display
+        'source': domain,
+        'url': url
+    }
+
+
+def fallback_link_preview(url):
+    """Basic preview derived from the URL alone, used when the page can't be fetched."""
+    try:
+        url = _ensure_scheme(url)
+        parsed_url = urlparse(url)
+        domain = parsed_url.netloc.lower()
+
+        domain_parts = domain.split('.')
+        site_name = domain_parts[-2] if len(domain_parts) >= 2 else domain
+
+        # Capitalize the site name
+        site_name = site_name.capitalize()
+
+        return {
+            'title': f"{site_name} Link",
+            'description': f"Link to content on {domain}",
+            'image': f"{parsed_url.scheme}://{domain}/favicon.ico",  # Try common favicon location
+            'source': domain,
+            'url': url
+        }
+    except Exception as e:
+        logger.error(f'Error building fallback link preview: {str(e)}')
+
+        # Last resort fallback
+        try:
+            # Try to extract domain from URL
+            if '://' in url:
+                domain = url.split('://')[1].split('/')[0]
+            else:
+                domain = url.split('/')[0]
+
+            site_name = domain.split('.')[-2] if len(domain.split('.')) >= 2 else domain
+            site_name = site_name.capitalize()
+
+            return {
+                'title': f"{site_name} Link",
+                'description': "Could not fetch preview for this URL",
+                'image': "",
+                'source': domain,
+                'url': url
+            }
+        except Exception:
+            # Absolute last resort
+            return {
+                'title': url,
+                'description': "Could not fetch preview for this URL",
+                'image': "",
+                'source': "",
+                'url': url
+            }
+
+
+def get_link_preview(url):
+    """Return preview data for url, falling back to a URL-derived preview on any error."""
+    try:
+        return fetch_link_preview(url)
+    except Exception as e:
+        logger.error(f'Error fetching URL content: {str(e)}')
+        return fallback_link_preview(url)
@@ -0,0 +1,141 @@
+"""
+Process-local cache of user_moderation_state rows.
+
+Login, token refresh, event creation and post creation all check the
+caller's moderation state. Each worker caches the raw row per user id
+(including "no row") for a short TTL and evaluates restricted_until /
+suspended_until against the clock locally, so an expiring restriction lifts
+on time without a reload. Writers call invalidate_user_moderation_cache()
+after committing; other workers pick the change up when their TTL expires.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODERATION_CACHE_TTL_SECONDS = 30.0
+DEFAULT_MODERATION_CACHE_MAX_ENTRIES = 10000
+
+_NO_ROW = object()
+
+
+def _as_aware(value):
+    if value is None or not hasattr(value, 'tzinfo'):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def evaluate_moderation_state(row, now=None):
+    """Turn a raw moderation row (or None) into the state dict used by callers."""
+    if not row:
+        return {
+            'require_username_change': False,
+            'is_restricted': False,
+            'restricted_until': None,
+            'is_suspended': False,
+            'suspended_permanent': False,
+            'suspended_until': None,
+        }
+    now = now or datetime.now(timezone.utc)
+    restricted_until = _as_aware(row.get('restricted_until'))
+    suspended_until = _as_aware(row.get('suspended_until'))
+    suspended_permanent = bool(row.get('suspended_permanent'))
+    return {
+        'require_username_change': bool(row.get('require_username_change')),
+        'is_restricted': bool(restricted_until and restricted_until > now),
+        'restricted_until': restricted_until.isoformat() if restricted_until else None,
+        'is_suspended': suspended_permanent or bool(suspended_until and suspended_until > now),
+        'suspended_permanent': suspended_permanent,
+        'suspended_until': suspended_until.isoformat() if suspended_until else None,
+    }
+
+
+class UserModerationCache:
+    """TTL + LRU cache of raw moderation rows keyed by user id."""
+
+    def __init__(self, ttl_seconds=DEFAULT_MODERATION_CACHE_TTL_SECONDS,
+                 max_entries=DEFAULT_MODERATION_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self._loader = None
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Bumped by invalidate() / clear(); a load that straddles either is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def set_loader(self, loader):
+        """Register callable(user_id) -> dict of raw columns, or None when the user has no row."""
+        self._loader = loader
+        self.clear()
+
+    def get(self, user_id, loader=None):
+        """Return the evaluated moderation state for user_id.
+
+        loader overrides the registered loader for this call (e.g. to reuse
+        the caller's open connection). Load errors propagate and are not cached.
+        """
+        if not user_id:
+            return evaluate_moderation_state(None)
+        uid = int(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(uid)
+                self.hits += 1
+                row = entry[1]
+                return evaluate_moderation_state(None if row is _NO_ROW else row)
+            self.misses += 1
+            generation = self._generation
+
+        load = loader or self._loader
+        row = load(uid) if load else None
+        with self._lock:
+            if self._generation == generation:
+                self._entries[uid] = (time.monotonic() + self.ttl_seconds, _NO_ROW if row is None else dict(row))
+                self._entries.move_to_end(uid)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return evaluate_moderation_state(row)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'ttl_seconds': self.ttl_seconds,
+                'entries': len(self._entries),
+            }
+
+
+user_moderation_cache = UserModerationCache(
+    ttl_seconds=float(os.getenv('USER_MODERATION_CACHE_TTL', DEFAULT_MODERATION_CACHE_TTL_SECONDS))
+)
+
+
+def invalidate_user_moderation_cache(user_id):
+    """Drop this worker's cached moderation state for user_id (call after committing a change)."""
+    if user_id:
+        user_moderation_cache.invalidate(user_id)
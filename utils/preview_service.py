@@ -0,0 +1,378 @@
+"""
+Link preview service: persistent cache plus a bounded background fetch pool.
+
+Fetching a preview means an outbound HTTP request and an HTML parse, which
+used to run inline in post creation and /api/url-preview and could hold a
+sync worker for up to the fetch timeout. Previews are now cached in the
+link_preview_cache table keyed by normalized URL (successes for
+LINK_PREVIEW_TTL seconds, failures for LINK_PREVIEW_NEGATIVE_TTL seconds),
+and cache misses are fetched on a small thread pool. Post creation schedules
+a job that fills url_title / url_description / url_image once the fetch
+completes.
+
+The fetcher is injectable (LinkPreviewService(fetcher=...) or
+configure(http_get=...)) so tests can point it at a local stub HTTP server.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy import text
+
+from utils.link_preview import fetch_link_preview, fallback_link_preview
+from utils.schema_readiness import schema_ensure
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREVIEW_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 3600
+DEFAULT_PREVIEW_WORKERS = 2
+DEFAULT_MAX_PENDING = 64
+DEFAULT_REQUEST_WAIT_SECONDS = 2.0
+
+_POST_URL_FIELD_LIMIT = 500
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def normalize_preview_url(url):
+    """Canonical cache key for a URL.
+
+    Adds a missing scheme, lowercases scheme and host, drops default ports,
+    fragments and utm_* tracking parameters.
+    """
+    raw = (url or '').strip()
+    if not raw:
+        return ''
+    if not raw.lower().startswith(('http://', 'https://')):
+        raw = 'https://' + raw
+    parts = urlsplit(raw)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    netloc = host
+    if port is not None and str(port) != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    query = urlencode([
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_')
+    ])
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+def _ensure_link_preview_cache_table(session):
+    session.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS link_preview_cache (
+            url_key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            title TEXT,
+            description TEXT,
+            image TEXT,
+            source TEXT,
+            status VARCHAR(16) NOT NULL DEFAULT 'ok',
+            error TEXT,
+            fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            expires_at TIMESTAMPTZ NOT NULL
+        )
+        """
+    ))
+    session.execute(text(
+        'CREATE INDEX IF NOT EXISTS idx_link_preview_cache_expires ON link_preview_cache (expires_at)'
+    ))
+    session.commit()
+
+
+class LinkPreviewService:
+    """Cached, asynchronous link preview lookups."""
+
+    def __init__(self, fetcher=None, max_workers=DEFAULT_PREVIEW_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 ttl_seconds=DEFAULT_PREVIEW_TTL_SECONDS, negative_ttl_seconds=DEFAULT_NEGATIVE_TTL_SECONDS):
+        self.fetcher = fetcher or fetch_link_preview
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.ttl_seconds = int(ttl_seconds)
+        self.negative_ttl_seconds = int(negative_ttl_seconds)
+        self._app = None
+        self._db = None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def init_app(self, app, db):
+        """Bind the Flask app (for background app contexts) and the SQLAlchemy handle."""
+        self._app = app
+        self._db = db
+
+    def configure(self, fetcher=None, http_get=None, http_head=None):
+        """Swap the fetcher, or just its HTTP functions (e.g. to hit a stub server)."""
+        if fetcher is not None:
+            self.fetcher = fetcher
+        elif http_get is not None or http_head is not None:
+            self.fetcher = lambda url: fetch_link_preview(url, http_get=http_get, http_head=http_head)
+
+    # -- cache ---------------------------------------------------------
+
+    @schema_ensure('link_preview_cache_table', boot=lambda: link_preview_service.ensure_table())
+    def _ensure_table(self):
+        _ensure_link_preview_cache_table(self._db.session)
+
+    def ensure_table(self):
+        try:
+            self._ensure_table()
+        except Exception as e:
+            self._db.session.rollback()
+            logger.info(f"link_preview_cache ensure skipped ({e})")
+            raise
+
+    def get_cached(self, url):
+        """Return the cached preview for url, or None on a miss / expired entry.
+
+        Negative entries return the URL-derived fallback so failing sites are
+        not refetched until their short TTL expires.
+        """
+        key = normalize_preview_url(url)
+        if not key:
+            return None
+        try:
+            self._ensure_table()
+            row = self._db.session.execute(text(
+                """
+                SELECT url, title, description, image, source, status
+                FROM link_preview_cache
+                WHERE url_key = :key AND expires_at > NOW()
+                """
+            ), {'key': key}).mappings().first()
+        except Exception as e:
+            self._db.session.rollback()
+            logger.info(f"link preview cache read skipped ({e})")
+            return None
+
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        if row['status'] != 'ok':
+            return fallback_link_preview(row['url'])
+        return {
+            'title': row['title'] or '',
+            'description': row['description'] or '',
+            'image': row['image'] or '',
+            'source': row['source'] or '',
+            'url': row['url'],
+        }
+
+    def _store(self, key, url, preview=None, error=None):
+        session = self._db.session
+        ttl = self.ttl_seconds if error is None else self.negative_ttl_seconds
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        preview = preview or {}
+        try:
+            self._ensure_table()
+            session.execute(text(
+                """
+                INSERT INTO link_preview_cache
+                    (url_key, url, title, description, image, source, status, error, fetched_at, expires_at)
+                VALUES
+                    (:key, :url, :title, :description, :image, :source, :status, :error, NOW(), :expires_at)
+                ON CONFLICT (url_key) DO UPDATE SET
+                    url = EXCLUDED.url,
+                    title = EXCLUDED.title,
+                    description = EXCLUDED.description,
+                    image = EXCLUDED.image,
+                    source = EXCLUDED.source,
+                    status = EXCLUDED.status,
+                    error = EXCLUDED.error,
+                    fetched_at = EXCLUDED.fetched_at,
+                    expires_at = EXCLUDED.expires_at
+                """
+            ), {
+                'key': key,
+                'url': preview.get('url') or url,
+                'title': preview.get('title'),
+                'description': preview.get('description'),
+                'image': preview.get('image'),
+                'source': preview.get('source'),
+                'status': 'ok' if error is None else 'error',
+                'error': None if error is None else str(error)[:1000],
+                'expires_at': expires_at,
+            })
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.info(f"link preview cache write skipped ({e})")
+
+    def purge_expired(self):
+        """Delete expired cache rows. Returns the number removed."""
+        session = self._db.session
+        try:
+            result = session.execute(text('DELETE FROM link_preview_cache WHERE expires_at <= NOW()'))
+            session.commit()
+            return result.rowcount or 0
+        except Exception as e:
+            session.rollback()
+            logger.info(f"link preview cache purge skipped ({e})")
+            return 0
+
+    # -- background fetching --------------------------------------------
+
+    def _get_executor(self):
+        # Created lazily and recreated after a fork so each gunicorn worker owns its threads
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='link-preview')
+            self._executor_pid = pid
+            self._inflight = {}
+        return self._executor
+
+    def _in_app_context(self, fn, *args):
+        if self._app is None:
+            return fn(*args)
+        with self._app.app_context():
+            try:
+                return fn(*args)
+            finally:
+                self._db.session.remove()
+
+    def _fetch_and_store(self, key, url):
+        with self._lock:
+            self.fetches += 1
+        try:
+            preview = self.fetcher(url)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            logger.info(f"link preview fetch failed for {url}: {e}")
+            self._store(key, url, error=e)
+            return fallback_link_preview(url)
+        self._store(key, url, preview=preview)
+        return preview
+
+    def _job(self, key, url):
+        try:
+            return self._in_app_context(self._fetch_and_store, key, url)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def submit(self, url):
+        """Fetch url in the background. Returns a Future resolving to the preview dict.
+
+        Concurrent submissions of the same URL share one fetch. Returns None
+        when the pool already has max_pending jobs queued.
+        """
+        key = normalize_preview_url(url)
+        if not key:
+            return None
+        with self._lock:
+            executor = self._get_executor()
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if len(self._inflight) >= self.max_pending:
+                self.dropped += 1
+                logger.info(f"link preview queue full, dropping {url}")
+                return None
+            future = executor.submit(self._job, key, url)
+            self._inflight[key] = future
+            return future
+
+    def preview_for_request(self, url, wait_seconds=DEFAULT_REQUEST_WAIT_SECONDS):
+        """Preview for an interactive request, waiting at most wait_seconds for a fetch.
+
+        On timeout the URL-derived fallback is returned with pending=True; the
+        fetch keeps running and the next request is served from the cache.
+        """
+        cached = self.get_cached(url)
+        if cached is not None:
+            return cached
+        future = self.submit(url)
+        if future is not None:
+            try:
+                return future.result(timeout=wait_seconds)
+            except FutureTimeoutError:
+                pass
+            except Exception as e:
+                logger.info(f"link preview job failed for {url}: {e}")
+        preview = fallback_link_preview(url)
+        preview['pending'] = True
+        return preview
+
+    def schedule_post_fill(self, post_id, url):
+        """Fill a post's url_* columns once the preview for url is available."""
+        future = self.submit(url)
+        if future is None:
+            return None
+
+        def _on_done(done):
+            try:
+                preview = done.result()
+            except Exception as e:
+                logger.info(f"link preview job failed for post {post_id}: {e}")
+                return
+            try:
+                self._in_app_context(self._apply_to_post, post_id, url, preview)
+            except Exception as e:
+                logger.info(f"link preview fill skipped for post {post_id} ({e})")
+
+        future.add_done_callback(_on_done)
+        return future
+
+    def _apply_to_post(self, post_id, url, preview):
+        session = self._db.session
+        try:
+            # Only fill if the post still points at the same URL
+            session.execute(text(
+                """
+                UPDATE post
+                SET url_title = :title, url_description = :description, url_image = :image
+                WHERE id = :post_id AND url = :url
+                """
+            ), {
+                'post_id': int(post_id),
+                'url': url,
+                'title': (preview.get('title') or '')[:_POST_URL_FIELD_LIMIT] or None,
+                'description': preview.get('description') or None,
+                'image': (preview.get('image') or '')[:_POST_URL_FIELD_LIMIT] or None,
+            })
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'fetches': self.fetches,
+                'failures': self.failures,
+                'dropped': self.dropped,
+                'in_flight': len(self._inflight),
+                'workers': self.max_workers,
+            }
+
+
+def apply_preview_to_post(post, preview):
+    """Copy preview fields onto a Post model instance."""
+    post.url_title = (preview.get('title') or '')[:_POST_URL_FIELD_LIMIT] or None
+    post.url_description = preview.get('description') or None
+    post.url_image = (preview.get('image') or '')[:_POST_URL_FIELD_LIMIT] or None
+
+
+link_preview_service = LinkPreviewService(
+    max_workers=int(os.getenv('LINK_PREVIEW_WORKERS', DEFAULT_PREVIEW_WORKERS)),
+    max_pending=int(os.getenv('LINK_PREVIEW_MAX_PENDING', DEFAULT_MAX_PENDING)),
+    ttl_seconds=int(os.getenv('LINK_PREVIEW_TTL', DEFAULT_PREVIEW_TTL_SECONDS)),
+    negative_ttl_seconds=int(os.getenv('LINK_PREVIEW_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL_SECONDS)),
+)
@@ -0,0 +1,295 @@
+"""
+Response cache for anonymous reads of public timelines.
+
+Public hashtag and community timelines are read far more often than they
+change, yet every anonymous request rebuilt the full event list in every
+worker. PublicResponseCache keeps rendered response bodies keyed by
+timeline id, endpoint and query string; each entry remembers the ETag it was
+rendered for, which already encodes the timeline version (and, for event
+lists, the banned-timeline set). A lookup whose ETag no longer matches is a
+miss, so any write that bumps the timeline version invalidates the entry in
+every worker. Bumps made by this worker also drop its entries right away
+(see utils/timeline_version.add_bump_listener).
+
+Entries are fresh for ttl_seconds. For stale_seconds after that they are
+still served while one background refresh re-renders them
+(stale-while-revalidate), covering payload fields the version does not
+track, such as creator avatars.
+
+Misses go through a SingleFlight, so concurrent requests for the same
+missing entry render it once per worker. With an optional recompute lock
+(utils/single_flight.PgAdvisoryLock) only one worker at a time renders a
+given entry; the others wait and re-check the backend, which pays off once
+the backend is shared. Background refreshes skip the entry when another
+worker holds its lock.
+
+Storage goes through a small backend interface (get / set / delete /
+delete_prefix / clear / stats). InProcessLRUBackend is a size-bounded LRU
+per worker; a shared backend (e.g. Redis) can be plugged in with
+configure(backend=...).
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.single_flight import timeline_single_flight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30.0
+DEFAULT_STALE_SECONDS = 300.0
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_REFRESH_WORKERS = 1
+
+
+class CacheEntry:
+    __slots__ = ('etag', 'body', 'stored_at')
+
+    def __init__(self, etag, body, stored_at):
+        self.etag = etag
+        self.body = body
+        self.stored_at = stored_at
+
+
+class InProcessLRUBackend:
+    """LRU bounded by entry count and total body bytes."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        size = len(entry.body)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            doomed = [k for k in self._entries if k.startswith(prefix)]
+            for key in doomed:
+                self._bytes -= len(self._entries.pop(key).body)
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'in_process',
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+            }
+
+
+def timeline_cache_key(timeline_id, kind, query_string=''):
+    return f"tl:{int(timeline_id)}:{kind}:{query_string or ''}"
+
+
+class PublicResponseCache:
+    """Versioned response cache with stale-while-revalidate."""
+
+    def __init__(self, backend=None, ttl_seconds=DEFAULT_TTL_SECONDS, stale_seconds=DEFAULT_STALE_SECONDS,
+                 refresh_workers=DEFAULT_REFRESH_WORKERS, enabled=True, single_flight=None):
+        self.backend = backend or InProcessLRUBackend()
+        self.single_flight = single_flight or timeline_single_flight
+        self.recompute_lock = None
+        self.ttl_seconds = float(ttl_seconds)
+        self.stale_seconds = float(stale_seconds)
+        self.refresh_workers = max(1, int(refresh_workers))
+        self.enabled = bool(enabled)
+        self._app = None
+        self._db = None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.invalidations = 0
+
+    def init_app(self, app, db):
+        """Bind the Flask app (for background app contexts) and the SQLAlchemy handle."""
+        self._app = app
+        self._db = db
+
+    def configure(self, backend=None, enabled=None, recompute_lock=None):
+        """Swap the storage backend, toggle the cache, or add a cross-worker recompute lock."""
+        if backend is not None:
+            self.backend = backend
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if recompute_lock is not None:
+            self.recompute_lock = recompute_lock
+
+    def get_or_render(self, key, etag, render):
+        """Return (etag, body) for key, rendering on a miss.
+
+        render: zero-argument callable returning (etag, body_bytes) for the
+            current state; it is also used for background refreshes, so it
+            must not depend on the request context.
+        """
+        if not self.enabled:
+            return render()
+        entry = self.backend.get(key)
+        if entry is not None and entry.etag == etag:
+            age = time.time() - entry.stored_at
+            if age < self.ttl_seconds:
+                with self._lock:
+                    self.hits += 1
+                return entry.etag, entry.body
+            if age < self.ttl_seconds + self.stale_seconds:
+                with self._lock:
+                    self.stale_hits += 1
+                self._schedule_refresh(key, render)
+                return entry.etag, entry.body
+        with self._lock:
+            self.misses += 1
+        return self.single_flight.do(f"{key}|{etag}", lambda: self._render_locked(key, etag, render))
+
+    def _render_and_store(self, key, render):
+        fresh_etag, body = render()
+        self.backend.set(key, CacheEntry(fresh_etag, body, time.time()))
+        return fresh_etag, body
+
+    def _render_locked(self, key, etag, render):
+        if self.recompute_lock is None:
+            return self._render_and_store(key, render)
+        with self.recompute_lock.hold(key):
+            # Another worker may have stored it (in a shared backend) while we waited
+            entry = self.backend.get(key)
+            if entry is not None and entry.etag == etag and time.time() - entry.stored_at < self.ttl_seconds:
+                return entry.etag, entry.body
+            return self._render_and_store(key, render)
+
+    # -- background refresh ---------------------------------------------
+
+    def _get_executor(self):
+        # Created lazily and recreated after a fork so each gunicorn worker owns its threads
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers, thread_name_prefix='response-cache')
+            self._executor_pid = pid
+            self._refreshing = set()
+        return self._executor
+
+    def _refresh_now(self, key, render):
+        if self.recompute_lock is None:
+            return self._render_and_store(key, render)
+        with self.recompute_lock.hold(key, wait_seconds=0) as held:
+            if not held:
+                # Another worker is already refreshing this entry
+                return None
+            return self._render_and_store(key, render)
+
+    def _refresh(self, key, render):
+        try:
+            if self._app is None:
+                refreshed = self._refresh_now(key, render)
+            else:
+                with self._app.app_context():
+                    try:
+                        refreshed = self._refresh_now(key, render)
+                    finally:
+                        self._db.session.remove()
+            if refreshed is not None:
+                with self._lock:
+                    self.refreshes += 1
+        except Exception as e:
+            with self._lock:
+                self.refresh_failures += 1
+            logger.info(f"response cache refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key, render):
+        with self._lock:
+            executor = self._get_executor()
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        executor.submit(self._refresh, key, render)
+
+    # -- invalidation ----------------------------------------------------
+
+    def invalidate_timeline(self, timeline_id):
+        self.backend.delete_prefix(f"tl:{int(timeline_id)}:")
+        with self._lock:
+            self.invalidations += 1
+
+    def invalidate_timelines(self, timeline_ids):
+        for timeline_id in timeline_ids or []:
+            self.invalidate_timeline(timeline_id)
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            counters = {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'refresh_failures': self.refresh_failures,
+                'invalidations': self.invalidations,
+                'ttl_seconds': self.ttl_seconds,
+                'stale_seconds': self.stale_seconds,
+            }
+        counters.update(self.backend.stats())
+        if self.recompute_lock is not None:
+            counters['recompute_lock'] = self.recompute_lock.stats()
+        return counters
+
+
+public_response_cache = PublicResponseCache(
+    backend=InProcessLRUBackend(
+        max_entries=int(os.getenv('PUBLIC_RESPONSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+        max_bytes=int(os.getenv('PUBLIC_RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+    ),
+    ttl_seconds=float(os.getenv('PUBLIC_RESPONSE_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+    stale_seconds=float(os.getenv('PUBLIC_RESPONSE_CACHE_STALE', DEFAULT_STALE_SECONDS)),
+    enabled=os.getenv('PUBLIC_RESPONSE_CACHE_ENABLED', '1').lower() not in ('0', 'false', 'no'),
+)
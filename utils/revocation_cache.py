@@ -0,0 +1,141 @@
+"""
+Per-worker cache of revoked JWT ids (token_blocklist).
+
+The blocklist check used to query token_blocklist on every authenticated
+request. Each worker now keeps the set of jtis revoked within the longest
+token lifetime (older tokens have expired and are rejected before the
+blocklist is consulted) and tops it up incrementally by created_at every
+refresh_seconds. Between refreshes a check is a set lookup. The set is
+built from the table itself, so a hit needs no confirmation query.
+
+A revocation made by another worker becomes visible here within
+refresh_seconds; the worker handling the logout records it immediately via
+add(). If a refresh fails, checks fall back to the direct per-token query.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_SECONDS = 5.0
+# Rows committed slightly after their created_at timestamp are re-read on the next refresh
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+
+class TokenRevocationCache:
+    """Incrementally refreshed set of revoked jtis."""
+
+    def __init__(self, refresh_seconds=DEFAULT_REFRESH_SECONDS):
+        self.refresh_seconds = float(refresh_seconds)
+        self.retention = timedelta(days=30)
+        self._fetch_since = None
+        self._lookup = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._revoked = {}
+        self._watermark = None
+        self._next_refresh_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.fallbacks = 0
+
+    def configure(self, fetch_since, lookup, retention):
+        """Register the DB accessors.
+
+        Args:
+            fetch_since: callable(datetime) -> iterable of (jti, created_at)
+                rows with created_at >= the given time.
+            lookup: callable(jti) -> bool, the direct per-token query.
+            retention: how far back revocations matter (the longest token lifetime).
+        """
+        with self._lock:
+            self._fetch_since = fetch_since
+            self._lookup = lookup
+            self.retention = retention
+            self._revoked = {}
+            self._watermark = None
+            self._next_refresh_at = 0.0
+
+    def _refresh(self):
+        now = datetime.now()
+        horizon = now - self.retention
+        with self._lock:
+            since = horizon if self._watermark is None else max(horizon, self._watermark - WATERMARK_OVERLAP)
+        rows = list(self._fetch_since(since))
+        with self._lock:
+            for jti, created_at in rows:
+                self._revoked[jti] = created_at
+                if created_at is not None and (self._watermark is None or created_at > self._watermark):
+                    self._watermark = created_at
+            if self._watermark is None:
+                self._watermark = now
+            # Forget revocations whose tokens can no longer be presented
+            expired = [jti for jti, created_at in self._revoked.items() if created_at is not None and created_at < horizon]
+            for jti in expired:
+                del self._revoked[jti]
+            self._next_refresh_at = time.monotonic() + self.refresh_seconds
+            self.refreshes += 1
+
+    def _ensure_fresh(self):
+        if time.monotonic() < self._next_refresh_at:
+            return True
+        with self._refresh_lock:
+            if time.monotonic() < self._next_refresh_at:
+                return True
+            try:
+                self._refresh()
+                return True
+            except Exception as e:
+                logger.info(f"token revocation cache refresh failed: {e}")
+                return False
+
+    def is_revoked(self, jti):
+        if self._fetch_since is None or not self._ensure_fresh():
+            with self._lock:
+                self.fallbacks += 1
+            return bool(self._lookup(jti)) if self._lookup else False
+        with self._lock:
+            if jti in self._revoked:
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, jti, created_at=None):
+        """Record a revocation committed by this worker."""
+        with self._lock:
+            self._revoked[jti] = created_at or datetime.now()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'fallbacks': self.fallbacks,
+                'revoked_count': len(self._revoked),
+                'refresh_seconds': self.refresh_seconds,
+            }
+
+
+token_revocation_cache = TokenRevocationCache(
+    refresh_seconds=float(os.getenv('JWT_REVOCATION_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS))
+)
+
+
+def purge_expired_revocations(session, retention):
+    """Delete blocklist rows older than retention (the longest token lifetime).
+
+    A revoked token expires at most `retention` after it was revoked, so
+    such rows can no longer match a presented token. Returns the number
+    of rows removed.
+    """
+    cutoff = datetime.now() - retention
+    result = session.execute(text('DELETE FROM token_blocklist WHERE created_at < :cutoff'), {'cutoff': cutoff})
+    session.commit()
+    return result.rowcount or 0
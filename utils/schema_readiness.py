@@ -0,0 +1,115 @@
+"""
+Run-once schema readiness checks.
+
+Several modules keep additive "ensure" helpers (CREATE TABLE IF NOT EXISTS,
+ALTER TABLE ... ADD COLUMN IF NOT EXISTS, inspector checks). They used to be
+called on the request path, taking catalog locks on every login, post and
+landing page load. Decorating them with @schema_ensure registers them here:
+run_schema_checks() applies all of them once per process at startup, and
+after a successful run the request-path calls return immediately.
+
+A check that fails at startup is retried on its next request-path call, so a
+transient DB outage during boot does not leave the schema permanently
+unchecked.
+"""
+import functools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_registry_order = []
+_status = {}
+_lock = threading.Lock()
+_summary = {'ran': False, 'duration_ms': None, 'ok': None}
+
+
+def schema_ensure(name, boot=None):
+    """Decorator making an ensure helper run at most once (successfully) per process.
+
+    Args:
+        name: unique check name, reported by schema_status().
+        boot: optional zero-argument callable used by run_schema_checks() to
+            invoke the check; defaults to calling the helper with no arguments.
+    """
+    def decorator(fn):
+        state = {'done': False}
+        fn_lock = threading.Lock()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if state['done']:
+                return None
+            with fn_lock:
+                if state['done']:
+                    return None
+                started = time.perf_counter()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    _record(name, False, started, str(e))
+                    raise
+                state['done'] = True
+                _record(name, True, started, None)
+                return result
+
+        wrapper.schema_check_name = name
+        wrapper.is_schema_ready = lambda: state['done']
+        with _lock:
+            if name not in _registry:
+                _registry_order.append(name)
+            _registry[name] = boot or wrapper
+        return wrapper
+
+    return decorator
+
+
+def _record(name, ok, started, error):
+    with _lock:
+        _status[name] = {
+            'ok': ok,
+            'duration_ms': round((time.perf_counter() - started) * 1000.0, 2),
+            'error': error,
+            'checked_at': time.time(),
+        }
+
+
+def run_schema_checks():
+    """Apply every registered check once. Call inside an app context at startup.
+
+    Returns the status dict (see schema_status()).
+    """
+    started = time.perf_counter()
+    with _lock:
+        names = list(_registry_order)
+    all_ok = True
+    for name in names:
+        runner = _registry.get(name)
+        try:
+            runner()
+        except Exception as e:
+            all_ok = False
+            logger.warning(f"schema check '{name}' failed at startup: {e}")
+        else:
+            with _lock:
+                status = _status.get(name)
+            if status is not None and not status['ok']:
+                all_ok = False
+    duration_ms = round((time.perf_counter() - started) * 1000.0, 2)
+    with _lock:
+        _summary.update({'ran': True, 'duration_ms': duration_ms, 'ok': all_ok})
+    logger.info(f"Schema readiness: {len(names)} checks in {duration_ms} ms ({'ok' if all_ok else 'with failures'})")
+    return schema_status()
+
+
+def schema_status():
+    """Snapshot of the startup run and of each registered check."""
+    with _lock:
+        return {
+            'ran_at_startup': _summary['ran'],
+            'startup_duration_ms': _summary['duration_ms'],
+            'ok': _summary['ok'],
+            'checks': {name: dict(_status[name]) if name in _status else None for name in _registry_order},
+        }
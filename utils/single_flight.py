@@ -0,0 +1,172 @@
+"""
+Request coalescing for expensive, identical reads.
+
+When a timeline goes viral, many concurrent requests ask for the same event
+list at once and each would run the same hydration. SingleFlight lets the
+first caller for a key (the leader) compute the result while concurrent
+callers with the same key wait for it and share it. The deployment runs
+gunicorn gthread workers (gunicorn.conf.py) so a worker serves several
+requests at once; a sync worker would make every call its own leader.
+
+Across workers, an optional PgAdvisoryLock makes sure only one worker at a
+time recomputes a given cache entry: the others wait for the lock and then
+re-check the cache before rendering themselves.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WAIT_SECONDS = 15.0
+DEFAULT_LOCK_WAIT_SECONDS = 5.0
+LOCK_POLL_SECONDS = 0.05
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per-process duplicate call suppression keyed by string."""
+
+    def __init__(self, wait_seconds=DEFAULT_WAIT_SECONDS):
+        self.wait_seconds = float(wait_seconds)
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.max_waiters = 0
+
+    def do(self, key, fn):
+        """Return fn() for key, sharing one execution among concurrent callers.
+
+        A waiter that gives up after wait_seconds runs fn() itself. Errors
+        raised by the leader are re-raised in every waiter.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                leader = False
+
+        if not leader:
+            if call.done.wait(self.wait_seconds):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            with self._lock:
+                self.timeouts += 1
+            return fn()
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'in_flight': len(self._calls),
+                'max_waiters': self.max_waiters,
+            }
+
+
+def _advisory_key(key):
+    # Signed 64-bit key for pg_advisory_lock
+    return int.from_bytes(hashlib.sha1(str(key).encode('utf-8')).digest()[:8], 'big', signed=True)
+
+
+class PgAdvisoryLock:
+    """Cross-worker mutex on a PostgreSQL session-level advisory lock.
+
+    Uses its own pooled connection for the duration of the lock, so it is
+    only taken around recomputations, never on cache hits.
+    """
+
+    def __init__(self, engine, wait_seconds=DEFAULT_LOCK_WAIT_SECONDS):
+        self.engine = engine
+        self.wait_seconds = float(wait_seconds)
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+
+    @contextmanager
+    def hold(self, key, wait_seconds=None):
+        """Yield True once the lock is held, or False after waiting in vain."""
+        wait = self.wait_seconds if wait_seconds is None else float(wait_seconds)
+        lock_key = _advisory_key(key)
+        conn = self.engine.connect()
+        got = False
+        try:
+            deadline = time.monotonic() + wait
+            contended = False
+            while True:
+                got = bool(conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {'k': lock_key}).scalar())
+                conn.commit()
+                if got or time.monotonic() >= deadline:
+                    break
+                contended = True
+                time.sleep(LOCK_POLL_SECONDS)
+            with self._lock:
+                if got:
+                    self.acquired += 1
+                else:
+                    self.timeouts += 1
+                if contended:
+                    self.contended += 1
+            yield got
+        finally:
+            if got:
+                try:
+                    conn.execute(text("SELECT pg_advisory_unlock(:k)"), {'k': lock_key})
+                    conn.commit()
+                except Exception as e:
+                    logger.info(f"advisory unlock failed for {key}: {e}")
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'kind': 'postgres_advisory',
+                'acquired': self.acquired,
+                'contended': self.contended,
+                'timeouts': self.timeouts,
+            }
+
+
+timeline_single_flight = SingleFlight(
+    wait_seconds=float(os.getenv('SINGLE_FLIGHT_WAIT_SECONDS', DEFAULT_WAIT_SECONDS))
+)
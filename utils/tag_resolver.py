@@ -0,0 +1,224 @@
+"""
+Bulk hashtag resolution for event creation.
+
+All incoming tag names are normalized once, then every Tag and its hashtag
+Timeline is found or created with a fixed number of set-based statements,
+however many tags the event carries. Hashtag timelines are matched on
+timeline.hashtag_key, a stored normalized form of the name with a partial
+unique index, so lookups are index scans and creation is an
+INSERT ... ON CONFLICT DO NOTHING upsert that is safe under concurrent
+requests.
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# SQL twin of normalize_tag_name() for a name column
+HASHTAG_KEY_SQL = "btrim(regexp_replace(replace(replace(lower({col}), '#', ''), '-', ' '), '\\s+', ' ', 'g'))"
+
+
+def normalize_tag_name(raw):
+    """Canonical tag key: lowercase, no '#', hyphens as spaces, single spaces."""
+    name = str(raw or '').strip().lower().replace('#', '')
+    return ' '.join(name.replace('-', ' ').split())
+
+
+def ensure_hashtag_key_schema(conn):
+    """Add and backfill timeline.hashtag_key and the indexes the resolver relies on."""
+    conn.execute(text("ALTER TABLE timeline ADD COLUMN IF NOT EXISTS hashtag_key VARCHAR(100)"))
+    # Existing duplicates (e.g. "BAN-TEST" and "BAN TEST") keep the key on the oldest row only
+    conn.execute(text(
+        f"""
+        UPDATE timeline t
+        SET hashtag_key = k.key
+        FROM (
+            SELECT DISTINCT ON (key) id, key
+            FROM (
+                SELECT id, {HASHTAG_KEY_SQL.format(col='name')} AS key
+                FROM timeline
+                WHERE timeline_type = 'hashtag'
+            ) s
+            WHERE key <> ''
+            ORDER BY key, id
+        ) k
+        WHERE t.id = k.id
+          AND t.hashtag_key IS NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM timeline o
+              WHERE o.hashtag_key = k.key AND o.timeline_type = 'hashtag'
+          )
+        """
+    ))
+    conn.execute(text(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_timeline_hashtag_key
+        ON timeline (hashtag_key)
+        WHERE timeline_type = 'hashtag' AND hashtag_key IS NOT NULL
+        """
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_tag_name_lower ON tag (lower(name))"))
+
+
+def stamp_hashtag_key(conn, timeline_id):
+    """Set (or clear) hashtag_key for one timeline after it was inserted or renamed elsewhere."""
+    key_sql = HASHTAG_KEY_SQL.format(col='t.name')
+    conn.execute(text(
+        f"""
+        UPDATE timeline t
+        SET hashtag_key = CASE
+            WHEN t.timeline_type = 'hashtag'
+                 AND {key_sql} <> ''
+                 AND NOT EXISTS (
+                     SELECT 1 FROM timeline o
+                     WHERE o.hashtag_key = {key_sql}
+                       AND o.timeline_type = 'hashtag'
+                       AND o.id <> t.id
+                 )
+            THEN {key_sql}
+            ELSE NULL
+        END
+        WHERE t.id = :tid
+        """
+    ), {'tid': int(timeline_id)})
+
+
+def _select_hashtag_timelines(session, keys):
+    if not keys:
+        return {}
+    rows = session.execute(text(
+        """
+        SELECT id, hashtag_key, name
+        FROM timeline
+        WHERE timeline_type = 'hashtag' AND hashtag_key = ANY(:keys)
+        """
+    ), {'keys': list(keys)}).all()
+    return {r[1]: (int(r[0]), r[2]) for r in rows}
+
+
+def _create_hashtag_timelines(session, keys, created_by, now):
+    if not keys:
+        return {}
+    keys = list(keys)
+    rows = session.execute(text(
+        """
+        INSERT INTO timeline (
+            name, description, created_by, created_at, timeline_type, visibility,
+            requires_approval, cover_upload_enabled, cover_portrait_x, cover_portrait_y,
+            cover_landscape_x, cover_landscape_y, cover_zoom, hashtag_key
+        )
+        SELECT upper(k), 'Timeline for #' || k, :created_by, :now, 'hashtag', 'public',
+               FALSE, TRUE, 50, 50, 50, 50, 1, k
+        FROM unnest(CAST(:keys AS TEXT[])) AS k
+        ON CONFLICT (hashtag_key) WHERE timeline_type = 'hashtag' AND hashtag_key IS NOT NULL
+        DO NOTHING
+        RETURNING id, hashtag_key, name
+        """
+    ), {'keys': keys, 'created_by': created_by, 'now': now}).all()
+    created = {r[1]: (int(r[0]), r[2]) for r in rows}
+    # Keys another request created concurrently
+    raced = [k for k in keys if k not in created]
+    created.update(_select_hashtag_timelines(session, raced))
+    return created
+
+
+def resolve_tags(session, raw_names, created_by=None, now=None):
+    """Find or create the tags (and hashtag timelines) for raw_names.
+
+    Returns a list, in input order and de-duplicated, of dicts with:
+        key: normalized tag name
+        tag_id: Tag id
+        timeline_id / timeline_name: the tag's timeline, or None when the
+            tag is not bound to one
+    Does not commit; the caller's transaction owns the writes.
+    """
+    keys = []
+    for raw in raw_names or []:
+        key = normalize_tag_name(raw)
+        if key and key not in keys:
+            keys.append(key)
+    if not keys:
+        return []
+    now = now or datetime.now()
+
+    # 1. Existing tags (case-insensitive) with their current binding
+    tag_rows = session.execute(text(
+        """
+        SELECT DISTINCT ON (lower(t.name))
+               lower(t.name) AS key, t.id, t.timeline_id, tl.timeline_type, tl.name AS timeline_name
+        FROM tag t
+        LEFT JOIN timeline tl ON tl.id = t.timeline_id
+        WHERE lower(t.name) = ANY(:keys)
+        ORDER BY lower(t.name), t.id
+        """
+    ), {'keys': keys}).mappings().all()
+    tags = {row['key']: row for row in tag_rows}
+
+    # New tags and tags bound to a non-hashtag timeline (e.g. a community) need a hashtag timeline
+    missing_tags = [k for k in keys if k not in tags]
+    remap_keys = [
+        k for k, row in tags.items()
+        if row['timeline_id'] and row['timeline_type'] is not None and row['timeline_type'] != 'hashtag'
+    ]
+    need_timeline = missing_tags + remap_keys
+
+    # 2. Hashtag timelines: reuse by key, create the rest
+    timelines = _select_hashtag_timelines(session, need_timeline)
+    timelines.update(_create_hashtag_timelines(
+        session, [k for k in need_timeline if k not in timelines], created_by, now
+    ))
+
+    # 3. Create missing tags already bound to their timeline
+    tag_ids = {k: int(row['id']) for k, row in tags.items()}
+    if missing_tags:
+        rows = session.execute(text(
+            """
+            INSERT INTO tag (name, created_at, timeline_id)
+            SELECT x.name, :now, x.timeline_id
+            FROM unnest(CAST(:names AS TEXT[]), CAST(:timeline_ids AS INTEGER[])) AS x(name, timeline_id)
+            ON CONFLICT (name) DO NOTHING
+            RETURNING id, name
+            """
+        ), {
+            'names': missing_tags,
+            'timeline_ids': [timelines[k][0] for k in missing_tags],
+            'now': now,
+        }).all()
+        tag_ids.update({r[1]: int(r[0]) for r in rows})
+        raced = [k for k in missing_tags if k not in tag_ids]
+        if raced:
+            rows = session.execute(text(
+                "SELECT DISTINCT ON (lower(name)) lower(name), id FROM tag WHERE lower(name) = ANY(:keys) ORDER BY lower(name), id"
+            ), {'keys': raced}).all()
+            tag_ids.update({r[0]: int(r[1]) for r in rows})
+
+    # 4. Re-point tags that were bound to a non-hashtag timeline
+    if remap_keys:
+        session.execute(text(
+            """
+            UPDATE tag
+            SET timeline_id = x.timeline_id
+            FROM unnest(CAST(:ids AS INTEGER[]), CAST(:timeline_ids AS INTEGER[])) AS x(id, timeline_id)
+            WHERE tag.id = x.id
+            """
+        ), {
+            'ids': [tag_ids[k] for k in remap_keys],
+            'timeline_ids': [timelines[k][0] for k in remap_keys],
+        })
+
+    resolved = []
+    for key in keys:
+        if key in timelines:
+            timeline_id, timeline_name = timelines[key]
+        elif key in tags and tags[key]['timeline_type'] is not None:
+            timeline_id, timeline_name = int(tags[key]['timeline_id']), tags[key]['timeline_name']
+        else:
+            timeline_id, timeline_name = None, None
+        resolved.append({
+            'key': key,
+            'tag_id': tag_ids[key],
+            'timeline_id': timeline_id,
+            'timeline_name': timeline_name,
+        })
+    return resolved
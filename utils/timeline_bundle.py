@@ -0,0 +1,219 @@
+"""
+Batched readers behind the timeline page bundle endpoint.
+
+Opening a community timeline used to fire a dozen requests (timeline,
+member count, membership, action cards, info cards, quote, status message,
+warning state, follow status, passport, events), each repeating JWT checks,
+access checks and ban lookups. The bundle endpoint authorizes once and
+assembles the requested sections on the request's session connection; the
+per-viewer and per-timeline lookups those endpoints made separately are
+folded into a few queries here:
+
+  - existing_tables(): which optional tables exist, in one round trip
+  - load_viewer_context(): membership row, site role and follow row
+  - load_member_stats(): active and visible member counts
+  - load_action_tally(): vote counts per tier and the viewer's own votes
+  - load_page_notices(): active warning state and status message
+  - load_passport(): passport row and moderation state
+
+Each returns plain values; shaping them like the individual endpoints is
+left to app.py.
+"""
+import json
+import logging
+from sqlalchemy import text
+from utils.timeline_feed import FeedArgumentError
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = (
+    'timeline', 'member_count', 'membership', 'actions', 'info_cards', 'quote',
+    'status_message', 'warning_state', 'follow_status', 'passport', 'events',
+)
+# Sections whose endpoints require a signed-in user
+VIEWER_SECTIONS = frozenset({'membership', 'actions', 'quote', 'follow_status', 'passport'})
+SITE_OWNER_ID = 1
+
+
+def parse_bundle_sections(include=None, exclude=None):
+    """Sections to build: include (comma-separated, default all) minus exclude."""
+    def _split(value, name):
+        picked = []
+        for part in str(value or '').split(','):
+            part = part.strip().lower().replace('-', '_')
+            if not part:
+                continue
+            if part not in SECTIONS:
+                raise FeedArgumentError(f"Invalid '{name}' section '{part}' (use {', '.join(SECTIONS)})")
+            if part not in picked:
+                picked.append(part)
+        return picked
+
+    included = _split(include, 'sections') or list(SECTIONS)
+    excluded = set(_split(exclude, 'exclude'))
+    return [name for name in included if name not in excluded]
+
+
+def existing_tables(conn, names):
+    """Subset of names that exist in the public schema."""
+    rows = conn.execute(text(
+        """
+        SELECT n FROM unnest(CAST(:names AS TEXT[])) AS n
+        WHERE to_regclass('public.' || n) IS NOT NULL
+        """
+    ), {'names': list(names)}).all()
+    return {r[0] for r in rows}
+
+
+def load_viewer_context(conn, timeline_id, viewer_id, tables):
+    """The viewer's membership row, site role and follow row for one timeline, in one query."""
+    params = {'tid': int(timeline_id), 'uid': int(viewer_id)}
+    columns = [
+        'm.role AS member_role', 'm.is_active_member', 'm.is_blocked', 'm.joined_at',
+    ]
+    joins = ['LEFT JOIN timeline_member m ON m.timeline_id = :tid AND m.user_id = :uid']
+    if 'site_admin' in tables:
+        columns.append('sa.role AS site_role')
+        joins.append('LEFT JOIN site_admin sa ON sa.user_id = :uid')
+    else:
+        columns.append('NULL AS site_role')
+    if 'timeline_follow' in tables:
+        columns.extend(['f.follow_kind', 'f.created_at AS followed_at', '(f.user_id IS NOT NULL) AS is_following'])
+        joins.append('LEFT JOIN timeline_follow f ON f.user_id = :uid AND f.timeline_id = :tid')
+    else:
+        columns.extend(['NULL AS follow_kind', 'NULL AS followed_at', 'FALSE AS is_following'])
+    row = conn.execute(text(
+        f"""
+        SELECT {', '.join(columns)}
+        FROM (SELECT 1) AS one
+        {' '.join(joins)}
+        LIMIT 1
+        """
+    ), params).mappings().first()
+    return dict(row) if row else {}
+
+
+def load_member_stats(conn, timeline_id, created_by):
+    """Active member count, and the member-count endpoint's count of visible members.
+
+    The visible count skips blocked members and always includes the site
+    owner and the creator, as the community member list does.
+    """
+    row = conn.execute(text(
+        """
+        SELECT COUNT(*) FILTER (WHERE is_active_member) AS active,
+               COUNT(*) FILTER (WHERE is_active_member AND NOT COALESCE(is_blocked, FALSE)) AS visible,
+               BOOL_OR(user_id = :owner AND is_active_member AND NOT COALESCE(is_blocked, FALSE)) AS has_owner,
+               BOOL_OR(user_id = :creator AND is_active_member AND NOT COALESCE(is_blocked, FALSE)) AS has_creator
+        FROM timeline_member
+        WHERE timeline_id = :tid
+        """
+    ), {'tid': int(timeline_id), 'owner': SITE_OWNER_ID, 'creator': created_by}).mappings().first()
+    visible = int(row['visible'] or 0)
+    if not row['has_owner']:
+        visible += 1
+    if created_by and created_by != SITE_OWNER_ID and not row['has_creator']:
+        visible += 1
+    return {'active': int(row['active'] or 0), 'visible': visible}
+
+
+def load_action_tally(conn, timeline_id, viewer_id=None):
+    """{'votes': {action_type: count}, 'user_votes': {action_type, ...}} for one timeline."""
+    rows = conn.execute(text(
+        """
+        SELECT action_type, COUNT(*), BOOL_OR(user_id = :uid)
+        FROM timeline_action_vote
+        WHERE timeline_id = :tid
+        GROUP BY action_type
+        """
+    ), {'tid': int(timeline_id), 'uid': viewer_id}).all()
+    return {
+        'votes': {r[0]: int(r[1]) for r in rows},
+        'user_votes': {r[0] for r in rows if r[2]},
+    }
+
+
+def load_page_notices(conn, timeline_id, tables):
+    """Active warning state and active status message rows (either may be None), in one query."""
+    columns = []
+    joins = []
+    if 'timeline_warning_state' in tables:
+        columns.extend([
+            '(w.timeline_id IS NOT NULL) AS has_warning', 'w.warning_scope', 'w.warning_reason_public',
+            'w.mask_content', 'w.warning_until',
+        ])
+        joins.append(
+            """
+            LEFT JOIN LATERAL (
+                SELECT timeline_id, warning_scope, warning_reason_public, mask_content, warning_until
+                FROM timeline_warning_state
+                WHERE timeline_id = :tid AND is_active = TRUE AND warning_until > NOW()
+                LIMIT 1
+            ) w ON TRUE
+            """
+        )
+    if 'timeline_status_message' in tables:
+        columns.extend([
+            '(s.timeline_id IS NOT NULL) AS has_status', 's.status_type', 's.status_header',
+            's.status_body', 's.updated_at',
+        ])
+        joins.append(
+            """
+            LEFT JOIN LATERAL (
+                SELECT timeline_id, status_type, status_header, status_body, updated_at
+                FROM timeline_status_message
+                WHERE timeline_id = :tid AND is_active = TRUE
+                LIMIT 1
+            ) s ON TRUE
+            """
+        )
+    if not columns:
+        return None, None
+    row = conn.execute(text(
+        f"SELECT {', '.join(columns)} FROM (SELECT 1) AS one {' '.join(joins)}"
+    ), {'tid': int(timeline_id)}).mappings().first()
+    warning = None
+    if row.get('has_warning'):
+        warning = {k: row[k] for k in ('warning_scope', 'warning_reason_public', 'mask_content', 'warning_until')}
+    status = None
+    if row.get('has_status'):
+        status = {k: row[k] for k in ('status_type', 'status_header', 'status_body', 'updated_at')}
+    return warning, status
+
+
+def load_passport(conn, viewer_id, tables):
+    """Passport row (memberships, preferences) and moderation state for a user, in one query."""
+    columns = []
+    joins = []
+    if 'user_passport' in tables:
+        columns.extend(['p.memberships_json', 'p.preferences_json', 'p.last_updated'])
+        joins.append('LEFT JOIN user_passport p ON p.user_id = :uid')
+    if 'user_moderation_state' in tables:
+        columns.extend([
+            'ms.require_username_change', 'ms.restricted_until',
+            '(ms.restricted_until IS NOT NULL AND ms.restricted_until > NOW()) AS is_restricted',
+        ])
+        joins.append('LEFT JOIN user_moderation_state ms ON ms.user_id = :uid')
+    row = {}
+    if columns:
+        row = conn.execute(text(
+            f"SELECT {', '.join(columns)} FROM (SELECT 1) AS one {' '.join(joins)}"
+        ), {'uid': int(viewer_id)}).mappings().first() or {}
+
+    def _json(value, default):
+        if not value:
+            return default
+        try:
+            return json.loads(value) or default
+        except (TypeError, ValueError):
+            return default
+
+    restricted_until = row.get('restricted_until')
+    return {
+        'memberships': _json(row.get('memberships_json'), []),
+        'preferences': _json(row.get('preferences_json'), {}),
+        'last_updated': row['last_updated'].isoformat() if row.get('last_updated') else None,
+        'must_change_username': bool(row.get('require_username_change')),
+        'is_restricted': bool(row.get('is_restricted')),
+        'restricted_until': restricted_until.isoformat() if hasattr(restricted_until, 'isoformat') else None,
+    }
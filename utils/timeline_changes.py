@@ -0,0 +1,252 @@
+"""
+Per-timeline change log behind the delta sync endpoint.
+
+Clients polling a timeline used to refetch its whole event list to find one
+new event, and deletions left no trace to sync from. timeline_event_change
+records, per (timeline_id, event_id), that an event joined or was
+recomputed on a timeline ('upsert') or left it ('tombstone', with a reason:
+deleted, blocked, removed through a report, or unshared).
+
+Rows are written where membership is maintained: reindex_events() and
+reindex_timeline() in utils/timeline_event_index.py diff the old and new
+index rows, and event deletions call record_event_deletions() before the
+rows go away. Content edits are picked up from event.updated_at instead.
+
+A sync token carries two watermarks: the last change id and the time it was
+issued. Reads overlap both by CLOCK_OVERLAP_SECONDS so a transaction that
+commits late is not missed; the endpoint may therefore repeat an event or
+tombstone, and clients apply them idempotently. Rows older than the retention
+window are pruned (scripts/prune_timeline_event_changes.py); tokens older
+than that get a full resync.
+"""
+import base64
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = 30
+CLOCK_OVERLAP_SECONDS = 10
+MAX_CHANGES = 1000
+PRUNE_BATCH_SIZE = 5000
+
+_state = {'table': False}
+
+
+class SyncTokenError(ValueError):
+    """Raised when a since= token cannot be decoded."""
+
+
+def ensure_timeline_event_change_table(conn):
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS timeline_event_change (
+            id BIGSERIAL PRIMARY KEY,
+            timeline_id INTEGER NOT NULL REFERENCES timeline(id) ON DELETE CASCADE,
+            event_id INTEGER NOT NULL,
+            change VARCHAR(16) NOT NULL,
+            reason VARCHAR(16) NULL,
+            changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_timeline_event_change_timeline ON timeline_event_change (timeline_id, id);"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_timeline_event_change_changed_at ON timeline_event_change (changed_at);"
+    ))
+    _state['table'] = True
+
+
+def _table_exists(conn, name):
+    row = conn.execute(text("SELECT to_regclass(:t)"), {'t': f'public.{name}'}).first()
+    return bool(row and row[0])
+
+
+def record_membership_changes(conn, previous_pairs, current_pairs):
+    """Log the difference between old and new (timeline_id, event_id) index rows. Does not commit.
+
+    Every current pair is logged as an upsert (the caller recomputed it
+    because something about the event changed); pairs that disappeared are
+    logged as tombstones with the reason inferred from the database.
+    """
+    if not _state['table']:
+        return
+    current = {(int(t), int(e)) for t, e in current_pairs or []}
+    gone = {(int(t), int(e)) for t, e in previous_pairs or []} - current
+    if current:
+        tids, eids = zip(*sorted(current))
+        conn.execute(text(
+            """
+            INSERT INTO timeline_event_change (timeline_id, event_id, change)
+            SELECT tid, eid, 'upsert'
+            FROM unnest(CAST(:tids AS INTEGER[]), CAST(:eids AS INTEGER[])) AS p(tid, eid)
+            """
+        ), {'tids': list(tids), 'eids': list(eids)})
+    if not gone:
+        return
+    reasons = ["WHEN NOT EXISTS (SELECT 1 FROM event e WHERE e.id = p.eid) THEN 'deleted'"]
+    if _table_exists(conn, 'timeline_block_list'):
+        reasons.append(
+            "WHEN EXISTS (SELECT 1 FROM timeline_block_list b WHERE b.timeline_id = p.tid AND b.event_id = p.eid) "
+            "THEN 'blocked'"
+        )
+    if _table_exists(conn, 'reports'):
+        reasons.append(
+            "WHEN EXISTS (SELECT 1 FROM reports r WHERE r.timeline_id = p.tid AND r.event_id = p.eid "
+            "AND r.status = 'resolved' AND r.resolution = 'remove') THEN 'removed'"
+        )
+    tids, eids = zip(*sorted(gone))
+    conn.execute(text(
+        f"""
+        INSERT INTO timeline_event_change (timeline_id, event_id, change, reason)
+        SELECT p.tid, p.eid, 'tombstone', CASE {' '.join(reasons)} ELSE 'unshared' END
+        FROM unnest(CAST(:tids AS INTEGER[]), CAST(:eids AS INTEGER[])) AS p(tid, eid)
+        JOIN timeline t ON t.id = p.tid
+        """
+    ), {'tids': list(tids), 'eids': list(eids)})
+
+
+def record_event_deletions(conn, event_ids):
+    """Tombstone the given events on every timeline they appear on. Call before deleting them."""
+    ids = sorted({int(i) for i in event_ids or [] if i is not None})
+    if not ids or not _state['table']:
+        return
+    index_sql = ''
+    if _table_exists(conn, 'timeline_event_index'):
+        # Hashtag memberships are only known to the index
+        index_sql = 'UNION SELECT timeline_id, event_id FROM timeline_event_index WHERE event_id = ANY(:ids)'
+    conn.execute(text(
+        f"""
+        INSERT INTO timeline_event_change (timeline_id, event_id, change, reason)
+        SELECT m.timeline_id, m.event_id, 'tombstone', 'deleted'
+        FROM (
+            SELECT timeline_id, id AS event_id FROM event WHERE id = ANY(:ids)
+            UNION SELECT timeline_id, event_id FROM event_timeline_refs WHERE event_id = ANY(:ids)
+            UNION SELECT timeline_id, event_id FROM event_timeline_association WHERE event_id = ANY(:ids)
+            {index_sql}
+        ) m
+        JOIN timeline t ON t.id = m.timeline_id
+        """
+    ), {'ids': ids})
+
+
+def encode_sync_token(change_id, issued_at):
+    payload = json.dumps({'c': int(change_id), 'd': issued_at.isoformat()}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_sync_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        issued_at = datetime.fromisoformat(payload['d'])
+        if issued_at.tzinfo is None:
+            raise ValueError('naive timestamp')
+        return int(payload['c']), issued_at
+    except Exception:
+        raise SyncTokenError('Invalid sync token')
+
+
+def current_sync_token(session):
+    """Token marking "now" for the change log; take it before reading the state it covers."""
+    row = session.execute(text(
+        "SELECT COALESCE(MAX(id), 0), NOW() FROM timeline_event_change"
+    )).first()
+    return encode_sync_token(row[0], row[1])
+
+
+def token_expired(token, retention_days=DEFAULT_RETENTION_DAYS):
+    _, issued_at = decode_sync_token(token)
+    return issued_at < datetime.now(timezone.utc) - timedelta(days=retention_days)
+
+
+def _naive_local(moment):
+    # event.updated_at is written with the app's local naive datetime.now()
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def collect_changes(session, timeline_id, token, member_ids):
+    """Events changed on a timeline since token.
+
+    member_ids: callable(event_ids) returning the subset currently shown on
+        the timeline (the caller owns the membership rule).
+
+    Returns (upserted_event_ids, tombstones) or None when more than
+    MAX_CHANGES events changed and the client should refetch the list.
+    tombstones is a list of {'event_id', 'reason', 'changed_at'} for events
+    that are no longer on the timeline.
+    """
+    change_id, issued_at = decode_sync_token(token)
+    overlap = timedelta(seconds=CLOCK_OVERLAP_SECONDS)
+    params = {'tid': int(timeline_id), 'cid': change_id, 'since': issued_at - overlap,
+              'since_local': _naive_local(issued_at - overlap), 'limit': MAX_CHANGES + 1,
+              'log_limit': MAX_CHANGES * 5}
+
+    logged = session.execute(text(
+        """
+        SELECT event_id, change, reason, changed_at
+        FROM timeline_event_change
+        WHERE timeline_id = :tid AND (id > :cid OR changed_at > :since)
+        ORDER BY id
+        LIMIT :log_limit
+        """
+    ), params).all()
+    if len(logged) >= params['log_limit']:
+        return None
+    edited = [int(r[0]) for r in session.execute(text(
+        """
+        SELECT e.id
+        FROM event e
+        WHERE e.id IN (
+            SELECT id FROM event WHERE timeline_id = :tid
+            UNION SELECT event_id FROM event_timeline_refs WHERE timeline_id = :tid
+            UNION SELECT event_id FROM event_timeline_association WHERE timeline_id = :tid
+        )
+          AND COALESCE(e.updated_at, e.created_at) > :since_local
+        LIMIT :limit
+        """
+    ), params).all()]
+
+    latest_tombstone = {}
+    for event_id, change, reason, changed_at in logged:
+        if change == 'tombstone':
+            latest_tombstone[int(event_id)] = (reason, changed_at)
+    candidates = set(edited) | {int(r[0]) for r in logged}
+    if len(candidates) > MAX_CHANGES:
+        return None
+
+    present = set(member_ids(sorted(candidates))) if candidates else set()
+    tombstones = []
+    for event_id in sorted(candidates - present):
+        reason, changed_at = latest_tombstone.get(event_id, ('removed', None))
+        tombstones.append({
+            'event_id': event_id,
+            'reason': reason,
+            'changed_at': changed_at.isoformat() if changed_at else None,
+        })
+    return sorted(present), tombstones
+
+
+def prune_changes(session, retention_days=DEFAULT_RETENTION_DAYS, batch_size=PRUNE_BATCH_SIZE):
+    """Delete change rows older than the retention window in batches, committing each. Returns the count."""
+    removed = 0
+    while True:
+        deleted = session.execute(text(
+            """
+            DELETE FROM timeline_event_change
+            WHERE id IN (
+                SELECT id FROM timeline_event_change
+                WHERE changed_at < NOW() - make_interval(days => :days)
+                ORDER BY id
+                LIMIT :limit
+            )
+            """
+        ), {'days': int(retention_days), 'limit': int(batch_size)}).rowcount or 0
+        session.commit()
+        removed += deleted
+        if deleted < batch_size:
+            return removed
@@ -0,0 +1,298 @@
+"""
+Set-based timeline deletion.
+
+Deleting a timeline used to load every direct event into the ORM, lazy-load
+each event's references and delete or re-home events one by one. Here the
+same work is a handful of statements per batch of event ids:
+
+1. Direct events that are also referenced by another timeline move their
+   primary timeline to the lowest such timeline id.
+2. Remaining direct events are deleted together with their event_tags,
+   event_timeline_refs, event_timeline_association, timeline_block_list
+   and vote rows.
+3. The timeline's own refs / associations / block-list rows are removed,
+   tags bound to it are unbound and its info cards are deleted before the
+   timeline row itself, and events mentioning it are re-rendered.
+
+Small timelines are deleted inside the request. Timelines with more than
+TIMELINE_DELETE_SYNC_LIMIT direct events are handed to a background job that
+commits one chunk at a time and records progress in timeline_delete_job.
+Every step is idempotent, so a job interrupted by a worker restart can
+simply be started again.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import text
+from utils.timeline_event_index import reindex_events
+from utils.timeline_changes import record_event_deletions
+from utils.event_mentions import pending_rerenders, rerender_mentions
+from utils.timeline_version import bump_event_timelines
+from utils.typeahead_index import mark_stale
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNC_LIMIT = 2000
+DEFAULT_CHUNK_SIZE = 1000
+# A queued/running job not updated for this long is assumed dead and may be restarted
+STALE_JOB_MINUTES = 10
+
+SYNC_LIMIT = int(os.getenv('TIMELINE_DELETE_SYNC_LIMIT', DEFAULT_SYNC_LIMIT))
+CHUNK_SIZE = int(os.getenv('TIMELINE_DELETE_CHUNK_SIZE', DEFAULT_CHUNK_SIZE))
+
+
+def ensure_timeline_delete_job_table(conn):
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS timeline_delete_job (
+            id SERIAL PRIMARY KEY,
+            timeline_id INTEGER NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            total_events INTEGER NOT NULL DEFAULT 0,
+            processed_events INTEGER NOT NULL DEFAULT 0,
+            rehomed_events INTEGER NOT NULL DEFAULT 0,
+            deleted_events INTEGER NOT NULL DEFAULT 0,
+            error TEXT NULL,
+            requested_by INTEGER NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            finished_at TIMESTAMPTZ NULL
+        );
+        """
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_timeline_delete_job_timeline ON timeline_delete_job (timeline_id, status);"
+    ))
+
+
+def _existing_tables(session, names):
+    rows = session.execute(
+        text("SELECT name FROM unnest(CAST(:names AS TEXT[])) AS name WHERE to_regclass('public.' || name) IS NOT NULL"),
+        {'names': list(names)}
+    ).all()
+    return {r[0] for r in rows}
+
+
+def count_direct_events(session, timeline_id):
+    return int(session.execute(
+        text("SELECT COUNT(*) FROM event WHERE timeline_id = :tid"), {'tid': int(timeline_id)}
+    ).scalar() or 0)
+
+
+def process_event_chunk(session, timeline_id, limit=None):
+    """Re-home or delete up to `limit` direct events of the timeline (all when None).
+
+    Returns (rehomed, deleted). Does not commit.
+    """
+    tid = int(timeline_id)
+    limit_sql = 'LIMIT :limit' if limit else ''
+    params = {'tid': tid}
+    if limit:
+        params['limit'] = int(limit)
+    event_ids = [int(r[0]) for r in session.execute(
+        text(f"SELECT id FROM event WHERE timeline_id = :tid ORDER BY id {limit_sql}"), params
+    ).all()]
+    if not event_ids:
+        return 0, 0
+
+    # 1. Keep events another timeline references; move their primary timeline there
+    rehomed = session.execute(text(
+        """
+        UPDATE event e
+        SET timeline_id = moved.new_timeline_id
+        FROM (
+            SELECT r.event_id, MIN(r.timeline_id) AS new_timeline_id
+            FROM event_timeline_refs r
+            WHERE r.event_id = ANY(:ids)
+              AND r.timeline_id <> :tid
+            GROUP BY r.event_id
+        ) moved
+        WHERE e.id = moved.event_id
+        """
+    ), {'ids': event_ids, 'tid': tid}).rowcount or 0
+
+    # 2. Delete the rest along with the rows that point at them
+    doomed_ids = [int(r[0]) for r in session.execute(
+        text("SELECT id FROM event WHERE id = ANY(:ids) AND timeline_id = :tid"), {'ids': event_ids, 'tid': tid}
+    ).all()]
+    if doomed_ids:
+        tables = _existing_tables(session, ('timeline_block_list', 'vote'))
+        params = {'ids': doomed_ids}
+        # Other timelines still listing these events (shares, hashtags) change too
+        bump_event_timelines(session, doomed_ids)
+        record_event_deletions(session, doomed_ids)
+        session.execute(text("DELETE FROM event_tags WHERE event_id = ANY(:ids)"), params)
+        session.execute(text("DELETE FROM event_timeline_refs WHERE event_id = ANY(:ids)"), params)
+        session.execute(text("DELETE FROM event_timeline_association WHERE event_id = ANY(:ids)"), params)
+        if 'timeline_block_list' in tables:
+            session.execute(text("DELETE FROM timeline_block_list WHERE event_id = ANY(:ids)"), params)
+        if 'vote' in tables:
+            session.execute(text("DELETE FROM vote WHERE event_id = ANY(:ids)"), params)
+        session.execute(text("DELETE FROM event WHERE id = ANY(:ids)"), params)
+
+    # Re-homed events changed their direct timeline; rows of the doomed timeline go with it (cascade)
+    if rehomed:
+        doomed = set(doomed_ids)
+        reindex_events(session, [i for i in event_ids if i not in doomed])
+
+    return int(rehomed), len(doomed_ids)
+
+
+def detach_and_delete_timeline(session, timeline_id):
+    """Remove the timeline's membership rows, unbind its tags and delete it. Does not commit."""
+    params = {'tid': int(timeline_id)}
+    tables = _existing_tables(session, ('timeline_block_list', 'community_info_card'))
+    session.execute(text("DELETE FROM event_timeline_refs WHERE timeline_id = :tid"), params)
+    session.execute(text("DELETE FROM event_timeline_association WHERE timeline_id = :tid"), params)
+    session.execute(text(
+        "UPDATE event_timeline_association SET source_timeline_id = NULL WHERE source_timeline_id = :tid"
+    ), params)
+    if 'timeline_block_list' in tables:
+        session.execute(text("DELETE FROM timeline_block_list WHERE timeline_id = :tid"), params)
+    session.execute(text("UPDATE tag SET timeline_id = NULL WHERE timeline_id = :tid"), params)
+    if 'community_info_card' in tables:
+        session.execute(text("DELETE FROM community_info_card WHERE timeline_id = :tid"), params)
+    deleted = (session.execute(text("DELETE FROM timeline WHERE id = :tid"), params).rowcount or 0) > 0
+    if deleted:
+        mark_stale(session)
+        # Mentions of this timeline no longer resolve to it
+        for kind in ('hashtag', 'community'):
+            rerender_mentions(session, kind, target_ids=[timeline_id], pending=pending_rerenders(session))
+    return deleted
+
+
+def delete_timeline_now(session, timeline_id):
+    """Delete a timeline in one transaction. Returns {'rehomed_events', 'deleted_events'}."""
+    try:
+        rehomed, deleted = process_event_chunk(session, timeline_id)
+        detach_and_delete_timeline(session, timeline_id)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return {'rehomed_events': rehomed, 'deleted_events': deleted}
+
+
+def serialize_job(row):
+    if not row:
+        return None
+
+    def _iso(value):
+        return value.isoformat() if hasattr(value, 'isoformat') else None
+
+    total = int(row['total_events'] or 0)
+    processed = int(row['processed_events'] or 0)
+    return {
+        'job_id': int(row['id']),
+        'timeline_id': int(row['timeline_id']),
+        'status': row['status'],
+        'total_events': total,
+        'processed_events': processed,
+        'rehomed_events': int(row['rehomed_events'] or 0),
+        'deleted_events': int(row['deleted_events'] or 0),
+        'progress': round(processed / total, 4) if total else (1.0 if row['status'] == 'completed' else 0.0),
+        'error': row['error'],
+        'created_at': _iso(row['created_at']),
+        'updated_at': _iso(row['updated_at']),
+        'finished_at': _iso(row['finished_at']),
+    }
+
+
+def get_job(session, job_id):
+    row = session.execute(text("SELECT * FROM timeline_delete_job WHERE id = :id"), {'id': int(job_id)}).mappings().first()
+    return serialize_job(row)
+
+
+def find_active_job(session, timeline_id):
+    """Latest queued/running job for the timeline that has reported progress recently."""
+    row = session.execute(text(
+        f"""
+        SELECT * FROM timeline_delete_job
+        WHERE timeline_id = :tid
+          AND status IN ('queued', 'running')
+          AND updated_at > NOW() - INTERVAL '{STALE_JOB_MINUTES} minutes'
+        ORDER BY id DESC
+        LIMIT 1
+        """
+    ), {'tid': int(timeline_id)}).mappings().first()
+    return serialize_job(row)
+
+
+def create_job(session, timeline_id, total_events, requested_by=None):
+    job_id = session.execute(text(
+        """
+        INSERT INTO timeline_delete_job (timeline_id, status, total_events, requested_by)
+        VALUES (:tid, 'queued', :total, :uid)
+        RETURNING id
+        """
+    ), {'tid': int(timeline_id), 'total': int(total_events), 'uid': requested_by}).scalar()
+    session.commit()
+    return int(job_id)
+
+
+def _update_job(session, job_id, **fields):
+    assignments = ', '.join(f"{name} = :{name}" for name in fields)
+    session.execute(
+        text(f"UPDATE timeline_delete_job SET {assignments}, updated_at = NOW() WHERE id = :job_id"),
+        dict(fields, job_id=int(job_id))
+    )
+    session.commit()
+
+
+def run_job(session, job_id, timeline_id, chunk_size=CHUNK_SIZE):
+    """Process a deletion job chunk by chunk, committing progress after each chunk."""
+    processed = rehomed_total = deleted_total = 0
+    _update_job(session, job_id, status='running')
+    try:
+        while True:
+            rehomed, deleted = process_event_chunk(session, timeline_id, limit=chunk_size)
+            if not rehomed and not deleted:
+                break
+            session.commit()
+            processed += rehomed + deleted
+            rehomed_total += rehomed
+            deleted_total += deleted
+            _update_job(session, job_id, processed_events=processed,
+                        rehomed_events=rehomed_total, deleted_events=deleted_total)
+        detach_and_delete_timeline(session, timeline_id)
+        session.commit()
+        session.execute(text(
+            "UPDATE timeline_delete_job SET status = 'completed', finished_at = NOW(), updated_at = NOW() WHERE id = :id"
+        ), {'id': int(job_id)})
+        session.commit()
+        logger.info(f"timeline {timeline_id} deleted by job {job_id} ({processed} events)")
+    except Exception as e:
+        session.rollback()
+        logger.error(f"timeline delete job {job_id} failed: {e}")
+        try:
+            session.execute(text(
+                "UPDATE timeline_delete_job SET status = 'failed', error = :err, finished_at = NOW(), updated_at = NOW() WHERE id = :id"
+            ), {'id': int(job_id), 'err': str(e)[:2000]})
+            session.commit()
+        except Exception:
+            session.rollback()
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def submit_job(app, db, job_id, timeline_id):
+    """Run the job on this worker's background thread (one deletion at a time per worker)."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='timeline-delete')
+            _executor_pid = os.getpid()
+        executor = _executor
+
+    def _run():
+        with app.app_context():
+            try:
+                run_job(db.session, job_id, timeline_id)
+            finally:
+                db.session.remove()
+
+    return executor.submit(_run)
@@ -0,0 +1,117 @@
+"""
+Level-of-detail buckets for zoomed-out timelines.
+
+At far zoom levels the frontend only needs to know how many events fall in
+each hour/day/month/year/decade and a few events worth drawing. bucket_events()
+groups the feed membership set (utils/timeline_feed.feed_members_sql) with
+date_trunc and picks the top events per bucket with a window function, so
+the response size depends on the number of buckets, not on the number of
+events.
+"""
+import logging
+from sqlalchemy import text
+from utils.timeline_feed import FeedArgumentError, feed_members_sql
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day', 'week', 'month', 'year', 'decade')
+RANKINGS = ('votes', 'recent')
+DEFAULT_GRANULARITY = 'month'
+DEFAULT_PER_BUCKET = 3
+MAX_PER_BUCKET = 10
+MAX_BUCKETS = 2000
+# Votes do not bump the timeline version; vote-ranked responses are keyed by this window instead
+VOTE_RANK_WINDOW_SECONDS = 60
+
+
+def parse_density_args(granularity=None, rank=None, per_bucket=None):
+    """Validate the density query values; returns (granularity, rank, per_bucket)."""
+    granularity = (granularity or DEFAULT_GRANULARITY).lower()
+    if granularity not in GRANULARITIES:
+        raise FeedArgumentError(f"Invalid 'granularity' (use one of {', '.join(GRANULARITIES)})")
+    rank = (rank or 'votes').lower()
+    if rank not in RANKINGS:
+        raise FeedArgumentError("Invalid 'rank' (use 'votes' or 'recent')")
+    try:
+        per_bucket = int(per_bucket) if per_bucket not in (None, '') else DEFAULT_PER_BUCKET
+    except (TypeError, ValueError):
+        raise FeedArgumentError("Invalid 'per_bucket'")
+    return granularity, rank, max(0, min(per_bucket, MAX_PER_BUCKET))
+
+
+def _vote_table_exists(session):
+    row = session.execute(text("SELECT to_regclass('public.vote')")).first()
+    return bool(row and row[0])
+
+
+def bucket_events(session, timeline_id, granularity, date_from=None, date_to=None,
+                  rank='votes', per_bucket=DEFAULT_PER_BUCKET):
+    """Count a timeline's events per date bucket and pick representatives.
+
+    Args:
+        session: SQLAlchemy session.
+        timeline_id: timeline whose events are bucketed.
+        granularity: one of GRANULARITIES (a date_trunc field).
+        date_from / date_to: optional inclusive event_date window.
+        rank: 'votes' (promotes minus demotes, then newest) or 'recent'
+            (most recently created first) for choosing representatives.
+        per_bucket: representatives per bucket (0 for counts only).
+
+    Returns:
+        list of {'start': datetime, 'count': int, 'event_ids': [...]} in
+        date order. Raises FeedArgumentError when there would be more than
+        MAX_BUCKETS buckets.
+    """
+    if granularity not in GRANULARITIES:
+        raise FeedArgumentError("Invalid 'granularity'")
+    params = {'tid': int(timeline_id), 'unit': granularity, 'limit': MAX_BUCKETS + 1, 'per_bucket': int(per_bucket)}
+    members_sql = feed_members_sql(session, params, date_from, date_to)
+
+    rows = session.execute(text(
+        f"""
+        WITH members AS ({members_sql})
+        SELECT date_trunc(:unit, m.event_date) AS bucket, COUNT(*) AS n
+        FROM members m
+        GROUP BY 1
+        ORDER BY 1
+        LIMIT :limit
+        """
+    ), params).all()
+    if len(rows) > MAX_BUCKETS:
+        raise FeedArgumentError('Too many buckets; use a coarser granularity or a narrower date range')
+    buckets = [{'start': bucket, 'count': int(count), 'event_ids': []} for bucket, count in rows]
+    if not buckets or per_bucket <= 0:
+        return buckets
+
+    if rank == 'votes' and _vote_table_exists(session):
+        score_join = """
+            LEFT JOIN (
+                SELECT v.event_id,
+                       SUM(CASE v.vote_type WHEN 'promote' THEN 1 WHEN 'demote' THEN -1 ELSE 0 END) AS score
+                FROM vote v
+                JOIN members vm ON vm.event_id = v.event_id
+                GROUP BY v.event_id
+            ) s ON s.event_id = m.event_id
+        """
+        order_sql = 'COALESCE(s.score, 0) DESC, e.created_at DESC NULLS LAST, m.event_id DESC'
+    else:
+        score_join = ''
+        order_sql = 'e.created_at DESC NULLS LAST, m.event_id DESC'
+    rows = session.execute(text(
+        f"""
+        WITH members AS ({members_sql}),
+        ranked AS (
+            SELECT date_trunc(:unit, m.event_date) AS bucket, m.event_id,
+                   ROW_NUMBER() OVER (PARTITION BY date_trunc(:unit, m.event_date) ORDER BY {order_sql}) AS pos
+            FROM members m
+            JOIN event e ON e.id = m.event_id
+            {score_join}
+        )
+        SELECT bucket, event_id FROM ranked WHERE pos <= :per_bucket ORDER BY bucket, pos
+        """
+    ), params).all()
+    by_start = {b['start']: b for b in buckets}
+    for bucket, event_id in rows:
+        if bucket in by_start:
+            by_start[bucket]['event_ids'].append(int(event_id))
+    return buckets
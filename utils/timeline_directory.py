@@ -0,0 +1,250 @@
+"""
+Paginated timeline directory with name search.
+
+The timeline picker used to download the whole timeline table. list_timelines()
+projects only the directory columns, filters (type, visibility, bans,
+other users' personal timelines) and pages in SQL with a keyset cursor, and
+searches names three ways:
+
+  - prefix: LOWER(name) LIKE 'q%', compared in the "C" collation
+  - fuzzy: pg_trgm similarity on LOWER(name), backed by a GIN trigram index
+    and ordered by similarity
+  - without pg_trgm (extension not installable), fuzzy falls back to a
+    substring match ordered by name
+
+Name order compares LOWER(name) COLLATE "C" so the (LOWER(name) COLLATE "C",
+id) index serves the prefix range, the ORDER BY and the keyset comparison
+whatever the database collation. Cursors record the ordering they were issued for and are
+rejected under another one.
+"""
+import base64
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import text
+from utils.timeline_feed import FeedArgumentError
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_TYPES = ('hashtag', 'community', 'personal')
+VISIBILITIES = ('public', 'private')
+SEARCH_MODES = ('prefix', 'fuzzy')
+SORTS = ('recent', 'name')
+MAX_QUERY_LENGTH = 100
+# pg_trgm's default similarity threshold is 0.3; a bit lower suits short names
+DEFAULT_SIMILARITY = 0.2
+
+_state = {'trgm': False}
+
+
+def ensure_timeline_directory_indexes(conn):
+    """Indexes for directory paging and name search; pg_trgm is optional."""
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_timeline_created_id ON timeline (created_at DESC, id DESC)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_timeline_lower_name_pattern ON timeline (LOWER(name) text_pattern_ops, id)"
+    ))
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS idx_timeline_lower_name_c ON timeline ((LOWER(name) COLLATE "C"), id)'
+    ))
+    try:
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_timeline_name_trgm ON timeline USING gin (LOWER(name) gin_trgm_ops)"
+            ))
+        _state['trgm'] = True
+    except Exception as e:
+        _state['trgm'] = False
+        logger.info(f"timeline directory: pg_trgm unavailable, fuzzy search uses substring matching ({e})")
+
+
+def trigram_search_available():
+    return _state['trgm']
+
+
+def _encode_cursor(values):
+    payload = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor, ordering):
+    """Keyset values of a cursor issued for ordering ('score', 'name' or 'recent')."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        if not isinstance(values, list) or len(values) != 3 or values[0] != ordering:
+            raise ValueError('cursor shape')
+        return values[1:]
+    except Exception:
+        raise FeedArgumentError('Invalid cursor')
+
+
+def _split_choices(value, choices, name):
+    if not value:
+        return []
+    picked = []
+    for part in str(value).split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part not in choices:
+            raise FeedArgumentError(f"Invalid '{name}' (use {', '.join(choices)})")
+        if part not in picked:
+            picked.append(part)
+    return picked
+
+
+def parse_directory_args(types=None, visibility=None, q=None, mode=None, sort=None):
+    """Validate directory query values into a filter dict."""
+    query = ' '.join(str(q or '').split()).lower()
+    if len(query) > MAX_QUERY_LENGTH:
+        raise FeedArgumentError("'q' is too long")
+    mode = (mode or 'prefix').lower()
+    if mode not in SEARCH_MODES:
+        raise FeedArgumentError("Invalid 'mode' (use prefix or fuzzy)")
+    if sort:
+        sort = sort.lower()
+        if sort not in SORTS:
+            raise FeedArgumentError("Invalid 'sort' (use recent or name)")
+    else:
+        # A name prefix reads best alphabetically; browsing reads best newest first
+        sort = 'name' if query else 'recent'
+    return {
+        'types': _split_choices(types, TIMELINE_TYPES, 'type'),
+        'visibility': _split_choices(visibility, VISIBILITIES, 'visibility'),
+        'q': query,
+        'mode': mode,
+        'sort': sort,
+    }
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def list_timelines(session, filters, limit, cursor=None, viewer_id=None, banned_timeline_ids=None):
+    """Return one directory page.
+
+    Args:
+        session: SQLAlchemy session.
+        filters: result of parse_directory_args().
+        limit: page size (already clamped by the caller).
+        cursor: opaque cursor from the previous page.
+        viewer_id: current user id; personal timelines of other users are hidden.
+        banned_timeline_ids: timeline ids left out of the directory.
+
+    Returns:
+        (rows, next_cursor) where rows are dicts of the directory columns and
+        next_cursor is None on the last page.
+    """
+    params = {'limit': int(limit) + 1}
+    where = []
+    if filters['types']:
+        where.append('t.timeline_type = ANY(:types)')
+        params['types'] = filters['types']
+    if filters['visibility']:
+        where.append("COALESCE(t.visibility, 'public') = ANY(:visibility)")
+        params['visibility'] = filters['visibility']
+    if banned_timeline_ids:
+        where.append('t.id <> ALL(:banned)')
+        params['banned'] = sorted(int(i) for i in banned_timeline_ids)
+    if viewer_id is None:
+        where.append("t.timeline_type <> 'personal'")
+    else:
+        where.append("(t.timeline_type <> 'personal' OR t.created_by = :viewer)")
+        params['viewer'] = int(viewer_id)
+
+    query = filters['q']
+    fuzzy = bool(query) and filters['mode'] == 'fuzzy'
+    score_sql = 'NULL'
+    if query and not fuzzy:
+        where.append("LOWER(t.name) COLLATE \"C\" LIKE :prefix ESCAPE '\\'")
+        params['prefix'] = _escape_like(query) + '%'
+    elif fuzzy and _state['trgm']:
+        # The % operator is what the GIN index answers; its threshold is set for this transaction only
+        session.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+            {'threshold': str(DEFAULT_SIMILARITY)}
+        )
+        where.append('LOWER(t.name) % :q')
+        params['q'] = query
+        # Rounded so the value survives the round trip through the cursor
+        score_sql = 'ROUND(similarity(LOWER(t.name), :q)::numeric, 6)'
+    elif fuzzy:
+        where.append("LOWER(t.name) LIKE :contains ESCAPE '\\'")
+        params['contains'] = '%' + _escape_like(query) + '%'
+
+    if fuzzy and _state['trgm']:
+        ordering = 'score'
+        key_sql = f'({score_sql}, t.id)'
+        order_sql = f'{score_sql} DESC, t.id DESC'
+        comparator = '<'
+    elif filters['sort'] == 'name':
+        ordering = 'name'
+        key_sql = '(LOWER(t.name) COLLATE "C", t.id)'
+        order_sql = 'LOWER(t.name) COLLATE "C" ASC, t.id ASC'
+        comparator = '>'
+    else:
+        ordering = 'recent'
+        key_sql = '(t.created_at, t.id)'
+        order_sql = 't.created_at DESC, t.id DESC'
+        comparator = '<'
+    position = _decode_cursor(cursor, ordering)
+    if position is not None:
+        try:
+            if ordering == 'score':
+                position[0] = float(position[0])
+            elif ordering == 'recent':
+                position[0] = datetime.fromisoformat(position[0])
+            elif not isinstance(position[0], str):
+                raise ValueError('cursor name')
+            position[1] = int(position[1])
+        except (TypeError, ValueError):
+            raise FeedArgumentError('Invalid cursor')
+        where.append(f'{key_sql} {comparator} (:cursor_0, :cursor_1)')
+        params['cursor_0'], params['cursor_1'] = position
+
+    where_sql = ('WHERE ' + ' AND '.join(where)) if where else ''
+    rows = session.execute(text(
+        f"""
+        SELECT t.id, t.name, t.description, t.timeline_type, COALESCE(t.visibility, 'public') AS visibility,
+               t.created_by, t.created_at, t.cover_image_url, {score_sql} AS score, LOWER(t.name) AS lname
+        FROM timeline t
+        {where_sql}
+        ORDER BY {order_sql}
+        LIMIT :limit
+        """
+    ), params).mappings().all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        if ordering == 'score':
+            next_cursor = _encode_cursor([ordering, str(last['score']), int(last['id'])])
+        elif ordering == 'name':
+            next_cursor = _encode_cursor([ordering, last['lname'], int(last['id'])])
+        else:
+            next_cursor = _encode_cursor([ordering, last['created_at'].isoformat(), int(last['id'])])
+
+    results = []
+    for row in rows:
+        item = {
+            'id': int(row['id']),
+            'name': row['name'],
+            'description': row['description'],
+            'timeline_type': row['timeline_type'],
+            'visibility': row['visibility'],
+            'created_by': row['created_by'],
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'cover_image_url': row['cover_image_url'],
+        }
+        if fuzzy and _state['trgm']:
+            item['score'] = round(float(row['score']), 4)
+        results.append(item)
+    return results, next_cursor
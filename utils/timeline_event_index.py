@@ -0,0 +1,304 @@
+"""
+Denormalized timeline/event membership.
+
+An event shows up on a timeline through four mechanisms: its own
+event.timeline_id, event_timeline_refs, event_timeline_association and
+hashtag timelines whose LOWER(name) matches one of its tag names. Read paths
+used to rebuild that union per request. timeline_event_index stores one row
+per (timeline_id, event_id) with the event_date and the strongest source
+(direct > ref > association > hashtag), so "events in timeline T ordered by
+date" is a single range scan on (timeline_id, event_date, event_id).
+
+Pairs removed from a timeline through a resolved 'remove' report are left
+out, matching what the feeds already hide.
+
+Maintenance is explicit: writers call reindex_events() (or reindex_timeline()
+for a hashtag timeline that was created or renamed) inside their own
+transaction, after flushing, which also bumps the affected timelines' versions
+(utils/timeline_version.py) and logs the membership changes for delta sync
+(utils/timeline_changes.py). Rows disappear with their event or timeline via
+ON DELETE CASCADE. Readers switch to the index only after the backfill has
+been recorded (scripts/backfill_timeline_event_index.py);
+scripts/check_timeline_event_index.py compares it against the live union.
+"""
+import logging
+import time
+from sqlalchemy import text
+from utils.timeline_changes import record_membership_changes
+from utils.timeline_version import bump_timeline_versions, set_event_index_available
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+# How long a "not backfilled yet" answer is trusted before asking the DB again
+READINESS_RECHECK_SECONDS = 30.0
+
+_state = {
+    'table': False,
+    'reports_table': False,
+    'read_ready': False,
+    'read_checked_at': 0.0,
+}
+
+
+def ensure_timeline_event_index_schema(conn):
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS timeline_event_index (
+            timeline_id INTEGER NOT NULL REFERENCES timeline(id) ON DELETE CASCADE,
+            event_id INTEGER NOT NULL REFERENCES event(id) ON DELETE CASCADE,
+            event_date TIMESTAMP NOT NULL,
+            source VARCHAR(16) NOT NULL,
+            PRIMARY KEY (timeline_id, event_id)
+        );
+        """
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_timeline_event_index_range ON timeline_event_index (timeline_id, event_date, event_id, source);"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_timeline_event_index_event ON timeline_event_index (event_id);"
+    ))
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS timeline_event_index_state (
+            id SMALLINT PRIMARY KEY CHECK (id = 1),
+            backfilled_at TIMESTAMPTZ NULL
+        );
+        """
+    ))
+    _state['table'] = True
+    set_event_index_available()
+
+
+def _reports_table_exists(conn):
+    if not _state['reports_table']:
+        row = conn.execute(text("SELECT to_regclass('public.reports')")).first()
+        _state['reports_table'] = bool(row and row[0])
+    return _state['reports_table']
+
+
+def _membership_sql(conn, scope):
+    """SELECT producing (timeline_id, event_id, event_date, source) rows for a scope.
+
+    scope 'events' binds :ids (event ids), scope 'timeline' binds :tid.
+    """
+    if scope == 'events':
+        direct, refs, assoc, hashtag = ('id = ANY(:ids)', 'event_id = ANY(:ids)',
+                                        'event_id = ANY(:ids)', 'et.event_id = ANY(:ids)')
+    else:
+        direct, refs, assoc, hashtag = ('timeline_id = :tid', 'timeline_id = :tid',
+                                        'timeline_id = :tid', 't.id = :tid')
+    removed_sql = ''
+    if _reports_table_exists(conn):
+        removed_sql = """
+        WHERE NOT EXISTS (
+            SELECT 1 FROM reports r
+            WHERE r.timeline_id = c.timeline_id
+              AND r.event_id = c.event_id
+              AND r.status = 'resolved'
+              AND r.resolution = 'remove'
+        )
+        """
+    return f"""
+        WITH candidates AS (
+            SELECT id AS event_id, timeline_id, 1 AS rank FROM event WHERE {direct}
+            UNION ALL
+            SELECT event_id, timeline_id, 2 FROM event_timeline_refs WHERE {refs}
+            UNION ALL
+            SELECT event_id, timeline_id, 3 FROM event_timeline_association WHERE {assoc}
+            UNION ALL
+            SELECT et.event_id, t.id, 4
+            FROM event_tags et
+            JOIN tag g ON g.id = et.tag_id
+            JOIN timeline t ON t.timeline_type = 'hashtag' AND LOWER(t.name) = LOWER(g.name)
+            WHERE {hashtag}
+        )
+        SELECT DISTINCT ON (c.timeline_id, c.event_id)
+               c.timeline_id, c.event_id, e.event_date,
+               (ARRAY['direct', 'ref', 'association', 'hashtag'])[c.rank] AS source
+        FROM candidates c
+        JOIN event e ON e.id = c.event_id
+        JOIN timeline tl ON tl.id = c.timeline_id
+        {removed_sql}
+        ORDER BY c.timeline_id, c.event_id, c.rank
+    """
+
+
+def _upsert(conn, select_sql, params):
+    """Insert the membership rows; returns their (timeline_id, event_id) pairs."""
+    rows = conn.execute(text(
+        f"""
+        INSERT INTO timeline_event_index (timeline_id, event_id, event_date, source)
+        {select_sql}
+        ON CONFLICT (timeline_id, event_id)
+        DO UPDATE SET event_date = EXCLUDED.event_date, source = EXCLUDED.source
+        RETURNING timeline_id, event_id
+        """
+    ), params).all()
+    return [(r[0], r[1]) for r in rows]
+
+
+def reindex_events(conn, event_ids, record_changes=True):
+    """Recompute the index rows of the given events. Does not commit.
+
+    conn may be a Connection or a Session; call after flushing the writes
+    that changed membership. Every timeline the events left or (still)
+    appear on gets its version bumped and, unless record_changes is False
+    (backfill), a delta sync entry. Returns the number of rows written.
+    A no-op until the index table exists.
+    """
+    ids = sorted({int(i) for i in event_ids or [] if i is not None})
+    if not ids or not _state['table']:
+        return 0
+    previous = conn.execute(
+        text("DELETE FROM timeline_event_index WHERE event_id = ANY(:ids) RETURNING timeline_id, event_id"),
+        {'ids': ids}
+    ).all()
+    current = _upsert(conn, _membership_sql(conn, 'events'), {'ids': ids})
+    if record_changes:
+        record_membership_changes(conn, previous, current)
+    bump_timeline_versions(conn, [r[0] for r in previous] + [r[0] for r in current])
+    return len(current)
+
+
+def reindex_timeline(conn, timeline_id):
+    """Recompute every index row of one timeline (e.g. a hashtag timeline created or renamed)."""
+    if timeline_id is None or not _state['table']:
+        return 0
+    params = {'tid': int(timeline_id)}
+    previous = conn.execute(
+        text("DELETE FROM timeline_event_index WHERE timeline_id = :tid RETURNING timeline_id, event_id"), params
+    ).all()
+    written = _upsert(conn, _membership_sql(conn, 'timeline'), params)
+    record_membership_changes(conn, previous, written)
+    bump_timeline_versions(conn, [timeline_id])
+    return len(written)
+
+
+def index_read_ready(session):
+    """True once the index table exists and a backfill has completed."""
+    if _state['read_ready']:
+        return True
+    if not _state['table']:
+        return False
+    now = time.monotonic()
+    if now - _state['read_checked_at'] < READINESS_RECHECK_SECONDS:
+        return False
+    _state['read_checked_at'] = now
+    try:
+        row = session.execute(text("SELECT backfilled_at FROM timeline_event_index_state WHERE id = 1")).first()
+    except Exception as e:
+        logger.info(f"timeline event index readiness check failed: {e}")
+        return False
+    _state['read_ready'] = bool(row and row[0])
+    return _state['read_ready']
+
+
+def feed_member_ids(session, timeline_id, event_ids):
+    """Subset of event_ids listed on the timeline's feed (every source but hashtag).
+
+    Reads the index once it is backfilled, the live membership otherwise.
+    """
+    ids = sorted({int(i) for i in event_ids or [] if i is not None})
+    if not ids:
+        return set()
+    params = {'tid': int(timeline_id), 'ids': ids}
+    if index_read_ready(session):
+        rows = session.execute(text(
+            """
+            SELECT event_id FROM timeline_event_index
+            WHERE timeline_id = :tid AND event_id = ANY(:ids) AND source <> 'hashtag'
+            """
+        ), params).all()
+    else:
+        rows = session.execute(text(
+            f"""
+            WITH live AS ({_membership_sql(session, 'events')})
+            SELECT event_id FROM live WHERE timeline_id = :tid AND source <> 'hashtag'
+            """
+        ), params).all()
+    return {int(r[0]) for r in rows}
+
+
+def _event_id_batches(session, batch_size):
+    last_id = 0
+    while True:
+        ids = [int(r[0]) for r in session.execute(
+            text("SELECT id FROM event WHERE id > :last ORDER BY id LIMIT :limit"),
+            {'last': last_id, 'limit': int(batch_size)}
+        ).all()]
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def backfill(session, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Rebuild the index for every event in batches, committing each batch.
+
+    Records backfilled_at when done so readers switch over. Safe to re-run.
+    Returns the number of events processed.
+    """
+    ensure_timeline_event_index_schema(session)
+    session.commit()
+    processed = 0
+    for ids in _event_id_batches(session, batch_size):
+        reindex_events(session, ids, record_changes=False)
+        session.commit()
+        processed += len(ids)
+        if progress:
+            progress(processed)
+    session.execute(text(
+        """
+        INSERT INTO timeline_event_index_state (id, backfilled_at) VALUES (1, NOW())
+        ON CONFLICT (id) DO UPDATE SET backfilled_at = EXCLUDED.backfilled_at
+        """
+    ))
+    session.commit()
+    return processed
+
+
+def check_consistency(session, batch_size=DEFAULT_BATCH_SIZE, repair=False, sample_size=20):
+    """Compare the index with the live membership union, batch by batch.
+
+    Returns {'events_checked', 'missing', 'extra', 'mismatched', 'repaired_events', 'samples'}
+    where samples lists up to sample_size differing (timeline_id, event_id, problem) tuples.
+    With repair=True, events with differences are reindexed and committed.
+    """
+    ensure_timeline_event_index_schema(session)
+    session.commit()
+    report = {'events_checked': 0, 'missing': 0, 'extra': 0, 'mismatched': 0,
+              'repaired_events': 0, 'samples': []}
+    for ids in _event_id_batches(session, batch_size):
+        rows = session.execute(text(
+            f"""
+            WITH expected AS ({_membership_sql(session, 'events')})
+            SELECT COALESCE(x.timeline_id, i.timeline_id) AS timeline_id,
+                   COALESCE(x.event_id, i.event_id) AS event_id,
+                   CASE
+                       WHEN i.event_id IS NULL THEN 'missing'
+                       WHEN x.event_id IS NULL THEN 'extra'
+                       ELSE 'mismatched'
+                   END AS problem
+            FROM expected x
+            FULL OUTER JOIN (
+                SELECT * FROM timeline_event_index WHERE event_id = ANY(:ids)
+            ) i ON i.timeline_id = x.timeline_id AND i.event_id = x.event_id
+            WHERE i.event_id IS NULL
+               OR x.event_id IS NULL
+               OR i.source <> x.source
+               OR i.event_date IS DISTINCT FROM x.event_date
+            """
+        ), {'ids': ids}).all()
+        report['events_checked'] += len(ids)
+        for timeline_id, event_id, problem in rows:
+            report[problem] += 1
+            if len(report['samples']) < sample_size:
+                report['samples'].append((int(timeline_id), int(event_id), problem))
+        if repair and rows:
+            broken = {int(r[1]) for r in rows}
+            reindex_events(session, broken)
+            session.commit()
+            report['repaired_events'] += len(broken)
+    return report
@@ -0,0 +1,94 @@
+"""
+Faceted counts over a timeline's events.
+
+The timeline filters (event type, media subtype, tags, creators) used to be
+counted client-side from the full event list. compute_facets() runs grouped
+aggregates over the feed membership set instead (see
+utils/timeline_feed.feed_members_sql), optionally inside a date range, with
+three queries regardless of the timeline's size. Callers cache the result
+per timeline version.
+"""
+import logging
+from sqlalchemy import text
+from utils.tag_resolver import HASHTAG_KEY_SQL
+from utils.timeline_feed import feed_members_sql
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 50
+
+
+def compute_facets(session, timeline_id, date_from=None, date_to=None, top_n=DEFAULT_TOP_N,
+                   banned_timeline_names=None):
+    """Return facet counts for a timeline's events.
+
+    Args:
+        session: SQLAlchemy session.
+        timeline_id: timeline whose events are counted.
+        date_from / date_to: optional inclusive event_date window.
+        top_n: how many tags and creators to return.
+        banned_timeline_names: normalized names of banned timelines; tags
+            with a matching key are left out, as in the event payloads.
+
+    Returns:
+        {'total': int, 'type': [...], 'media_subtype': [...], 'tags': [...],
+        'creators': [...]}, each list holding {'value', 'count'} dicts
+        (tags add 'name', creators add 'username') ordered by count.
+    """
+    params = {'tid': int(timeline_id), 'top': int(top_n)}
+    members_sql = feed_members_sql(session, params, date_from, date_to)
+
+    facets = {'total': 0, 'type': [], 'media_subtype': [], 'tags': [], 'creators': []}
+    rows = session.execute(text(
+        f"""
+        WITH members AS ({members_sql})
+        SELECT GROUPING(e.type) AS g_type, GROUPING(e.media_subtype) AS g_subtype,
+               e.type, e.media_subtype, COUNT(*) AS n
+        FROM members m
+        JOIN event e ON e.id = m.event_id
+        GROUP BY GROUPING SETS ((e.type), (e.media_subtype), ())
+        ORDER BY n DESC, e.type, e.media_subtype
+        """
+    ), params).all()
+    for g_type, g_subtype, event_type, media_subtype, count in rows:
+        if g_type and g_subtype:
+            facets['total'] = int(count)
+        elif not g_type:
+            facets['type'].append({'value': event_type, 'count': int(count)})
+        elif media_subtype is not None:
+            facets['media_subtype'].append({'value': media_subtype, 'count': int(count)})
+
+    params['banned'] = sorted(banned_timeline_names or ())
+    key_sql = HASHTAG_KEY_SQL.format(col='g.name')
+    rows = session.execute(text(
+        f"""
+        WITH members AS ({members_sql})
+        SELECT {key_sql} AS key, MIN(g.name) AS name, COUNT(DISTINCT m.event_id) AS n
+        FROM members m
+        JOIN event_tags et ON et.event_id = m.event_id
+        JOIN tag g ON g.id = et.tag_id
+        WHERE {key_sql} <> ALL(CAST(:banned AS TEXT[]))
+        GROUP BY 1
+        ORDER BY n DESC, key
+        LIMIT :top
+        """
+    ), params).all()
+    facets['tags'] = [{'value': key, 'name': name, 'count': int(count)} for key, name, count in rows]
+
+    rows = session.execute(text(
+        f"""
+        WITH members AS ({members_sql})
+        SELECT e.created_by, u.username, COUNT(*) AS n
+        FROM members m
+        JOIN event e ON e.id = m.event_id
+        LEFT JOIN "user" u ON u.id = e.created_by
+        GROUP BY e.created_by, u.username
+        ORDER BY n DESC, e.created_by
+        LIMIT :top
+        """
+    ), params).all()
+    facets['creators'] = [
+        {'value': created_by, 'username': username, 'count': int(count)} for created_by, username, count in rows
+    ]
+    return facets
@@ -0,0 +1,331 @@
+"""
+Keyset-paginated event feed for a single timeline.
+
+Membership (direct events, event_timeline_refs and event_timeline_association)
+is unioned in the database and pages are taken with a (event_date, id) keyset,
+so a request only ever reads one page of rows no matter how large the
+timeline is. Once timeline_event_index has been backfilled the page is read
+from it directly instead of rebuilding the union.
+
+Pages can be narrowed by tags: every tag in 'all', at least one in 'any' and
+none in 'not'. Tag names are matched on their normalized key (see
+utils/tag_resolver.normalize_tag_name), resolved to tag ids once through an
+expression index, and applied as EXISTS clauses on event_tags inside the
+same keyset query.
+"""
+import base64
+import json
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import text
+from utils.tag_resolver import HASHTAG_KEY_SQL, normalize_tag_name
+from utils.timeline_event_index import index_read_ready
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_FILTER_TAGS = 20
+
+
+class FeedArgumentError(ValueError):
+    """Raised when feed query parameters cannot be parsed."""
+
+
+def encode_cursor(event_date, event_id):
+    payload = json.dumps({'d': event_date.isoformat(), 'i': int(event_id)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return datetime.fromisoformat(payload['d']), int(payload['i'])
+    except Exception:
+        raise FeedArgumentError('Invalid cursor')
+
+
+def parse_feed_datetime(value, name):
+    """Parse an ISO date/datetime query value into a naive datetime (event_date is naive)."""
+    if value in (None, ''):
+        return None
+    try:
+        raw = str(value).strip()
+        if raw.endswith('Z'):
+            raw = raw[:-1] + '+00:00'
+        parsed = datetime.fromisoformat(raw)
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    except Exception:
+        raise FeedArgumentError(f"Invalid '{name}' date")
+
+
+def parse_page_size(value):
+    try:
+        size = int(value) if value not in (None, '') else DEFAULT_PAGE_SIZE
+    except (TypeError, ValueError):
+        raise FeedArgumentError("Invalid 'limit'")
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def ensure_tag_filter_indexes(conn):
+    """Indexes behind tag filtering: tag by normalized key, event_tags in both directions."""
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS idx_tag_key ON tag (({HASHTAG_KEY_SQL.format(col='name')}))"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_event_tags_tag_event ON event_tags (tag_id, event_id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_event_tags_event_tag ON event_tags (event_id, tag_id)"))
+
+
+def _split_tag_names(value):
+    if not value:
+        return []
+    keys = []
+    for raw in str(value).split(','):
+        key = normalize_tag_name(raw)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def parse_tag_filter(tag=None, all_tags=None, any_tags=None, not_tags=None):
+    """Build a tag filter from query values (comma-separated tag names).
+
+    tag is the legacy single-tag parameter and joins the 'all' set.
+    Returns None when no tag was given, else {'all': [...], 'any': [...],
+    'not': [...]} of normalized keys.
+    """
+    tag_filter = {
+        'all': _split_tag_names(tag),
+        'any': _split_tag_names(any_tags),
+        'not': _split_tag_names(not_tags),
+    }
+    for key in _split_tag_names(all_tags):
+        if key not in tag_filter['all']:
+            tag_filter['all'].append(key)
+    total = sum(len(keys) for keys in tag_filter.values())
+    if not total:
+        return None
+    if total > MAX_FILTER_TAGS:
+        raise FeedArgumentError(f'At most {MAX_FILTER_TAGS} tags can be combined')
+    return tag_filter
+
+
+def resolve_tag_filter(session, tag_filter):
+    """Map a parsed tag filter to tag ids with one query.
+
+    Returns {'all': [[ids], ...], 'any': [ids], 'not': [ids]}, or None when
+    the filter cannot match anything (a required tag does not exist).
+    """
+    keys = sorted({key for group in tag_filter.values() for key in group})
+    ids_by_key = {}
+    for tag_id, key in session.execute(text(
+        f"""
+        SELECT id, {HASHTAG_KEY_SQL.format(col='name')} AS key
+        FROM tag
+        WHERE {HASHTAG_KEY_SQL.format(col='name')} = ANY(:keys)
+        """
+    ), {'keys': keys}).all():
+        ids_by_key.setdefault(key, []).append(int(tag_id))
+
+    required = [ids_by_key.get(key) for key in tag_filter['all']]
+    if any(ids is None for ids in required):
+        return None
+    any_ids = [i for key in tag_filter['any'] for i in ids_by_key.get(key, [])]
+    if tag_filter['any'] and not any_ids:
+        return None
+    not_ids = [i for key in tag_filter['not'] for i in ids_by_key.get(key, [])]
+    return {'all': required, 'any': any_ids, 'not': not_ids}
+
+
+def tag_filter_clauses(resolved, event_column, params):
+    """SQL conditions restricting event_column to a resolved tag filter; adds bind params."""
+    clauses = []
+    for n, ids in enumerate(resolved['all']):
+        params[f'tag_all_{n}'] = ids
+        clauses.append(
+            f"EXISTS (SELECT 1 FROM event_tags et WHERE et.event_id = {event_column} AND et.tag_id = ANY(:tag_all_{n}))"
+        )
+    if resolved['any']:
+        params['tag_any'] = resolved['any']
+        clauses.append(
+            f"EXISTS (SELECT 1 FROM event_tags et WHERE et.event_id = {event_column} AND et.tag_id = ANY(:tag_any))"
+        )
+    if resolved['not']:
+        params['tag_not'] = resolved['not']
+        clauses.append(
+            f"NOT EXISTS (SELECT 1 FROM event_tags et WHERE et.event_id = {event_column} AND et.tag_id = ANY(:tag_not))"
+        )
+    return clauses
+
+
+def _reports_table_exists(session):
+    try:
+        row = session.execute(text("SELECT to_regclass('public.reports')")).first()
+        return bool(row and row[0])
+    except Exception:
+        return False
+
+
+def fetch_timeline_event_page(session, timeline_id, limit=DEFAULT_PAGE_SIZE, cursor=None,
+                              date_from=None, date_to=None, order='desc', tag_filter=None):
+    """Return one page of event ids for a timeline.
+
+    Args:
+        session: SQLAlchemy session.
+        timeline_id: timeline whose events are listed.
+        limit: page size (already clamped by the caller).
+        cursor: opaque cursor from a previous page, or None for the first page.
+        date_from / date_to: optional inclusive event_date window.
+        order: 'desc' (newest first, the timeline default) or 'asc'.
+        tag_filter: optional result of parse_tag_filter().
+
+    Returns:
+        (event_ids, next_cursor) where next_cursor is None on the last page.
+    """
+    descending = str(order or 'desc').lower() != 'asc'
+    params = {'tid': int(timeline_id), 'limit': int(limit) + 1}
+    position = decode_cursor(cursor)
+    tags = None
+    if tag_filter:
+        tags = resolve_tag_filter(session, tag_filter)
+        if tags is None:
+            return [], None
+    if index_read_ready(session):
+        rows = _fetch_indexed_page(session, params, position, date_from, date_to, descending, tags)
+    else:
+        rows = _fetch_union_page(session, params, position, date_from, date_to, descending, tags)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if has_more and rows else None
+    return [int(r[0]) for r in rows], next_cursor
+
+
+def _fetch_indexed_page(session, params, position, date_from, date_to, descending, tags=None):
+    """Page from timeline_event_index; hashtag-only members are not part of the feed."""
+    filters = ['i.timeline_id = :tid', "i.source <> 'hashtag'"]
+    if tags is not None:
+        filters.extend(tag_filter_clauses(tags, 'i.event_id', params))
+    if date_from is not None:
+        filters.append('i.event_date >= :date_from')
+        params['date_from'] = date_from
+    if date_to is not None:
+        filters.append('i.event_date <= :date_to')
+        params['date_to'] = date_to
+    if position is not None:
+        params['cursor_date'], params['cursor_id'] = position
+        comparator = '<' if descending else '>'
+        filters.append(f'(i.event_date, i.event_id) {comparator} (:cursor_date, :cursor_id)')
+
+    direction = 'DESC' if descending else 'ASC'
+    return session.execute(text(
+        f"""
+        SELECT i.event_id, i.event_date
+        FROM timeline_event_index i
+        WHERE {' AND '.join(filters)}
+        ORDER BY i.event_date {direction}, i.event_id {direction}
+        LIMIT :limit
+        """
+    ), params).all()
+
+
+def _fetch_union_page(session, params, position, date_from, date_to, descending, tags=None):
+    filters = []
+    if tags is not None:
+        filters.extend(tag_filter_clauses(tags, 'e.id', params))
+
+    if date_from is not None:
+        filters.append('e.event_date >= :date_from')
+        params['date_from'] = date_from
+    if date_to is not None:
+        filters.append('e.event_date <= :date_to')
+        params['date_to'] = date_to
+
+    if position is not None:
+        params['cursor_date'], params['cursor_id'] = position
+        comparator = '<' if descending else '>'
+        filters.append(f'(e.event_date, e.id) {comparator} (:cursor_date, :cursor_id)')
+
+    if _reports_table_exists(session):
+        filters.append(
+            """
+            NOT EXISTS (
+                SELECT 1 FROM reports r
+                WHERE r.timeline_id = :tid
+                  AND r.event_id = e.id
+                  AND r.status = 'resolved'
+                  AND r.resolution = 'remove'
+            )
+            """
+        )
+
+    where_sql = ('WHERE ' + ' AND '.join(filters)) if filters else ''
+    direction = 'DESC' if descending else 'ASC'
+    return session.execute(text(
+        f"""
+        WITH members AS (
+            SELECT id AS event_id FROM event WHERE timeline_id = :tid
+            UNION
+            SELECT event_id FROM event_timeline_refs WHERE timeline_id = :tid
+            UNION
+            SELECT event_id FROM event_timeline_association WHERE timeline_id = :tid
+        )
+        SELECT e.id, e.event_date
+        FROM event e
+        JOIN members m ON m.event_id = e.id
+        {where_sql}
+        ORDER BY e.event_date {direction}, e.id {direction}
+        LIMIT :limit
+        """
+    ), params).all()
+
+
+def feed_members_sql(session, params, date_from=None, date_to=None):
+    """SELECT of (event_id, event_date) for every feed member of :tid, optionally date-bounded.
+
+    Same membership as fetch_timeline_event_page, for aggregate queries that
+    wrap it in a CTE. Adds the date bind params to params; the caller binds :tid.
+    """
+    if index_read_ready(session):
+        filters = ['i.timeline_id = :tid', "i.source <> 'hashtag'"]
+        column = 'i.event_date'
+        base = 'SELECT i.event_id, i.event_date FROM timeline_event_index i'
+    else:
+        filters = []
+        column = 'e.event_date'
+        base = """
+            SELECT e.id AS event_id, e.event_date
+            FROM event e
+            JOIN (
+                SELECT id AS event_id FROM event WHERE timeline_id = :tid
+                UNION
+                SELECT event_id FROM event_timeline_refs WHERE timeline_id = :tid
+                UNION
+                SELECT event_id FROM event_timeline_association WHERE timeline_id = :tid
+            ) m ON m.event_id = e.id
+        """
+        if _reports_table_exists(session):
+            filters.append(
+                """
+                NOT EXISTS (
+                    SELECT 1 FROM reports r
+                    WHERE r.timeline_id = :tid
+                      AND r.event_id = e.id
+                      AND r.status = 'resolved'
+                      AND r.resolution = 'remove'
+                )
+                """
+            )
+    if date_from is not None:
+        filters.append(f'{column} >= :date_from')
+        params['date_from'] = date_from
+    if date_to is not None:
+        filters.append(f'{column} <= :date_to')
+        params['date_to'] = date_to
+    where_sql = ('WHERE ' + ' AND '.join(filters)) if filters else ''
+    return f"{base} {where_sql}"
@@ -0,0 +1,112 @@
+"""
+Per-timeline version counters for conditional GETs.
+
+timeline_version holds a counter per timeline that is bumped, inside the
+writer's transaction, by every write that changes what the timeline read
+endpoints return: the timeline row, its events (through
+timeline_event_index maintenance), members, info cards, actions and action
+votes, bans and the status message. Read endpoints turn the counter into a
+strong ETag and answer a matching If-None-Match with 304 before loading or
+hydrating anything.
+
+Payload fields copied from other rows (creator usernames and avatars, names
+of other timelines an event is associated with) do not bump the counter.
+"""
+import hashlib
+import logging
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+_state = {'table': False, 'event_index': False}
+_bump_listeners = []
+
+
+def ensure_timeline_version_table(conn):
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS timeline_version (
+            timeline_id INTEGER PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """
+    ))
+    _state['table'] = True
+
+
+def set_event_index_available(available=True):
+    """Let bump_event_timelines() read memberships from timeline_event_index."""
+    _state['event_index'] = bool(available)
+
+
+def add_bump_listener(listener):
+    """Register callable(timeline_ids) run after this worker bumps versions (e.g. to drop cached responses)."""
+    if listener not in _bump_listeners:
+        _bump_listeners.append(listener)
+
+
+def get_timeline_version(session, timeline_id):
+    """Current version of a timeline (0 when it was never bumped)."""
+    if not _state['table']:
+        return 0
+    row = session.execute(
+        text("SELECT version FROM timeline_version WHERE timeline_id = :tid"), {'tid': int(timeline_id)}
+    ).first()
+    return int(row[0]) if row else 0
+
+
+def bump_timeline_versions(conn, timeline_ids):
+    """Increment the version of each timeline. Does not commit.
+
+    conn may be a Connection or a Session. A no-op until the table exists.
+    """
+    ids = sorted({int(i) for i in timeline_ids or [] if i is not None})
+    if not ids or not _state['table']:
+        return
+    conn.execute(text(
+        """
+        INSERT INTO timeline_version (timeline_id, version, updated_at)
+        SELECT tid, 1, NOW() FROM unnest(CAST(:ids AS INTEGER[])) AS tid
+        ON CONFLICT (timeline_id)
+        DO UPDATE SET version = timeline_version.version + 1, updated_at = NOW()
+        """
+    ), {'ids': ids})
+    for listener in _bump_listeners:
+        try:
+            listener(ids)
+        except Exception as e:
+            logger.info(f"timeline version bump listener failed: {e}")
+
+
+def bump_event_timelines(conn, event_ids):
+    """Bump every timeline the given events currently appear on.
+
+    Call before deleting events: their index rows go away with them.
+    """
+    ids = sorted({int(i) for i in event_ids or [] if i is not None})
+    if not ids or not _state['table']:
+        return
+    index_sql = ''
+    if _state['event_index']:
+        index_sql = 'UNION SELECT timeline_id FROM timeline_event_index WHERE event_id = ANY(:ids)'
+    rows = conn.execute(text(
+        f"""
+        SELECT timeline_id FROM event WHERE id = ANY(:ids)
+        UNION SELECT timeline_id FROM event_timeline_refs WHERE event_id = ANY(:ids)
+        UNION SELECT timeline_id FROM event_timeline_association WHERE event_id = ANY(:ids)
+        {index_sql}
+        """
+    ), {'ids': ids}).all()
+    bump_timeline_versions(conn, [r[0] for r in rows])
+
+
+def build_etag(kind, timeline_id, version, *vary):
+    """Strong ETag value for one representation of a timeline resource.
+
+    vary holds whatever else the response depends on (viewer id, query
+    string, ban set, ...).
+    """
+    raw = '|'.join([str(kind), str(timeline_id), str(version)] + [str(v) for v in vary])
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+    return f"t{int(timeline_id)}-v{int(version)}-{digest}"
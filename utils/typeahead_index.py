@@ -0,0 +1,361 @@
+"""
+Per-worker prefix index for mention autocomplete.
+
+The composer recognizes @username, #hashtag and i-community mentions (see
+_parse_description_to_content in app.py), but the only lookups were an ilike
+scan over users and an exact timeline-by-name query. TypeaheadIndex keeps,
+for each kind, a sorted array of (lowercased name, id) keys; a prefix maps to
+a contiguous slice found with bisect, and the best matches in the slice are
+picked by popularity:
+
+  - user: events created
+  - hashtag: events on the timeline
+  - community: active members
+
+Slices for one- and two-character prefixes can hold most of the index, so
+their top matches are cached until the next change touching that prefix.
+
+New rows are picked up incrementally every refresh_seconds by reading ids
+above the last one seen. Ids rather than created_at: the models' created_at
+defaults are evaluated once per process, so they do not order inserts.
+Renames, deletions and popularity drift are picked up by a full rebuild
+every rebuild_seconds. A commit that renames a user or timeline, or deletes a
+timeline, marks its session stale (mark_stale()); app.py then invalidates
+this worker's index so it rebuilds on the next lookup. Other workers catch up
+at their next rebuild. Personal timelines are not indexed; banned timelines
+are filtered out at lookup time.
+
+Once init_app() has bound the app, builds, top-ups and rebuilds run on a
+per-worker background thread and lookups keep serving the current arrays, so
+no request waits on the aggregate queries. Until a worker's first build
+finishes its lookups come back empty (ready() is False).
+"""
+import bisect
+import heapq
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('user', 'hashtag', 'community')
+SIGILS = (('@', 'user'), ('#', 'hashtag'), ('i-', 'community'))
+DEFAULT_REFRESH_SECONDS = 30.0
+DEFAULT_REBUILD_SECONDS = 120.0
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 25
+CACHED_PREFIX_LENGTH = 2
+# Over-fetch so dropping banned timelines still fills a page
+BANNED_HEADROOM = 10
+
+STALE_KEY = 'typeahead_stale'
+
+_PREFIX_END = '\U0010ffff'
+
+
+def mark_stale(session):
+    """Invalidate the index once session commits (a name was changed or removed)."""
+    session.info[STALE_KEY] = True
+
+
+def take_stale(session):
+    """True if session was marked stale; clears the mark."""
+    return bool(session.info.pop(STALE_KEY, False))
+
+
+def parse_typeahead_limit(value):
+    try:
+        limit = int(value) if value not in (None, '') else DEFAULT_LIMIT
+    except (TypeError, ValueError):
+        raise ValueError("Invalid 'limit'")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def parse_typeahead_query(q, kinds=None):
+    """Split a query such as '@al', '#foo' or 'i-co' into (kinds, prefix).
+
+    A leading sigil picks the kind; otherwise kinds is a comma-separated
+    subset of KINDS (default: all of them).
+    """
+    raw = str(q or '').strip()
+    for sigil, kind in SIGILS:
+        if raw.lower().startswith(sigil):
+            return [kind], raw[len(sigil):].strip().lower()
+    picked = []
+    for part in str(kinds or '').split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part not in KINDS:
+            raise ValueError(f"Invalid 'kind' (use {', '.join(KINDS)})")
+        if part not in picked:
+            picked.append(part)
+    return picked or list(KINDS), raw.lower()
+
+
+class _PrefixTable:
+    """Sorted (key, id) array with popularity-ranked prefix lookups."""
+
+    def __init__(self, entries=()):
+        self.entries = {}
+        self.keys = []
+        self._top = {}
+        for entry in entries:
+            self.entries[entry['id']] = entry
+        self.keys = sorted((entry['name'].lower(), entry['id']) for entry in self.entries.values())
+
+    def add(self, entry):
+        old = self.entries.get(entry['id'])
+        if old is not None:
+            self.keys.remove((old['name'].lower(), old['id']))
+            self._forget(old['name'])
+        self.entries[entry['id']] = entry
+        bisect.insort(self.keys, (entry['name'].lower(), entry['id']))
+        self._forget(entry['name'])
+
+    def _forget(self, name):
+        key = name.lower()
+        for n in range(CACHED_PREFIX_LENGTH + 1):
+            self._top.pop(key[:n], None)
+
+    def _rank(self, ids, limit):
+        return heapq.nsmallest(
+            limit, ids,
+            key=lambda i: (-self.entries[i]['popularity'], len(self.entries[i]['name']), self.entries[i]['name'].lower(), i)
+        )
+
+    def lookup(self, prefix, limit):
+        if len(prefix) <= CACHED_PREFIX_LENGTH:
+            top = self._top.get(prefix)
+            if top is None:
+                # Deep enough for any limit, so one ranking serves every request for this prefix
+                top = self._rank(self._slice(prefix), MAX_LIMIT + BANNED_HEADROOM)
+                self._top[prefix] = top
+            return [self.entries[i] for i in top[:limit]]
+        return [self.entries[i] for i in self._rank(self._slice(prefix), limit)]
+
+    def _slice(self, prefix):
+        lo = bisect.bisect_left(self.keys, (prefix,))
+        hi = bisect.bisect_left(self.keys, (prefix + _PREFIX_END,))
+        return [entry_id for _, entry_id in self.keys[lo:hi]]
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def _load_users(session, after_id=0):
+    rows = session.execute(text(
+        """
+        SELECT u.id, u.username, u.avatar_url, COALESCE(c.n, 0)
+        FROM "user" u
+        LEFT JOIN (
+            SELECT created_by, COUNT(*) AS n FROM event
+            WHERE created_by IN (SELECT id FROM "user" WHERE id > :after)
+            GROUP BY created_by
+        ) c ON c.created_by = u.id
+        WHERE u.id > :after
+        """
+    ), {'after': int(after_id)}).all()
+    return [
+        {'id': int(r[0]), 'name': r[1], 'avatar_url': r[2], 'popularity': int(r[3])}
+        for r in rows if r[1]
+    ]
+
+
+def _load_timelines(session, after_id=0):
+    rows = session.execute(text(
+        """
+        SELECT t.id, t.name, t.timeline_type, COALESCE(t.visibility, 'public'),
+               CASE WHEN t.timeline_type = 'community' THEN COALESCE(m.n, 0) ELSE COALESCE(e.n, 0) END
+        FROM timeline t
+        LEFT JOIN (
+            SELECT timeline_id, COUNT(*) AS n FROM timeline_member
+            WHERE is_active_member = TRUE AND timeline_id > :after
+            GROUP BY timeline_id
+        ) m ON m.timeline_id = t.id
+        LEFT JOIN (
+            SELECT timeline_id, COUNT(*) AS n FROM (
+                SELECT timeline_id, id AS event_id FROM event WHERE timeline_id > :after
+                UNION SELECT timeline_id, event_id FROM event_timeline_refs WHERE timeline_id > :after
+            ) members
+            GROUP BY timeline_id
+        ) e ON e.timeline_id = t.id
+        WHERE t.id > :after AND t.timeline_type IN ('hashtag', 'community')
+        """
+    ), {'after': int(after_id)}).all()
+    return [
+        {'id': int(r[0]), 'name': r[1], 'timeline_type': r[2], 'visibility': r[3], 'popularity': int(r[4])}
+        for r in rows if r[1]
+    ]
+
+
+class TypeaheadIndex:
+    """Prefix index over usernames and hashtag / community timeline names."""
+
+    def __init__(self, refresh_seconds=DEFAULT_REFRESH_SECONDS, rebuild_seconds=DEFAULT_REBUILD_SECONDS):
+        self.refresh_seconds = float(refresh_seconds)
+        self.rebuild_seconds = float(rebuild_seconds)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._tables = None
+        self._last_user_id = 0
+        self._last_timeline_id = 0
+        self._refreshed_at = 0.0
+        self._rebuilt_at = 0.0
+        self._app = None
+        self._db = None
+        self._executor = None
+        self._executor_pid = None
+        self._refresh_pending = False
+        self.lookups = 0
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def init_app(self, app, db):
+        """Bind the Flask app and SQLAlchemy handle so refreshes run in the background."""
+        self._app = app
+        self._db = db
+
+    def _rebuild(self, session):
+        users = _load_users(session)
+        timelines = _load_timelines(session)
+        tables = {
+            'user': _PrefixTable(users),
+            'hashtag': _PrefixTable(t for t in timelines if t['timeline_type'] == 'hashtag'),
+            'community': _PrefixTable(t for t in timelines if t['timeline_type'] == 'community'),
+        }
+        now = time.monotonic()
+        with self._lock:
+            self._tables = tables
+            self._last_user_id = max((u['id'] for u in users), default=0)
+            self._last_timeline_id = max((t['id'] for t in timelines), default=0)
+            self._refreshed_at = self._rebuilt_at = now
+            self.rebuilds += 1
+
+    def _top_up(self, session):
+        users = _load_users(session, self._last_user_id)
+        timelines = _load_timelines(session, self._last_timeline_id)
+        with self._lock:
+            for user in users:
+                self._tables['user'].add(user)
+                self._last_user_id = max(self._last_user_id, user['id'])
+            for timeline in timelines:
+                self._tables[timeline['timeline_type']].add(timeline)
+                self._last_timeline_id = max(self._last_timeline_id, timeline['id'])
+            self._refreshed_at = time.monotonic()
+            self.refreshes += 1
+
+    def _due(self):
+        return self._tables is None or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    def _refresh(self, session, blocking=False):
+        # Only one thread refreshes; the others keep serving the current arrays
+        if not self._refresh_lock.acquire(blocking=blocking):
+            return
+        try:
+            now = time.monotonic()
+            if self._tables is None or now - self._rebuilt_at >= self.rebuild_seconds:
+                self._rebuild(session)
+            elif now - self._refreshed_at >= self.refresh_seconds:
+                self._top_up(session)
+        except Exception as e:
+            # Keep serving what we have; the next lookup retries
+            with self._lock:
+                self.refresh_failures += 1
+                self._refreshed_at = time.monotonic()
+            logger.info(f"typeahead index refresh failed: {e}")
+            session.rollback()
+        finally:
+            self._refresh_lock.release()
+
+    def _get_executor(self):
+        # Created lazily and recreated after a fork so each gunicorn worker owns its thread
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='typeahead')
+            self._executor_pid = pid
+            self._refresh_pending = False
+        return self._executor
+
+    def _background_refresh(self):
+        try:
+            with self._app.app_context():
+                try:
+                    self._refresh(self._db.session, blocking=True)
+                finally:
+                    self._db.session.remove()
+        finally:
+            with self._lock:
+                self._refresh_pending = False
+
+    def ensure_fresh(self, session):
+        """Build the index on first use, then top it up or rebuild it when due.
+
+        In the background once init_app() has run; otherwise inline on session.
+        """
+        if not self._due():
+            return
+        if self._app is None:
+            self._refresh(session, blocking=self._tables is None)
+            return
+        with self._lock:
+            executor = self._get_executor()
+            if self._refresh_pending:
+                return
+            self._refresh_pending = True
+        executor.submit(self._background_refresh)
+
+    def ready(self):
+        """True once this worker has built its index."""
+        return self._tables is not None
+
+    def lookup(self, session, kinds, prefix, limit=DEFAULT_LIMIT, banned_timeline_ids=None):
+        """Best matches for prefix per kind: {kind: [entry, ...]}."""
+        self.ensure_fresh(session)
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        banned = banned_timeline_ids or ()
+        results = {}
+        with self._lock:
+            self.lookups += 1
+            tables = self._tables or {}
+            for kind in kinds:
+                table = tables.get(kind)
+                if table is None:
+                    results[kind] = []
+                    continue
+                if kind == 'user' or not banned:
+                    matches = table.lookup(prefix, limit)
+                else:
+                    matches = [m for m in table.lookup(prefix, limit + BANNED_HEADROOM) if m['id'] not in banned]
+                results[kind] = [dict(m) for m in matches[:limit]]
+        return results
+
+    def invalidate(self):
+        """Force a full rebuild on the next lookup (e.g. after a rename)."""
+        with self._lock:
+            self._rebuilt_at = 0.0
+            self._refreshed_at = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'lookups': self.lookups,
+                'rebuilds': self.rebuilds,
+                'refreshes': self.refreshes,
+                'refresh_failures': self.refresh_failures,
+                'ready': self._tables is not None,
+                'refresh_pending': self._refresh_pending,
+                'refresh_seconds': self.refresh_seconds,
+                'rebuild_seconds': self.rebuild_seconds,
+                'entries': {kind: len(table) for kind, table in (self._tables or {}).items()},
+            }
+
+
+typeahead_index = TypeaheadIndex(
+    refresh_seconds=float(os.getenv('TYPEAHEAD_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)),
+    rebuild_seconds=float(os.getenv('TYPEAHEAD_REBUILD_SECONDS', DEFAULT_REBUILD_SECONDS)),
+)
@@ -0,0 +1,72 @@
+"""
+Event vote tallies in a single statement.
+
+Promote/demote counts and the caller's own vote come from one grouped
+query with FILTER clauses (served by the (event_id, user_id) unique index
+on vote), for one event or a whole page of events.
+"""
+import logging
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+MAX_BULK_EVENT_IDS = 200
+
+
+def parse_event_ids(raw):
+    """Parse "1,2,3" (or a list) into unique positive ints, preserving order."""
+    if raw is None:
+        return []
+    parts = raw if isinstance(raw, (list, tuple)) else str(raw).split(',')
+    ids = []
+    seen = set()
+    for part in parts:
+        try:
+            value = int(str(part).strip())
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid event id: {part!r}")
+        if value > 0 and value not in seen:
+            seen.add(value)
+            ids.append(value)
+    return ids
+
+
+def fetch_vote_tallies(session, event_ids, user_id=None):
+    """Return {event_id: tally} for the events in event_ids that exist.
+
+    Each tally has event_id, promote_count, demote_count, total_count and
+    user_vote (None when user_id is None or the user has not voted).
+    """
+    ids = [int(i) for i in event_ids or []]
+    if not ids:
+        return {}
+    rows = session.execute(text(
+        """
+        SELECT e.id AS event_id,
+               COUNT(v.id) FILTER (WHERE v.vote_type = 'promote') AS promote_count,
+               COUNT(v.id) FILTER (WHERE v.vote_type = 'demote') AS demote_count,
+               MAX(v.vote_type) FILTER (WHERE v.user_id = :uid) AS user_vote
+        FROM event e
+        LEFT JOIN vote v ON v.event_id = e.id
+        WHERE e.id = ANY(:ids)
+        GROUP BY e.id
+        """
+    ), {'ids': ids, 'uid': int(user_id) if user_id is not None else None}).mappings().all()
+
+    tallies = {}
+    for row in rows:
+        promote_count = int(row['promote_count'] or 0)
+        demote_count = int(row['demote_count'] or 0)
+        tallies[int(row['event_id'])] = {
+            'event_id': int(row['event_id']),
+            'promote_count': promote_count,
+            'demote_count': demote_count,
+            'total_count': promote_count + demote_count,
+            'user_vote': row['user_vote'],
+        }
+    return tallies
+
+
+def fetch_vote_tally(session, event_id, user_id=None):
+    """Tally for a single event, or None if the event does not exist."""
+    return fetch_vote_tallies(session, [event_id], user_id=user_id).get(int(event_id))